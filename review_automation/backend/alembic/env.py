@@ -0,0 +1,39 @@
+# env.py - alembic 실행 환경 (app.database의 DATABASE_URL / 엔진과 모델 메타데이터 사용)
+from logging.config import fileConfig
+
+from alembic import context
+
+from app.database import DATABASE_URL, engine, Base
+from app import models  # noqa: F401 - 모든 테이블을 메타데이터에 등록
+
+config = context.config
+
+if config.config_file_name is not None:
+    fileConfig(config.config_file_name)
+
+target_metadata = Base.metadata
+
+
+def run_migrations_offline():
+    """SQL만 출력 (alembic upgrade head --sql)"""
+    context.configure(
+        url=DATABASE_URL,
+        target_metadata=target_metadata,
+        literal_binds=True,
+        dialect_opts={"paramstyle": "named"},
+    )
+    with context.begin_transaction():
+        context.run_migrations()
+
+
+def run_migrations_online():
+    with engine.connect() as connection:
+        context.configure(connection=connection, target_metadata=target_metadata)
+        with context.begin_transaction():
+            context.run_migrations()
+
+
+if context.is_offline_mode():
+    run_migrations_offline()
+else:
+    run_migrations_online()
@@ -0,0 +1,134 @@
+"""baseline - init_db.create_all로 만들던 스키마
+
+Revision ID: 0001
+Revises:
+Create Date: 2026-10-18
+
+이 리비전 이전에는 테이블을 init_db.create_all로 만들었다.
+그렇게 만든 기존 DB는 python -m app.migrate가 이 리비전으로 stamp만 하고 다음 리비전부터 적용한다.
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0001"
+down_revision = None
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        "reviews",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("source_id", sa.String(200), nullable=False),
+        sa.Column("customer_name", sa.String(100), nullable=False),
+        sa.Column("review_text", sa.Text(), nullable=False),
+        sa.Column("review_date", sa.DateTime(), nullable=False),
+        sa.Column("keywords", sa.JSON(), nullable=True),
+        sa.Column("generated_reply", sa.Text(), nullable=True),
+        sa.Column("reply_posted", sa.Boolean(), nullable=True),
+        sa.Column("reply_posted_at", sa.DateTime(), nullable=True),
+        sa.Column("sentiment", sa.String(20), nullable=True),
+        sa.Column("priority", sa.Float(), nullable=True),
+        sa.Column("created_at", sa.DateTime(), server_default=sa.func.now()),
+        sa.Column("updated_at", sa.DateTime(), server_default=sa.func.now()),
+    )
+    op.create_index("ix_reviews_id", "reviews", ["id"])
+    op.create_index("ix_reviews_source_id", "reviews", ["source_id"], unique=True)
+    op.create_index("ix_reviews_priority", "reviews", ["priority"])
+
+    op.create_table(
+        "system_logs",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("log_type", sa.String(50), nullable=False),
+        sa.Column("message", sa.Text(), nullable=False),
+        sa.Column("details", sa.JSON(), nullable=True),
+        sa.Column("created_at", sa.DateTime(), server_default=sa.func.now()),
+    )
+    op.create_index("ix_system_logs_id", "system_logs", ["id"])
+
+    op.create_table(
+        "scrape_cursors",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("source", sa.String(500), nullable=False),
+        sa.Column("cursor", sa.String(200), nullable=True),
+        sa.Column("last_review_id", sa.String(200), nullable=True),
+        sa.Column("last_review_date", sa.DateTime(), nullable=True),
+        sa.Column("etag", sa.String(200), nullable=True),
+        sa.Column("last_modified", sa.String(100), nullable=True),
+        sa.Column("updated_at", sa.DateTime(), server_default=sa.func.now()),
+    )
+    op.create_index("ix_scrape_cursors_id", "scrape_cursors", ["id"])
+    op.create_index("ix_scrape_cursors_source", "scrape_cursors", ["source"], unique=True)
+
+    op.create_table(
+        "llm_cache",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("cache_key", sa.String(64), nullable=False),
+        sa.Column("kind", sa.String(20), nullable=False),
+        sa.Column("value", sa.JSON(), nullable=False),
+        sa.Column("model", sa.String(100), nullable=False),
+        sa.Column("prompt_version", sa.String(20), nullable=False),
+        sa.Column("latency_ms", sa.Integer(), nullable=True),
+        sa.Column("hit_count", sa.Integer(), nullable=True),
+        sa.Column("created_at", sa.DateTime(), server_default=sa.func.now()),
+        sa.Column("expires_at", sa.DateTime(), nullable=False),
+    )
+    op.create_index("ix_llm_cache_id", "llm_cache", ["id"])
+    op.create_index("ix_llm_cache_cache_key", "llm_cache", ["cache_key"], unique=True)
+    op.create_index("ix_llm_cache_expires_at", "llm_cache", ["expires_at"])
+
+    op.create_table(
+        "review_fingerprints",
+        sa.Column("review_id", sa.Integer(), sa.ForeignKey("reviews.id", ondelete="CASCADE"), primary_key=True),
+        sa.Column("simhash", sa.BigInteger(), nullable=False),
+        sa.Column("created_at", sa.DateTime(), server_default=sa.func.now()),
+    )
+
+    op.create_table(
+        "customer_stories",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("customer_name", sa.String(100), nullable=False),
+        sa.Column("review_digest", sa.String(64), nullable=True),
+        sa.Column("story", sa.Text(), nullable=False),
+        sa.Column("profile", sa.JSON(), nullable=False),
+        sa.Column("loyalty_score", sa.Integer(), nullable=True),
+        sa.Column("status", sa.String(20), nullable=False),
+        sa.Column("generated_at", sa.DateTime(), nullable=True),
+        sa.Column("updated_at", sa.DateTime(), server_default=sa.func.now()),
+    )
+    op.create_index("ix_customer_stories_id", "customer_stories", ["id"])
+    op.create_index("ix_customer_stories_customer_name", "customer_stories", ["customer_name"], unique=True)
+    op.create_index("ix_customer_stories_loyalty_score", "customer_stories", ["loyalty_score"])
+
+    op.create_table(
+        "reply_jobs",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("review_id", sa.Integer(), sa.ForeignKey("reviews.id", ondelete="CASCADE"),
+                  nullable=False, unique=True),
+        sa.Column("status", sa.String(20), nullable=False),
+        sa.Column("priority", sa.Float(), nullable=False),
+        sa.Column("worker_id", sa.String(100), nullable=True),
+        sa.Column("leased_until", sa.DateTime(), nullable=True),
+        sa.Column("heartbeat_at", sa.DateTime(), nullable=True),
+        sa.Column("attempts", sa.Integer(), nullable=False),
+        sa.Column("last_error", sa.Text(), nullable=True),
+        sa.Column("next_attempt_at", sa.DateTime(), nullable=True),
+        sa.Column("created_at", sa.DateTime(), server_default=sa.func.now()),
+        sa.Column("updated_at", sa.DateTime(), server_default=sa.func.now()),
+        sa.Column("finished_at", sa.DateTime(), nullable=True),
+    )
+    op.create_index("ix_reply_jobs_id", "reply_jobs", ["id"])
+    op.create_index("ix_reply_jobs_leased_until", "reply_jobs", ["leased_until"])
+    op.create_index("ix_reply_jobs_next_attempt_at", "reply_jobs", ["next_attempt_at"])
+    op.create_index("ix_reply_jobs_status_priority", "reply_jobs", ["status", "priority"])
+
+
+def downgrade():
+    op.drop_table("reply_jobs")
+    op.drop_table("customer_stories")
+    op.drop_table("review_fingerprints")
+    op.drop_table("llm_cache")
+    op.drop_table("scrape_cursors")
+    op.drop_table("system_logs")
+    op.drop_table("reviews")
@@ -0,0 +1,75 @@
+"""자주 쓰는 조회용 부분 / 복합 인덱스 (CONCURRENTLY)
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-18
+
+- 대기 / 게시 대기 / 작업 상태별 인덱스는 해당 행만 담는 부분 인덱스라 조회 비용이 테이블 크기가 아니라 대기 건수에 비례한다.
+- 운영 중인 테이블에 쓰기를 막지 않도록 CREATE INDEX CONCURRENTLY로 만든다 (트랜잭션 밖에서 실행해야 하므로 autocommit_block).
+- 빌드가 중간에 실패하면 INVALID 인덱스가 남으므로, 다시 실행하면 그 인덱스를 삭제하고 새로 만든다.
+- 새 부분 인덱스로 대체되는 단일 / 복합 인덱스는 삭제한다.
+- 인덱스 정의는 app/models.py의 __table_args__와 같아야 한다 (새 DB는 init_db.create_all로도 같은 스키마가 됨).
+"""
+from alembic import op
+
+revision = "0002"
+down_revision = "0001"
+branch_labels = None
+depends_on = None
+
+# (인덱스 이름, ON 절)
+INDEXES = [
+    ("ix_reviews_review_date", "reviews (review_date DESC)"),
+    ("ix_reviews_sentiment_review_date", "reviews (sentiment, review_date)"),
+    ("ix_reviews_pending_priority", "reviews (priority DESC, id) WHERE generated_reply IS NULL"),
+    ("ix_reviews_pending_review_date", "reviews (review_date DESC) WHERE generated_reply IS NULL"),
+    ("ix_reviews_unposted", "reviews (id) WHERE reply_posted = false AND generated_reply IS NOT NULL"),
+    ("ix_reply_jobs_claimable", "reply_jobs (priority DESC, id) WHERE status = 'pending'"),
+    ("ix_reply_jobs_running_lease", "reply_jobs (leased_until) WHERE status = 'running'"),
+    ("ix_reply_jobs_dead", "reply_jobs (finished_at DESC) WHERE status = 'dead'"),
+]
+
+# 위 인덱스로 대체되는 기존 인덱스
+REPLACED = [
+    ("ix_reviews_priority", "reviews (priority)"),
+    ("ix_reply_jobs_status_priority", "reply_jobs (status, priority)"),
+    ("ix_reply_jobs_leased_until", "reply_jobs (leased_until)"),
+]
+
+
+def _drop_invalid(name: str):
+    """중단된 CONCURRENTLY 빌드가 남긴 INVALID 인덱스 삭제 (IF NOT EXISTS가 그대로 건너뛰지 않도록)
+
+    autocommit_block 안에서 호출하므로 삭제도 CONCURRENTLY로 해서 테이블 읽기/쓰기를 막지 않는다.
+    """
+    invalid = op.get_bind().exec_driver_sql(
+        "SELECT NOT indisvalid FROM pg_index WHERE indexrelid = to_regclass(%(name)s)", {"name": name}
+    ).scalar()
+    if invalid:
+        print(f"  - INVALID 인덱스 {name} 삭제 후 다시 생성")
+        op.execute(f"DROP INDEX CONCURRENTLY IF EXISTS {name}")
+
+
+def _create(indexes):
+    with op.get_context().autocommit_block():
+        for name, target in indexes:
+            _drop_invalid(name)
+            op.execute(f"CREATE INDEX CONCURRENTLY IF NOT EXISTS {name} ON {target}")
+
+
+def _drop(indexes):
+    with op.get_context().autocommit_block():
+        for name, _ in indexes:
+            op.execute(f"DROP INDEX CONCURRENTLY IF EXISTS {name}")
+
+
+def upgrade():
+    _create(INDEXES)
+    op.execute("ANALYZE reviews")
+    op.execute("ANALYZE reply_jobs")
+    _drop(REPLACED)
+
+
+def downgrade():
+    _create(REPLACED)
+    _drop(INDEXES)
@@ -0,0 +1,23 @@
+"""reply_jobs.last_error_transient - LLM 장애로 실패한 작업은 시도 횟수에 넣지 않음
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-18
+
+- NULL 허용 + 기본값 없는 컬럼이라 PostgreSQL은 테이블을 다시 쓰지 않고 카탈로그만 바꾼다 (NULL은 False로 취급).
+- create_all로 만든 DB는 app.migrate가 stamp 전에 add_missing_columns로 이미 컬럼을 추가하므로 IF NOT EXISTS.
+"""
+from alembic import op
+
+revision = "0003"
+down_revision = "0002"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.execute("ALTER TABLE reply_jobs ADD COLUMN IF NOT EXISTS last_error_transient BOOLEAN")
+
+
+def downgrade():
+    op.execute("ALTER TABLE reply_jobs DROP COLUMN IF EXISTS last_error_transient")
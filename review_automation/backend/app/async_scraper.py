@@ -0,0 +1,275 @@
+# async_scraper.py - 여러 지점(소스)의 리뷰를 동시에 수집하는 비동기 스크래퍼
+import asyncio
+import os
+import time
+from contextlib import ExitStack
+from typing import List, Dict
+from urllib.parse import urlparse
+
+import httpx
+from dotenv import load_dotenv
+from sqlalchemy.orm import Session
+
+from app.models import SystemLog
+from app.scraper import ReviewScraper, ScrapeInProgressError
+
+load_dotenv()
+
+
+def parse_sources(spec: str = None) -> List[Dict]:
+    """SCRAPE_SOURCES 환경변수를 소스 목록으로 변환
+
+    형식: "gangnam=http://host1:5000,hongdae=http://host2:5000"
+    이름을 생략하면 source_id 접두사로 "dummy"를 사용한다.
+    """
+    spec = spec if spec is not None else os.getenv("SCRAPE_SOURCES", "")
+    sources = []
+
+    for entry in spec.split(','):
+        entry = entry.strip()
+        if not entry:
+            continue
+        if '=' in entry:
+            name, url = entry.split('=', 1)
+        else:
+            name, url = "dummy", entry
+        sources.append({"name": name.strip(), "url": url.strip().rstrip('/')})
+
+    if not sources:
+        sources.append({
+            "name": "dummy",
+            "url": os.getenv("DUMMY_SITE_URL", "http://localhost:5000")
+        })
+
+    return sources
+
+
+class AsyncMultiSourceScraper:
+    """소스별 HTTP 요청을 asyncio로 동시에 보내고, 도착하는 순서대로 DB에 저장"""
+
+    def __init__(self, sources: List[Dict] = None, max_connections: int = None,
+                 per_host_limit: int = None, timeout: float = None):
+        self.sources = sources or parse_sources()
+
+        # 전체 커넥션 풀 크기 / 호스트별 동시 요청 수 / 소스별 타임아웃(초)
+        self.max_connections = max_connections or int(os.getenv("SCRAPE_MAX_CONNECTIONS", "20"))
+        self.per_host_limit = per_host_limit or int(os.getenv("SCRAPE_PER_HOST_LIMIT", "2"))
+        self.timeout = timeout or float(os.getenv("SCRAPE_SOURCE_TIMEOUT", "10"))
+
+        # 파싱/커서/저장 로직은 소스별 ReviewScraper를 그대로 재사용
+        self.scrapers = {
+            source["name"]: ReviewScraper(base_url=source["url"], source_prefix=source["name"])
+            for source in self.sources
+        }
+
+    async def _fetch_source(self, client: httpx.AsyncClient, source: Dict,
+                            host_limits: Dict[str, asyncio.Semaphore],
+                            params: Dict, headers: Dict) -> Dict:
+        """소스 하나의 리뷰 API 호출 (호스트별 동시성 제한 + 소스별 타임아웃)"""
+        scraper = self.scrapers[source["name"]]
+        timeout = source.get("timeout", self.timeout)
+        result = {"name": source["name"], "url": source["url"], "reviews": [],
+                  "meta": scraper.response_meta(None)}
+        start_time = time.time()
+
+        try:
+            async with host_limits[urlparse(source["url"]).netloc]:
+                response = await asyncio.wait_for(
+                    client.get(
+                        f"{source['url']}/api/reviews",
+                        params=params,
+                        headers=headers,
+                        timeout=timeout
+                    ),
+                    timeout=timeout
+                )
+            # httpx는 304도 raise_for_status에서 예외로 처리하므로 먼저 걸러낸다
+            if response.status_code != 304:
+                response.raise_for_status()
+
+            result["meta"] = scraper.response_meta(response)
+            if not result["meta"]["not_modified"]:
+                reviews = []
+                for review in response.json():
+                    parsed = scraper.parse_review(review)
+                    if parsed:
+                        reviews.append(parsed)
+                result["reviews"] = reviews
+
+        except Exception as e:
+            # 어떤 예외든 이 소스만 실패로 처리 (다른 소스의 수집 / 저장은 계속)
+            result["error"] = f"{type(e).__name__}: {e}"
+            # 받은 응답이 있어도 검증자를 저장하면 안 되므로 실패 메타데이터로 되돌림
+            result["meta"] = scraper.response_meta(None, error=result["error"])
+            print(f"❌ [{source['name']}] 스크래핑 실패: {result['error']}")
+
+        result["fetch_seconds"] = round(time.time() - start_time, 3)
+        return result
+
+    def _save_source_result(self, db: Session, result: Dict, cursor) -> Dict:
+        """소스 하나의 수집 결과 저장 + 커서 전진 + 소스별 로그"""
+        scraper = self.scrapers[result["name"]]
+        start_time = time.time()
+        total_scraped, saved_count, latest = 0, 0, None
+
+        if not result["meta"]["failed"]:
+            total_scraped, saved_count, latest = scraper.save_review_stream(db, result["reviews"])
+            if scraper.incremental:
+                scraper.save_cursor(db, cursor, result["meta"], latest)
+
+        summary = {
+            "source": result["name"],
+            "url": result["url"],
+            "total_scraped": total_scraped,
+            "saved_count": saved_count,
+            "fetch_seconds": result["fetch_seconds"],
+            "save_seconds": round(time.time() - start_time, 3),
+            "not_modified": result["meta"]["not_modified"],
+        }
+        if "error" in result:
+            summary["error"] = result["error"]
+
+        log = SystemLog(
+            log_type="error" if "error" in result else "scraping",
+            message=f"[{result['name']}] 스크래핑 {'실패' if 'error' in result else '완료'}: {saved_count}개 저장",
+            details=summary
+        )
+        db.add(log)
+        db.commit()
+
+        return summary
+
+    def _failed_save_summary(self, result: Dict, error: str) -> Dict:
+        """저장 중 예외가 난 소스의 요약 (커서는 전진하지 않았으므로 다음 회차에 같은 범위를 다시 수집)"""
+        return {
+            "source": result["name"],
+            "url": result["url"],
+            "total_scraped": 0,
+            "saved_count": 0,
+            "fetch_seconds": result["fetch_seconds"],
+            "save_seconds": 0,
+            "not_modified": False,
+            "error": error,
+        }
+
+    def _skipped_summary(self, source: Dict, reason: str) -> Dict:
+        """다른 실행(/scrape, 스케줄러, 다른 레플리카)이 수집 중이라 건너뛴 소스의 요약"""
+        return {
+            "source": source["name"],
+            "url": source["url"],
+            "total_scraped": 0,
+            "saved_count": 0,
+            "fetch_seconds": 0,
+            "save_seconds": 0,
+            "not_modified": False,
+            "skipped": reason,
+        }
+
+    async def scrape_all(self, db: Session) -> List[Dict]:
+        """모든 소스를 동시에 수집 (전체 소요시간 ≈ 가장 느린 소스)
+
+        소스마다 ReviewScraper.single_flight 락을 잡은 뒤 커서를 읽고, 저장이 끝날 때까지 유지한다.
+        락을 못 잡은 소스(이미 수집 중)는 스케줄러처럼 이번 회차에서 건너뛴다.
+        """
+        with ExitStack() as locks:
+            sources, skipped = [], []
+            for source in self.sources:
+                try:
+                    locks.enter_context(self.scrapers[source["name"]].single_flight(db))
+                except ScrapeInProgressError as e:
+                    print(f"⏭️  [{source['name']}] {e}")
+                    skipped.append(self._skipped_summary(source, str(e)))
+                    continue
+                sources.append(source)
+
+            return await self._scrape_sources(db, sources) + skipped
+
+    async def _scrape_sources(self, db: Session, sources: List[Dict]) -> List[Dict]:
+        """락을 잡은 소스들을 동시에 요청하고 먼저 끝난 순서대로 저장"""
+        if not sources:
+            return []
+
+        # 커서와 요청 파라미터는 요청 전에 한 번에 만들어 둔다
+        # (저장 중 커밋으로 ORM 객체가 만료되어도 이벤트 루프에서 DB를 건드리지 않도록)
+        cursors = {}
+        request_args = {}
+        for source in sources:
+            scraper = self.scrapers[source["name"]]
+            cursor = scraper.load_cursor(db) if scraper.incremental else None
+            cursors[source["name"]] = cursor
+            request_args[source["name"]] = (
+                scraper.build_incremental_params(cursor),
+                scraper.build_conditional_headers(cursor)
+            )
+
+        host_limits = {
+            urlparse(source["url"]).netloc: asyncio.Semaphore(self.per_host_limit)
+            for source in sources
+        }
+        limits = httpx.Limits(max_connections=self.max_connections)
+        summaries = []
+
+        async with httpx.AsyncClient(limits=limits, headers={
+            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
+        }) as client:
+            tasks = [
+                asyncio.create_task(self._fetch_source(client, source, host_limits, *request_args[source["name"]]))
+                for source in sources
+            ]
+
+            # 먼저 끝난 소스부터 저장 (저장은 한 번에 하나씩, 요청은 계속 진행)
+            try:
+                for finished in asyncio.as_completed(tasks):
+                    result = await finished
+                    try:
+                        summary = await asyncio.to_thread(
+                            self._save_source_result, db, result, cursors[result["name"]]
+                        )
+                    except Exception as e:
+                        db.rollback()
+                        error = f"저장 실패: {type(e).__name__}: {e}"
+                        print(f"❌ [{result['name']}] {error}")
+                        summary = self._failed_save_summary(result, error)
+                    summaries.append(summary)
+            finally:
+                # 중간에 빠져나가면(취소 등) 아직 요청 중인 소스를 정리하고 클라이언트를 닫는다
+                for task in tasks:
+                    task.cancel()
+                await asyncio.gather(*tasks, return_exceptions=True)
+
+        return summaries
+
+    def run_scraping_job(self, db: Session) -> List[Dict]:
+        """전체 소스 스크래핑 작업 실행 (로깅 포함)"""
+        start_time = time.time()
+        print(f"🔍 {len(self.sources)}개 소스 동시 수집 시작...")
+
+        summaries = asyncio.run(self.scrape_all(db))
+
+        elapsed = round(time.time() - start_time, 2)
+        saved_count = sum(s["saved_count"] for s in summaries)
+        slowest = max((s["fetch_seconds"] for s in summaries), default=0)
+
+        log = SystemLog(
+            log_type="scraping",
+            message=f"멀티 소스 스크래핑 완료: {len(summaries)}개 소스, {saved_count}개 저장",
+            details={
+                "sources": len(summaries),
+                "failed_sources": [s["source"] for s in summaries if "error" in s],
+                "skipped_sources": [s["source"] for s in summaries if "skipped" in s],
+                "total_scraped": sum(s["total_scraped"] for s in summaries),
+                "saved_count": saved_count,
+                "elapsed_seconds": elapsed,
+                "slowest_fetch_seconds": slowest,
+                "sum_fetch_seconds": round(sum(s["fetch_seconds"] for s in summaries), 2)
+            }
+        )
+        db.add(log)
+        db.commit()
+
+        print(f"\n📊 멀티 소스 스크래핑 결과:")
+        print(f"   - 소스: {len(summaries)}개")
+        print(f"   - 저장: {saved_count}개")
+        print(f"   - 소요시간: {elapsed}초 (가장 느린 소스 {slowest}초)")
+
+        return summaries
@@ -0,0 +1,140 @@
+# check_indexes.py - 엔드포인트별 조회가 인덱스를 타는지 EXPLAIN으로 확인 (PostgreSQL 전용)
+#
+# 실행: python -m app.check_indexes [--force-index]
+# 각 조회를 EXPLAIN (FORMAT JSON)으로 계획만 세우고 기대한 인덱스가 쓰였는지, 대상 테이블을 순차 스캔하지 않는지 본다.
+# 기본은 플래너 설정을 건드리지 않은 실제 계획이다. 데이터가 적은 개발 DB에서는 플래너가 순차 스캔을 고르는 게
+# 정상이므로, 그런 DB에서 인덱스를 "쓸 수 있는지"만 보려면 --force-index (enable_seqscan = off).
+# 대상 테이블이 비어 있으면 플래너가 통계 없이 아무 인덱스나 고르므로 그 조회는 건너뛴다.
+# 하나라도 실패하면 1로 종료한다.
+import argparse
+import sys
+from datetime import datetime, timedelta
+from typing import List, Set
+
+from dotenv import load_dotenv
+from sqlalchemy import select, func, exists, desc
+
+from app.database import engine
+from app.models import Review, ReplyJob
+from app.reply_jobs import blocked_review_filter
+
+load_dotenv()
+
+
+def _checks():
+    """(이름, 조회, 기대 인덱스 중 하나 이상, 순차 스캔하면 안 되는 테이블)
+
+    조회는 각 엔드포인트 / 작업 큐 코드와 같은 조건과 정렬을 쓴다.
+    """
+    now = datetime.now()
+    return [
+        ("GET /reviews/recent",
+         select(Review).order_by(desc(Review.review_date)).offset(0).limit(20),
+         {"ix_reviews_review_date"}, "reviews"),
+        ("GET /reviews/pending",
+         select(Review).where(Review.generated_reply.is_(None)).order_by(desc(Review.review_date)),
+         {"ix_reviews_pending_review_date", "ix_reviews_pending_priority"}, "reviews"),
+        ("GET /stats (대기 수)",
+         select(func.count(Review.id)).where(Review.generated_reply.is_(None)),
+         {"ix_reviews_pending_review_date", "ix_reviews_pending_priority"}, "reviews"),
+        ("GET /stats (감성별 수)",
+         select(func.count(Review.id)).where(Review.sentiment == '부정'),
+         {"ix_reviews_sentiment_review_date"}, "reviews"),
+        ("GET /stats/sentiment-trend",
+         select(func.date(Review.review_date), Review.sentiment, func.count(Review.id)).where(
+             Review.review_date >= now - timedelta(days=7),
+             Review.sentiment.isnot(None)
+         ).group_by(func.date(Review.review_date), Review.sentiment),
+         {"ix_reviews_review_date", "ix_reviews_sentiment_review_date"}, "reviews"),
+        ("POST /post-replies",
+         select(Review).where(
+             Review.generated_reply.isnot(None),
+             Review.reply_posted == False  # noqa: E712
+         ).order_by(Review.id).limit(10),
+         {"ix_reviews_unposted"}, "reviews"),
+        ("답변 생성 대상 (우선순위 순)",
+         select(Review).where(
+             Review.generated_reply.is_(None),
+             ~blocked_review_filter()
+         ).order_by(Review.priority.desc(), Review.id).limit(100),
+         {"ix_reviews_pending_priority"}, "reviews"),
+        ("우선순위 미계산 대기 리뷰",
+         select(Review).where(Review.generated_reply.is_(None), Review.priority.is_(None)).limit(2000),
+         {"ix_reviews_pending_priority", "ix_reviews_pending_review_date"}, "reviews"),
+        ("작업 등록 (작업 행 없는 대기 리뷰)",
+         select(Review.id).where(
+             Review.generated_reply.is_(None),
+             ~exists().where(ReplyJob.review_id == Review.id)
+         ),
+         {"ix_reviews_pending_priority", "ix_reviews_pending_review_date"}, "reviews"),
+        ("작업 가져오기 (SKIP LOCKED)",
+         select(ReplyJob).where(
+             ((ReplyJob.status == "pending")
+              & ((ReplyJob.next_attempt_at.is_(None)) | (ReplyJob.next_attempt_at <= now)))
+             | ((ReplyJob.status == "running") & (ReplyJob.leased_until < now))
+         ).order_by(ReplyJob.priority.desc(), ReplyJob.id).limit(20).with_for_update(skip_locked=True),
+         {"ix_reply_jobs_claimable", "ix_reply_jobs_running_lease"}, "reply_jobs"),
+        ("GET /dead-letter",
+         select(ReplyJob).where(ReplyJob.status == "dead")
+         .order_by(ReplyJob.finished_at.desc(), ReplyJob.id.desc()).limit(50),
+         {"ix_reply_jobs_dead"}, "reply_jobs"),
+    ]
+
+
+def _walk(plan: dict, indexes: Set[str], seq_scans: List[str]):
+    if plan.get("Index Name"):
+        indexes.add(plan["Index Name"])
+    if plan.get("Node Type") == "Seq Scan":
+        seq_scans.append(plan.get("Relation Name"))
+    for child in plan.get("Plans", []):
+        _walk(child, indexes, seq_scans)
+
+
+def explain(conn, stmt):
+    """조회 계획에서 (사용한 인덱스 이름, 순차 스캔한 테이블) 추출"""
+    compiled = stmt.compile(dialect=conn.dialect)
+    result = conn.exec_driver_sql(f"EXPLAIN (FORMAT JSON) {compiled}", compiled.params).scalar()
+    indexes, seq_scans = set(), []
+    _walk(result[0]["Plan"], indexes, seq_scans)
+    return indexes, seq_scans
+
+
+def check_indexes(force_index: bool = False) -> bool:
+    if engine.dialect.name != "postgresql":
+        print(f"⚠️  PostgreSQL 전용 확인입니다 (현재: {engine.dialect.name}) - 건너뜀")
+        return True
+
+    failed = checked = skipped = 0
+    with engine.connect() as conn:
+        with conn.begin():
+            if force_index:
+                conn.exec_driver_sql("SET LOCAL enable_seqscan = off")
+            for name, stmt, expected, table in _checks():
+                if not conn.exec_driver_sql(f"SELECT EXISTS (SELECT 1 FROM {table})").scalar():
+                    print(f"⚠️  {name}: {table} 테이블이 비어 있어 계획을 확인할 수 없음 - 건너뜀")
+                    skipped += 1
+                    continue
+                used, seq_scans = explain(conn, stmt)
+                checked += 1
+                ok = bool(used & expected) and table not in seq_scans
+                failed += not ok
+                print(f"{'✅' if ok else '❌'} {name}: {', '.join(sorted(used)) or '인덱스 없음'}"
+                      + (f" (순차 스캔: {', '.join(seq_scans)})" if seq_scans else ""))
+                if not ok:
+                    print(f"    기대 인덱스: {', '.join(sorted(expected))}")
+
+    if failed:
+        print(f"❌ {failed}개 조회가 기대 인덱스를 쓰지 않음")
+    elif not checked:
+        print("⚠️  확인한 조회 없음 (테이블이 비어 있음)")
+    else:
+        print(f"✓ 모든 조회가 인덱스 사용 ({checked}개 확인" + (f", {skipped}개 건너뜀)" if skipped else ")"))
+    return not failed
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="엔드포인트 조회의 인덱스 사용 확인 (EXPLAIN)")
+    parser.add_argument("--force-index", action="store_true",
+                        help="enable_seqscan = off로 인덱스를 쓸 수 있는지만 확인 (데이터가 적은 개발 DB용)")
+    args = parser.parse_args()
+    sys.exit(0 if check_indexes(args.force_index) else 1)
@@ -0,0 +1,243 @@
+# customer_stories.py - 고객 스토리 사전 생성 저장소 (리뷰가 바뀐 고객만 다시 생성)
+import hashlib
+import os
+import threading
+import time
+from collections import Counter
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional
+
+from dotenv import load_dotenv
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session
+
+from app.database import SessionLocal
+from app.models import Review, CustomerStory
+
+load_dotenv()
+
+# updated_at은 트랜잭션 시작 시각이라 늦게 커밋된 변경을 놓치지 않도록 워터마크보다 조금 앞부터 다시 확인
+# (다이제스트가 같으면 건너뛰므로 겹쳐 읽어도 재생성되지 않음)
+WATERMARK_OVERLAP = timedelta(minutes=5)
+
+
+def review_set_digest(reviews: List[Review]) -> str:
+    """고객 리뷰 집합의 다이제스트 (스토리 프롬프트에 들어가는 값이 바뀌면 달라짐)"""
+    parts = [
+        f"{r.id}:{r.sentiment or ''}:{','.join(r.keywords or [])}:{r.review_date}:"
+        f"{hashlib.md5((r.review_text or '').encode('utf-8')).hexdigest()}"
+        for r in sorted(reviews, key=lambda r: r.id)
+    ]
+    return hashlib.sha256('\n'.join(parts).encode('utf-8')).hexdigest()
+
+
+def build_profile(name: str, reviews: List[Review]) -> Dict:
+    """고객 리뷰 목록으로 카드에 필요한 통계 계산 (CustomerStory.jsx에서 하던 계산)"""
+    reviews = sorted(reviews, key=lambda r: r.review_date, reverse=True)
+    total = len(reviews)
+    positive = sum(1 for r in reviews if r.sentiment == '긍정')
+    negative = sum(1 for r in reviews if r.sentiment == '부정')
+    first_date, last_date = reviews[-1].review_date, reviews[0].review_date
+
+    positive_ratio = positive / total if total else 0
+    negative_ratio = negative / total if total else 0
+    months_span = (last_date - first_date).total_seconds() / (60 * 60 * 24 * 30)
+
+    loyalty_score = 0
+    if total >= 10:
+        loyalty_score += 30
+    if total >= 5:
+        loyalty_score += 20
+    if positive_ratio >= 0.8:
+        loyalty_score += 25
+    if positive_ratio >= 0.9:
+        loyalty_score += 15
+    if months_span >= 6:
+        loyalty_score += 10
+
+    if negative_ratio >= 0.7 or (total >= 5 and negative_ratio >= 0.5):
+        customer_type = 'blacklist'
+    elif loyalty_score >= 70:
+        customer_type = 'vip'
+    elif loyalty_score >= 40:
+        customer_type = 'loyal'
+    else:
+        customer_type = 'normal'
+
+    keyword_count = Counter(k for r in reviews for k in (r.keywords or []))
+
+    return {
+        "name": name,
+        "totalReviews": total,
+        "positiveReviews": positive,
+        "negativeReviews": negative,
+        "positiveRatio": positive_ratio,
+        "monthsSpan": months_span,
+        "loyaltyScore": loyalty_score,
+        "customerType": customer_type,
+        "topKeywords": [{"keyword": k, "count": c} for k, c in keyword_count.most_common(5)],
+        "firstReviewDate": first_date.isoformat(),
+        "lastReviewDate": last_date.isoformat(),
+        "reviewSamples": [(r.review_text or '')[:100] for r in reviews[:3]],
+        "reviews": [
+            {
+                "id": r.id,
+                "review_text": r.review_text,
+                "review_date": r.review_date.isoformat(),
+                "sentiment": r.sentiment,
+                "keywords": r.keywords or [],
+            }
+            for r in reviews[:5]
+        ],
+    }
+
+
+def default_story(profile: Dict) -> str:
+    return f"{profile['name']}님은 총 {profile['totalReviews']}번의 리뷰를 남겨주신 소중한 고객입니다."
+
+
+class CustomerStoryStore:
+    """고객별 스토리를 (고객명, 리뷰 다이제스트) 기준으로 저장
+
+    조회는 customer_stories 테이블 한 번 읽기로 끝나고,
+    리뷰가 바뀐 고객의 스토리만 백그라운드에서 다시 생성한다.
+    """
+
+    def __init__(self, llm_service, min_reviews: int = None, refresh_interval: float = None):
+        self.llm_service = llm_service
+        self.min_reviews = min_reviews or int(os.getenv("CUSTOMER_STORY_MIN_REVIEWS", "3"))
+        # 조회 요청이 와도 이 간격(초) 안에는 다시 변경 확인을 하지 않음
+        self.refresh_interval = refresh_interval if refresh_interval is not None else float(
+            os.getenv("CUSTOMER_STORY_REFRESH_INTERVAL", "60"))
+
+        self._refresh_lock = threading.Lock()
+        self._last_refresh = 0.0
+        # 지난 갱신 때 본 reviews.updated_at 최댓값 (None이면 다음 갱신은 전체 확인)
+        self._watermark: Optional[datetime] = None
+        self.last_result: Optional[Dict] = None
+
+    def list_stories(self, db: Session) -> List[Dict]:
+        """저장된 스토리 + 프로필 (충성도 순)"""
+        rows = db.query(CustomerStory).order_by(CustomerStory.loyalty_score.desc()).all()
+        return [
+            {**row.profile, "story": row.story, "story_status": row.status,
+             "generated_at": row.generated_at.isoformat() if row.generated_at else None}
+            for row in rows
+        ]
+
+    def save_story(self, db: Session, customer_name: str, story: str) -> bool:
+        """직접 생성(스트리밍)한 스토리를 저장된 행에 반영 (저장소에 없는 고객이면 False)"""
+        row = db.query(CustomerStory).filter(CustomerStory.customer_name == customer_name).first()
+        if row is None:
+            return False
+        row.story = story
+        row.generated_at = datetime.now()
+        db.commit()
+        return True
+
+    def refresh_due(self) -> bool:
+        return time.time() - self._last_refresh >= self.refresh_interval and not self._refresh_lock.locked()
+
+    def refresh(self, db: Session) -> Optional[Dict]:
+        """리뷰 다이제스트가 바뀐 고객만 스토리 재생성 (이미 진행 중이면 None)"""
+        if not self._refresh_lock.acquire(blocking=False):
+            return None
+
+        try:
+            start_time = time.time()
+            self._last_refresh = start_time
+
+            # 처음 한 번만 전체를 읽고, 이후로는 지난 갱신 뒤에 바뀐 리뷰가 있는 고객과
+            # 아직 스토리 생성이 끝나지 않은(stale / pending) 고객의 리뷰만 읽는다
+            watermark = db.query(func.max(Review.updated_at)).scalar()
+            review_query = db.query(Review)
+            story_query = db.query(CustomerStory)
+            if self._watermark is not None:
+                names = select(Review.customer_name).where(
+                    Review.updated_at >= self._watermark - WATERMARK_OVERLAP
+                ).union(
+                    select(CustomerStory.customer_name).where(CustomerStory.status != "ready")
+                )
+                review_query = review_query.filter(Review.customer_name.in_(names))
+                story_query = story_query.filter(CustomerStory.customer_name.in_(names))
+
+            grouped: Dict[str, List[Review]] = {}
+            for review in review_query.yield_per(2000):
+                grouped.setdefault(review.customer_name, []).append(review)
+
+            existing = {row.customer_name: row for row in story_query.all()}
+            eligible = {name: reviews for name, reviews in grouped.items() if len(reviews) >= self.min_reviews}
+
+            # 조건에서 빠진 고객 정리
+            removed = [row for name, row in existing.items() if name not in eligible]
+            for row in removed:
+                db.delete(row)
+            db.commit()
+
+            # 먼저 모든 변경 고객을 stale로 표시해 두면 조회 화면은 기존 스토리를 계속 보여줄 수 있다
+            changed = []
+            for name, reviews in eligible.items():
+                digest = review_set_digest(reviews)
+                row = existing.get(name)
+                if row and row.review_digest == digest:
+                    continue
+
+                profile = build_profile(name, reviews)
+                if row is None:
+                    row = CustomerStory(customer_name=name, story=default_story(profile), status="pending")
+                    db.add(row)
+                else:
+                    row.status = "stale"
+                row.profile = profile
+                row.loyalty_score = profile["loyaltyScore"]
+                changed.append((row, digest, profile))
+            db.commit()
+
+            generated = 0
+            failed = []
+            for row, digest, profile in changed:
+                try:
+                    story = self.llm_service.write_customer_story(profile)
+                except Exception as e:
+                    # 다이제스트를 그대로 두고 stale/pending으로 남겨서 다음 갱신 때 다시 생성
+                    # (기본 문장을 ready로 저장하면 리뷰가 바뀔 때까지 재생성되지 않음)
+                    print(f"⚠️  고객 스토리 생성 실패, 다음 갱신 때 재시도: {row.customer_name}님 ({e})")
+                    failed.append(row.customer_name)
+                    continue
+                row.story = story
+                row.review_digest = digest
+                row.status = "ready"
+                row.generated_at = datetime.now()
+                db.commit()
+                generated += 1
+
+            # 중간에 예외가 나면 워터마크를 그대로 두어 다음 갱신이 같은 범위를 다시 확인
+            if watermark is not None and (self._watermark is None or watermark > self._watermark):
+                self._watermark = watermark
+
+            self.last_result = {
+                "customers": len(eligible),
+                "regenerated": generated,
+                "failed": len(failed),
+                "unchanged": len(eligible) - len(changed),
+                "removed": len(removed),
+                "elapsed_seconds": round(time.time() - start_time, 2),
+            }
+            if generated or removed or failed:
+                print(f"📖 고객 스토리 갱신: {generated}명 재생성, {len(failed)}명 실패, "
+                      f"{len(eligible) - len(changed)}명 유지")
+            return self.last_result
+
+        finally:
+            self._refresh_lock.release()
+
+    def refresh_in_background(self):
+        """새 세션으로 refresh 실행 (BackgroundTasks / 스레드에서 호출)"""
+        db = SessionLocal()
+        try:
+            self.refresh(db)
+        except Exception as e:
+            db.rollback()
+            print(f"❌ 고객 스토리 갱신 실패: {e}")
+        finally:
+            db.close()
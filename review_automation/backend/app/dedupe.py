@@ -0,0 +1,116 @@
+# dedupe.py - 이미 저장된 source_id를 DB 조회 없이 걸러내는 프로세스 내 인덱스
+import hashlib
+import math
+import os
+import threading
+import time
+from typing import Iterable, Optional
+
+from dotenv import load_dotenv
+from sqlalchemy.orm import Session
+
+from app.models import Review
+
+load_dotenv()
+
+
+class SourceIdIndex:
+    """정확한 source_id 집합 (들어 있으면 DB에도 반드시 존재)"""
+
+    exact = True
+
+    def __init__(self):
+        self._ids = set()
+
+    def add(self, source_id: str):
+        self._ids.add(source_id)
+
+    def might_contain(self, source_id: str) -> bool:
+        return source_id in self._ids
+
+    def __len__(self):
+        return len(self._ids)
+
+
+class BloomFilter:
+    """대용량 테이블용 블룸 필터 (메모리 고정, 오탐 가능 / 미탐 없음)
+
+    might_contain()이 False면 확실히 새 리뷰이고, True면 DB 확인이 필요하다.
+    """
+
+    exact = False
+
+    def __init__(self, capacity: int, error_rate: float = 0.001):
+        # 표준 공식: m = -n ln(p) / (ln 2)^2, k = (m / n) ln 2
+        self.num_bits = max(8, int(-capacity * math.log(error_rate) / (math.log(2) ** 2)))
+        self.num_hashes = max(1, round(self.num_bits / capacity * math.log(2)))
+        self._bits = bytearray((self.num_bits + 7) // 8)
+        self._count = 0
+
+    def _positions(self, source_id: str):
+        # 더블 해싱: 128비트 다이제스트 하나로 k개의 위치 생성
+        digest = hashlib.blake2b(source_id.encode('utf-8'), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], 'little')
+        h2 = int.from_bytes(digest[8:], 'little') | 1
+        return ((h1 + i * h2) % self.num_bits for i in range(self.num_hashes))
+
+    def add(self, source_id: str):
+        for pos in self._positions(source_id):
+            self._bits[pos >> 3] |= 1 << (pos & 7)
+        self._count += 1
+
+    def might_contain(self, source_id: str) -> bool:
+        return all(self._bits[pos >> 3] & (1 << (pos & 7)) for pos in self._positions(source_id))
+
+    def __len__(self):
+        return self._count
+
+
+_index = None
+_index_lock = threading.Lock()
+
+
+def get_dedupe_index():
+    """프로세스 전역 인덱스 (DEDUPE_INDEX=set|bloom|off)"""
+    global _index
+
+    kind = os.getenv("DEDUPE_INDEX", "set").lower()
+    if kind == "off":
+        return None
+
+    with _index_lock:
+        if _index is None:
+            if kind == "bloom":
+                _index = BloomFilter(
+                    capacity=int(os.getenv("DEDUPE_BLOOM_CAPACITY", "1000000")),
+                    error_rate=float(os.getenv("DEDUPE_BLOOM_ERROR_RATE", "0.001"))
+                )
+            else:
+                _index = SourceIdIndex()
+        return _index
+
+
+def add_to_index(source_ids: Iterable[str]):
+    """저장된 source_id를 인덱스에 반영"""
+    index = get_dedupe_index()
+    if index is None:
+        return
+    for source_id in source_ids:
+        index.add(source_id)
+
+
+def warm_dedupe_index(db: Session, batch_size: int = 5000) -> Optional[int]:
+    """기존 source_id를 스트리밍 쿼리 한 번으로 읽어 인덱스 채우기 (앱 시작 시)"""
+    index = get_dedupe_index()
+    if index is None:
+        return None
+
+    start_time = time.time()
+    count = 0
+    for (source_id,) in db.query(Review.source_id).yield_per(batch_size):
+        index.add(source_id)
+        count += 1
+
+    print(f"✓ 중복 체크 인덱스 준비: {count}개 ({type(index).__name__}, "
+          f"{round(time.time() - start_time, 2)}초)")
+    return count
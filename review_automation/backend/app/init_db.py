@@ -1,14 +1,38 @@
 # init_db.py - 데이터베이스 초기화
+from sqlalchemy import inspect, text
 from app.database import engine, Base
-from app.models import Review, SystemLog
+from app.models import Review, SystemLog, ScrapeCursor, LLMCacheEntry, ReviewFingerprint, CustomerStory, ReplyJob
 
 def init_database():
     """데이터베이스 테이블 생성"""
     print("데이터베이스 테이블 생성 중...")
     Base.metadata.create_all(bind=engine)
+    add_missing_columns()
     print("✓ 테이블 생성 완료!")
     print("생성된 테이블:", list(Base.metadata.tables.keys()))
 
+def add_missing_columns():
+    """이미 있는 테이블에 모델에만 있는 컬럼 추가 (create_all은 기존 테이블을 바꾸지 않음)
+    
+    새 컬럼은 모두 NULL 허용이라 기본값 없이 추가해도 된다.
+    """
+    inspector = inspect(engine)
+    with engine.begin() as conn:
+        for table in Base.metadata.sorted_tables:
+            if not inspector.has_table(table.name):
+                continue
+            existing = {column["name"] for column in inspector.get_columns(table.name)}
+            for column in table.columns:
+                if column.name in existing:
+                    continue
+                column_type = column.type.compile(dialect=engine.dialect)
+                conn.execute(text(f'ALTER TABLE {table.name} ADD COLUMN {column.name} {column_type}'))
+                print(f"  + {table.name}.{column.name} 컬럼 추가")
+                if column.index:
+                    conn.execute(text(
+                        f'CREATE INDEX IF NOT EXISTS ix_{table.name}_{column.name} ON {table.name} ({column.name})'
+                    ))
+
 def drop_all_tables():
     """모든 테이블 삭제 (주의: 데이터 손실)"""
     confirm = input("정말로 모든 테이블을 삭제하시겠습니까? (yes/no): ")
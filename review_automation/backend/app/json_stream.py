@@ -0,0 +1,80 @@
+# json_stream.py - 대용량 JSON 피드 스트리밍 파싱
+import codecs
+import json
+from itertools import islice
+from typing import Iterable, Iterator, List, Any
+
+_WHITESPACE = ' \t\n\r'
+
+# 원소 하나의 최대 크기(문자 수) - 리뷰 한 건은 수 KB라 넉넉한 상한
+MAX_ITEM_SIZE = 1024 * 1024
+
+
+def iter_json_array(chunks: Iterable[bytes], max_item_size: int = MAX_ITEM_SIZE) -> Iterator[Any]:
+    """바이트 청크 스트림에서 최상위 JSON 배열의 원소를 하나씩 꺼냄
+
+    전체 응답을 메모리에 올리지 않고, 버퍼에는 아직 파싱하지 못한
+    마지막 원소 일부만 남긴다. 청크 경계에서 잘린 원소와 형식이 잘못된 원소는
+    디코딩 오류만으로 구분할 수 없으므로, 파싱하지 못한 부분이 max_item_size를 넘으면
+    잘못된 원소로 보고 ValueError (나머지 응답을 끝까지 버퍼에 쌓지 않도록).
+    """
+    decoder = json.JSONDecoder()
+    utf8 = codecs.getincrementaldecoder('utf-8')()
+    buf = ''
+    started = False
+
+    for chunk in chunks:
+        if not chunk:
+            continue
+        buf += utf8.decode(chunk)
+        pos = 0
+
+        while True:
+            while pos < len(buf) and buf[pos] in _WHITESPACE:
+                pos += 1
+            if pos >= len(buf):
+                break
+
+            if not started:
+                if buf[pos] != '[':
+                    raise ValueError("JSON 배열 형식의 피드가 아닙니다")
+                started = True
+                pos += 1
+                continue
+
+            if buf[pos] == ',':
+                pos += 1
+                continue
+            if buf[pos] == ']':
+                return
+
+            try:
+                item, end = decoder.raw_decode(buf, pos)
+            except json.JSONDecodeError:
+                break  # 원소가 청크 경계에서 잘림 - 다음 청크 대기
+
+            # 버퍼 끝에서 끝난 숫자 등은 잘렸을 수 있으므로 다음 청크 대기
+            if end == len(buf) and not isinstance(item, (dict, list, str)):
+                break
+
+            yield item
+            pos = end
+
+        buf = buf[pos:]
+        if len(buf) > max_item_size:
+            raise ValueError(
+                f"JSON 원소를 파싱할 수 없습니다 ({max_item_size}자 초과, 형식 오류?): {buf[:100]}"
+            )
+
+    buf += utf8.decode(b'', final=True)
+    raise ValueError(f"JSON 배열이 완전히 끝나지 않았습니다 (남은 데이터 {len(buf)}자)")
+
+
+def batched(items: Iterable[Any], size: int) -> Iterator[List[Any]]:
+    """이터러블을 최대 size개씩 묶어서 반환"""
+    iterator = iter(items)
+    while True:
+        batch = list(islice(iterator, size))
+        if not batch:
+            return
+        yield batch
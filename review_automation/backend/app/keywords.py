@@ -0,0 +1,178 @@
+# keywords.py - 로컬 TF-IDF 키워드 추출기 (문서 빈도는 리뷰가 들어올 때마다 갱신)
+import math
+import os
+import re
+import threading
+import time
+from collections import Counter
+from typing import Iterable, List, Optional, Tuple
+
+from dotenv import load_dotenv
+from sqlalchemy.orm import Session
+
+from app.models import Review
+
+load_dotenv()
+
+_TOKEN_RE = re.compile(r'[가-힣]+|[A-Za-z]+')
+
+# 긴 것부터 떼어내는 조사 / 서술어 어미 (가벼운 규칙 기반 토크나이저)
+PARTICLES = sorted([
+    '에서는', '에서도', '으로는', '이랑', '에서', '에게', '한테', '까지', '부터', '으로', '처럼', '보다',
+    '은', '는', '이', '가', '을', '를', '에', '의', '도', '로', '와', '과', '랑', '만',
+], key=len, reverse=True)
+
+PREDICATE_ENDINGS = sorted([
+    '하시네요', '했습니다', '었습니다', '았습니다', '였습니다', '합니다', '습니다', '입니다',
+    '이에요', '였어요', '었어요', '았어요', '했어요', '했는데', '하네요', '했네요', '하지만', '하고',
+    '해서', '해요', '하게', '한', '인데', '는데', '지만', '어서', '아서', '어요', '아요', '예요',
+    '네요', '었고', '았고', '고요', '시네요', '게', '고', '지', '요',
+], key=len, reverse=True)
+
+# 한 글자지만 리뷰에서 의미 있는 명사
+SHORT_NOUNS = {'맛', '빵', '차', '값', '양', '밥', '술', '뷰'}
+
+STOPWORDS = {
+    '정말', '너무', '진짜', '완전', '엄청', '매우', '아주', '특히', '조금', '그리고', '하지만',
+    '그런데', '그래서', '다시', '이번', '오늘', '다음', '항상', '역시', '그냥', '여기', '거기',
+    '저희', '우리', '제가', '저는', '같아', '같은', '같습니다', '있어', '있었', '하는', '번째',
+    '모두', '같이', '훨씬', '특별히', '그런', '뭐랄까', '싶습니다', '싶어', '싶', '않', '않고',
+    '보입니다', '것', '거', '수', '때', '번', '분', '곳', '점', '더', '잘', '안', '못', '또',
+}
+
+
+def _analyze_word(word: str) -> Tuple[str, bool]:
+    """어절 하나를 (토큰, 서술어 여부)로 변환 (조사를 떼었으면 명사로 보고 어미는 보지 않음)"""
+    word = word.lower()
+    stripped = False
+    # "친구들에게도"처럼 조사가 겹치는 경우까지 두 번
+    for _ in range(2):
+        for particle in PARTICLES:
+            if word.endswith(particle) and len(word) > len(particle):
+                word = word[:-len(particle)]
+                stripped = True
+                break
+        else:
+            break
+    if stripped:
+        return word, False
+
+    for ending in PREDICATE_ENDINGS:
+        if word.endswith(ending) and len(word) - len(ending) >= 2:
+            word = word[:-len(ending)]
+            # 맛있어요 -> 맛있다 처럼 있/없 어간은 기본형으로
+            if word.endswith(('있', '없')):
+                word += '다'
+            return word, True
+
+    return word, False
+
+
+def tokenize_with_roles(text: str) -> List[Tuple[str, bool]]:
+    """(토큰, 서술어 여부) 목록 (불용어 / 한 글자 토큰 제외)"""
+    tokens = []
+    for word in _TOKEN_RE.findall(text or ''):
+        if word in PARTICLES:
+            continue
+        token, is_predicate = _analyze_word(word)
+        if (len(token) >= 2 or token in SHORT_NOUNS) and token not in STOPWORDS:
+            tokens.append((token, is_predicate))
+    return tokens
+
+
+def tokenize(text: str) -> List[str]:
+    """한글/영문 어절에서 조사·어미를 뗀 토큰 목록"""
+    return [token for token, _ in tokenize_with_roles(text)]
+
+
+class KeywordExtractor:
+    """코퍼스 문서 빈도(DF)를 누적하면서 새 리뷰의 TF-IDF 상위 토큰을 키워드로 반환
+
+    같은 표현은 항상 같은 토큰으로 나오므로 키워드 집계에 그대로 쓸 수 있다.
+    """
+
+    def __init__(self, top_k: int = None):
+        self.top_k = top_k or int(os.getenv("KEYWORD_TOP_K", "5"))
+        self.predicate_weight = 0.5
+        self._doc_freq = Counter()
+        self._num_docs = 0
+        self._lock = threading.Lock()
+
+    def add_documents(self, texts: Iterable[str]):
+        """수집된 리뷰 텍스트를 코퍼스에 반영 (문서마다 토큰은 한 번씩만 셈)"""
+        counts = Counter()
+        num_docs = 0
+        for text in texts:
+            counts.update(set(tokenize(text)))
+            num_docs += 1
+
+        with self._lock:
+            self._doc_freq.update(counts)
+            self._num_docs += num_docs
+
+    def extract(self, text: str, top_k: int = None) -> List[str]:
+        """TF-IDF 점수 상위 키워드 (동점이면 먼저 나온 토큰 우선)"""
+        analyzed = tokenize_with_roles(text)
+        if not analyzed:
+            return []
+
+        tokens = [token for token, _ in analyzed]
+        # 키워드는 명사 위주로: 어미를 떼어낸 서술어 토큰은 가중치를 낮춤
+        predicate_terms = {token for token, is_predicate in analyzed if is_predicate}
+        term_freq = Counter(tokens)
+        with self._lock:
+            num_docs = self._num_docs
+            doc_freq = {term: self._doc_freq.get(term, 0) for term in term_freq}
+
+        # 스무딩된 IDF: 코퍼스가 비어 있어도 TF 순으로 동작
+        scores = {
+            term: (count / len(tokens)) * (math.log((1 + num_docs) / (1 + doc_freq[term])) + 1)
+            * (self.predicate_weight if term in predicate_terms else 1.0)
+            for term, count in term_freq.items()
+        }
+        first_seen = {term: i for i, term in reversed(list(enumerate(tokens)))}
+        ranked = sorted(scores, key=lambda term: (-scores[term], first_seen[term]))
+        return ranked[:top_k or self.top_k]
+
+    def __len__(self):
+        return self._num_docs
+
+
+_extractor = None
+_extractor_lock = threading.Lock()
+
+
+def get_keyword_extractor() -> Optional[KeywordExtractor]:
+    """프로세스 전역 추출기 (KEYWORD_EXTRACTOR=local|llm, llm이면 None)"""
+    global _extractor
+
+    if os.getenv("KEYWORD_EXTRACTOR", "local").lower() != "local":
+        return None
+
+    with _extractor_lock:
+        if _extractor is None:
+            _extractor = KeywordExtractor()
+        return _extractor
+
+
+def add_to_corpus(texts: Iterable[str]):
+    """새로 저장된 리뷰 텍스트를 문서 빈도에 반영"""
+    extractor = get_keyword_extractor()
+    if extractor is not None:
+        extractor.add_documents(texts)
+
+
+def warm_keyword_corpus(db: Session, batch_size: int = 5000) -> Optional[int]:
+    """기존 리뷰 텍스트로 문서 빈도 채우기 (앱 시작 시)"""
+    extractor = get_keyword_extractor()
+    if extractor is None:
+        return None
+
+    start_time = time.time()
+    extractor.add_documents(
+        text for (text,) in db.query(Review.review_text).yield_per(batch_size)
+    )
+
+    print(f"✓ 키워드 코퍼스 준비: {len(extractor)}개 문서 "
+          f"({round(time.time() - start_time, 2)}초)")
+    return len(extractor)
@@ -0,0 +1,280 @@
+# llm_backends.py - LLM 호출 백엔드 (Gemini / OpenAI 호환 HTTP / 로컬 스텁)
+import hashlib
+import json
+import math
+import os
+import random
+import re
+import threading
+import time
+from collections import deque
+from typing import Iterator
+
+import httpx
+from dotenv import load_dotenv
+
+load_dotenv()
+
+
+class LLMBackendError(Exception):
+    """백엔드 호출 실패 (status_code가 있으면 HTTP 상태, retryable이면 재시도해 볼 만한 오류)"""
+
+    def __init__(self, message: str, status_code: int = None, retryable: bool = False):
+        super().__init__(message)
+        self.status_code = status_code
+        self.retryable = retryable
+
+
+class RateLimitedError(LLMBackendError):
+    """429 (요청 한도 초과)"""
+
+    def __init__(self, message: str = "요청 한도 초과 (429)", retry_after: float = None):
+        super().__init__(message, status_code=429, retryable=True)
+        self.retry_after = retry_after
+
+
+class LLMBackend:
+    """프롬프트 하나를 받아 응답 텍스트를 돌려주는 최소 인터페이스"""
+
+    name = "base"
+    model_name = ""
+
+    def generate(self, prompt: str) -> str:
+        raise NotImplementedError
+
+    def generate_stream(self, prompt: str) -> Iterator[str]:
+        """응답을 조각 단위로 반환 (스트리밍을 지원하지 않는 백엔드는 한 번에)"""
+        yield self.generate(prompt)
+
+
+class GeminiBackend(LLMBackend):
+    """google.generativeai 클라이언트"""
+
+    name = "gemini"
+
+    def __init__(self, model_name: str = None, api_key: str = None):
+        api_key = api_key or os.getenv("GEMINI_API_KEY")
+        if not api_key:
+            raise ValueError("GEMINI_API_KEY가 설정되지 않았습니다.")
+
+        # gRPC 경고 억제 (import 전에 설정해야 적용됨)
+        os.environ['GRPC_VERBOSITY'] = 'ERROR'
+        os.environ['GRPC_TRACE'] = ''
+        import google.generativeai as genai
+
+        genai.configure(api_key=api_key)
+        self.model_name = model_name or os.getenv("LLM_MODEL") or "models/gemini-2.5-flash-lite"
+        self.model = genai.GenerativeModel(self.model_name)
+
+    def generate(self, prompt: str) -> str:
+        response = self.model.generate_content(prompt)
+        return response.text
+
+    def generate_stream(self, prompt: str) -> Iterator[str]:
+        for chunk in self.model.generate_content(prompt, stream=True):
+            if chunk.text:
+                yield chunk.text
+
+
+class OpenAICompatibleBackend(LLMBackend):
+    """/chat/completions 형식의 HTTP API (OpenAI, vLLM, 로컬 스텁 서버 등)"""
+
+    name = "openai"
+
+    def __init__(self, base_url: str = None, api_key: str = None, model_name: str = None,
+                 timeout: float = None):
+        self.base_url = (base_url or os.getenv("LLM_BASE_URL") or "https://api.openai.com/v1").rstrip('/')
+        self.model_name = model_name or os.getenv("LLM_MODEL") or "gpt-4o-mini"
+        api_key = api_key or os.getenv("LLM_API_KEY", "")
+        headers = {"Authorization": f"Bearer {api_key}"} if api_key else {}
+        self.client = httpx.Client(
+            headers=headers,
+            timeout=timeout or float(os.getenv("LLM_HTTP_TIMEOUT", "30"))
+        )
+
+    def _raise_for_status(self, response: httpx.Response):
+        if response.status_code == 429:
+            retry_after = response.headers.get("Retry-After")
+            raise RateLimitedError(retry_after=float(retry_after) if retry_after else None)
+        if response.status_code >= 400:
+            response.read()
+            raise LLMBackendError(
+                f"LLM 응답 오류 {response.status_code}: {response.text[:200]}",
+                status_code=response.status_code,
+                retryable=response.status_code >= 500
+            )
+
+    def _payload(self, prompt: str, stream: bool = False) -> dict:
+        payload = {"model": self.model_name, "messages": [{"role": "user", "content": prompt}]}
+        if stream:
+            payload["stream"] = True
+        return payload
+
+    def generate(self, prompt: str) -> str:
+        try:
+            response = self.client.post(f"{self.base_url}/chat/completions", json=self._payload(prompt))
+        except httpx.TimeoutException as e:
+            raise LLMBackendError(f"LLM 요청 시간 초과: {e}", retryable=True)
+        except httpx.HTTPError as e:
+            raise LLMBackendError(f"LLM 요청 실패: {e}", retryable=True)
+
+        self._raise_for_status(response)
+        return response.json()["choices"][0]["message"]["content"]
+
+    def generate_stream(self, prompt: str) -> Iterator[str]:
+        """SSE(data: {...}) 응답의 delta.content를 순서대로 반환"""
+        try:
+            with self.client.stream("POST", f"{self.base_url}/chat/completions",
+                                    json=self._payload(prompt, stream=True)) as response:
+                self._raise_for_status(response)
+                for line in response.iter_lines():
+                    if not line.startswith("data:"):
+                        continue
+                    data = line[len("data:"):].strip()
+                    if data == "[DONE]":
+                        break
+                    delta = json.loads(data)["choices"][0].get("delta", {}).get("content")
+                    if delta:
+                        yield delta
+        except httpx.TimeoutException as e:
+            raise LLMBackendError(f"LLM 요청 시간 초과: {e}", retryable=True)
+        except httpx.HTTPError as e:
+            raise LLMBackendError(f"LLM 요청 실패: {e}", retryable=True)
+
+
+def stub_reply(prompt: str) -> str:
+    """프롬프트 종류에 맞는 결정적 응답 (같은 프롬프트면 항상 같은 결과)
+
+    실제 모델 없이 파싱/저장 경로까지 그대로 돌 수 있도록 서비스가 기대하는 형식을 흉내 낸다.
+    """
+    from app.keywords import tokenize
+    from app.sentiment import classify_sentiment
+
+    seed = int(hashlib.md5(prompt.encode('utf-8')).hexdigest()[:8], 16)
+    openers = ["소중한 리뷰 감사합니다.", "방문해 주셔서 감사합니다.", "귀한 시간 내어 리뷰 남겨주셔서 감사해요."]
+
+    def reply_for(name: str, text: str) -> str:
+        label, _ = classify_sentiment(text)
+        body = ("불편을 드려 정말 죄송합니다. 말씀해 주신 부분 꼭 개선하겠습니다." if label == '부정'
+                else "다음에 또 뵙기를 기다리겠습니다!")
+        return f"{name}님, {openers[seed % len(openers)]} {body}"
+
+    def analysis_for(name: str, text: str) -> dict:
+        return {
+            "reply": reply_for(name, text),
+            "keywords": list(dict.fromkeys(tokenize(text)))[:5],
+            "sentiment": classify_sentiment(text)[0],
+        }
+
+    def field(label: str) -> str:
+        match = re.search(rf'^{label}:\s*(.*)$', prompt, re.M)
+        return match.group(1).strip() if match else ''
+
+    # 배치 분석: 한 줄에 하나씩 들어온 리뷰 JSON마다 항목 하나
+    if 'JSON 배열' in prompt:
+        items = []
+        for line in prompt.splitlines():
+            line = line.strip()
+            if line.startswith('{"id"'):
+                review = json.loads(line)
+                items.append({"id": review["id"], **analysis_for(review["customer_name"], review["review_text"])})
+        return json.dumps(items, ensure_ascii=False)
+
+    name, text = field('고객명') or '고객', field('리뷰 내용') or field('리뷰')
+    if '"reply"' in prompt:
+        return json.dumps(analysis_for(name, text), ensure_ascii=False)
+    if prompt.rstrip().endswith('감성:'):
+        return classify_sentiment(text)[0]
+    if prompt.rstrip().endswith('키워드:'):
+        return ', '.join(list(dict.fromkeys(tokenize(text)))[:5])
+    if prompt.rstrip().endswith('고객 스토리:'):
+        story_name = field('- 이름') or '고객'
+        return f"{story_name}님은 꾸준히 방문해 주시는 고객입니다. 남겨주신 리뷰마다 진심이 느껴집니다."
+    if prompt.rstrip().endswith('새 답변:'):
+        previous = field('이전 답변')
+        return f"{previous} 앞으로도 잘 부탁드립니다." if previous else reply_for(name, text)
+    return reply_for(name, text)
+
+
+def split_stream_chunks(text: str, size: int = 8):
+    """스트리밍 흉내용으로 응답을 size글자씩 자름"""
+    return [text[i:i + size] for i in range(0, len(text), size)] or ['']
+
+
+class StubBackend(LLMBackend):
+    """부하 테스트용 로컬 스텁 (네트워크/키 없이 결정적 응답)
+
+    지연 시간은 로그정규분포(중앙값 latency_ms, 퍼짐 latency_sigma),
+    error_rate 비율로 500 오류, rate_limit_rate 비율 또는 분당 rpm 초과 시 429를 낸다.
+    """
+
+    name = "stub"
+
+    def __init__(self, latency_ms: float = None, latency_sigma: float = None, error_rate: float = None,
+                 rate_limit_rate: float = None, rpm: int = None, seed: int = None):
+        self.model_name = "stub"
+        self.latency_ms = latency_ms if latency_ms is not None else float(os.getenv("LLM_STUB_LATENCY_MS", "200"))
+        self.latency_sigma = latency_sigma if latency_sigma is not None else float(os.getenv("LLM_STUB_LATENCY_SIGMA", "0.5"))
+        self.error_rate = error_rate if error_rate is not None else float(os.getenv("LLM_STUB_ERROR_RATE", "0"))
+        self.rate_limit_rate = rate_limit_rate if rate_limit_rate is not None else float(os.getenv("LLM_STUB_429_RATE", "0"))
+        self.rpm = rpm if rpm is not None else int(os.getenv("LLM_STUB_RPM", "0"))
+
+        self._random = random.Random(seed if seed is not None else int(os.getenv("LLM_STUB_SEED", "42")))
+        self._recent = deque()
+        self._lock = threading.Lock()
+
+    def draw(self):
+        """이번 요청의 (지연 초, 결과) 결정 - 결과는 ok / error / rate_limited"""
+        with self._lock:
+            now = time.monotonic()
+            while self._recent and now - self._recent[0] > 60:
+                self._recent.popleft()
+            over_rpm = self.rpm and len(self._recent) >= self.rpm
+            if not over_rpm:
+                self._recent.append(now)
+
+            latency = self.latency_ms * math.exp(self._random.gauss(0, self.latency_sigma)) / 1000
+            roll = self._random.random()
+
+        if over_rpm or roll < self.rate_limit_rate:
+            return 0.0, "rate_limited"
+        if roll < self.rate_limit_rate + self.error_rate:
+            return latency, "error"
+        return latency, "ok"
+
+    def generate(self, prompt: str) -> str:
+        latency, outcome = self.draw()
+        time.sleep(latency)
+
+        if outcome == "rate_limited":
+            raise RateLimitedError(retry_after=1.0)
+        if outcome == "error":
+            raise LLMBackendError("스텁 서버 오류 (500)", status_code=500, retryable=True)
+        return stub_reply(prompt)
+
+    def generate_stream(self, prompt: str) -> Iterator[str]:
+        """첫 조각까지는 뽑힌 지연의 절반, 나머지 조각은 고르게 나눠서 전달"""
+        latency, outcome = self.draw()
+        if outcome == "rate_limited":
+            raise RateLimitedError(retry_after=1.0)
+        time.sleep(latency / 2)
+        if outcome == "error":
+            raise LLMBackendError("스텁 서버 오류 (500)", status_code=500, retryable=True)
+
+        pieces = split_stream_chunks(stub_reply(prompt))
+        for i, piece in enumerate(pieces):
+            if i:
+                time.sleep(latency / 2 / len(pieces))
+            yield piece
+
+
+def get_llm_backend() -> LLMBackend:
+    """LLM_BACKEND=gemini|openai|stub"""
+    kind = os.getenv("LLM_BACKEND", "gemini").lower()
+    if kind == "stub":
+        return StubBackend()
+    if kind == "openai":
+        return OpenAICompatibleBackend()
+    if kind == "gemini":
+        return GeminiBackend()
+    raise ValueError(f"알 수 없는 LLM_BACKEND: {kind}")
@@ -0,0 +1,207 @@
+# llm_cache.py - LLM 결과 캐시 (프로세스 내 LRU + DB 테이블)
+import hashlib
+import os
+import re
+import threading
+import time
+import unicodedata
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from typing import Dict, Optional, Any
+
+from dotenv import load_dotenv
+from sqlalchemy import update, func, bindparam
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+
+from app.database import SessionLocal
+from app.models import LLMCacheEntry
+
+load_dotenv()
+
+
+def normalize_text(text: str) -> str:
+    """캐시 키용 텍스트 정규화 (유니코드 NFC, 공백 정리)"""
+    text = unicodedata.normalize('NFC', text or '')
+    return re.sub(r'\s+', ' ', text).strip()
+
+
+class LLMCache:
+    """같은 리뷰 텍스트에 대한 LLM 결과를 재사용
+
+    키 = sha256(종류 | 모델 | 프롬프트 버전 | 고객명(답변일 때만) | 정규화된 리뷰 텍스트)
+    조회는 LRU → DB 순서이며, DB에서 찾으면 LRU에도 올린다.
+    DB 히트의 hit_count는 모아 두었다가 hit_flush_size개마다(또는 저장할 때) 한 번에 반영한다.
+    """
+
+    def __init__(self, max_size: int = None, ttl_seconds: int = None, db_max_rows: int = None):
+        self.enabled = os.getenv("LLM_CACHE_ENABLED", "true").lower() == "true"
+        self.max_size = max_size or int(os.getenv("LLM_CACHE_SIZE", "10000"))
+        self.ttl_seconds = ttl_seconds or int(os.getenv("LLM_CACHE_TTL", str(7 * 24 * 3600)))
+        self.db_max_rows = db_max_rows or int(os.getenv("LLM_CACHE_DB_MAX_ROWS", "100000"))
+        # false면 프로세스 내 LRU만 사용 (조회/저장 때 DB에 접근하지 않음)
+        self.db_enabled = os.getenv("LLM_CACHE_DB_ENABLED", "true").lower() == "true"
+        self.hit_flush_size = int(os.getenv("LLM_CACHE_HIT_FLUSH", "100"))
+
+        # key -> (값, 만료 시각(epoch 초), 원래 생성에 걸린 ms)
+        self._lru = OrderedDict()
+        self._lock = threading.Lock()
+        self._writes = 0
+        # key -> 아직 DB에 반영하지 않은 히트 수
+        self._pending_hits: Dict[str, int] = {}
+
+        self.stats = {
+            "memory_hits": 0,
+            "db_hits": 0,
+            "misses": 0,
+            "latency_saved_ms": 0
+        }
+
+    def make_key(self, kind: str, model: str, prompt_version: str, text: str,
+                 customer_name: str = None) -> str:
+        parts = [kind, model, prompt_version, normalize_text(customer_name) if customer_name else '',
+                 normalize_text(text)]
+        return hashlib.sha256('\x1f'.join(parts).encode('utf-8')).hexdigest()
+
+    def _remember(self, key: str, value: Any, expires_at: float, latency_ms: int):
+        with self._lock:
+            self._lru[key] = (value, expires_at, latency_ms)
+            self._lru.move_to_end(key)
+            while len(self._lru) > self.max_size:
+                self._lru.popitem(last=False)
+
+    def _record_hit(self, tier: str, latency_ms: int):
+        with self._lock:
+            self.stats[f"{tier}_hits"] += 1
+            self.stats["latency_saved_ms"] += latency_ms or 0
+
+    def _count_db_hit(self, key: str) -> bool:
+        """DB 히트를 모아 둠 (반영할 때가 됐으면 True)"""
+        with self._lock:
+            self._pending_hits[key] = self._pending_hits.get(key, 0) + 1
+            return sum(self._pending_hits.values()) >= self.hit_flush_size
+
+    def flush_hits(self, db):
+        """모아 둔 hit_count를 UPDATE 한 번(executemany)으로 반영"""
+        with self._lock:
+            pending, self._pending_hits = self._pending_hits, {}
+        if not pending:
+            return
+
+        table = LLMCacheEntry.__table__
+        db.execute(
+            update(table)
+            .where(table.c.cache_key == bindparam("hit_key"))
+            .values(hit_count=func.coalesce(table.c.hit_count, 0) + bindparam("hits")),
+            [{"hit_key": key, "hits": hits} for key, hits in pending.items()]
+        )
+        db.commit()
+
+    def get(self, key: str) -> Optional[Any]:
+        """캐시된 값 반환 (없거나 만료되면 None)"""
+        if not self.enabled:
+            return None
+
+        with self._lock:
+            entry = self._lru.get(key)
+            if entry and entry[1] > time.time():
+                self._lru.move_to_end(key)
+            elif entry:
+                del self._lru[key]
+                entry = None
+
+        if entry:
+            self._record_hit("memory", entry[2])
+            return entry[0]
+
+        if self.db_enabled:
+            try:
+                db = SessionLocal()
+                try:
+                    row = db.query(
+                        LLMCacheEntry.value, LLMCacheEntry.expires_at, LLMCacheEntry.latency_ms
+                    ).filter(
+                        LLMCacheEntry.cache_key == key,
+                        LLMCacheEntry.expires_at > datetime.now()
+                    ).first()
+                    if row:
+                        self._remember(key, row.value, row.expires_at.timestamp(), row.latency_ms)
+                        self._record_hit("db", row.latency_ms)
+                        # 조회마다 커밋하지 않고 모아서 반영
+                        if self._count_db_hit(key):
+                            self.flush_hits(db)
+                        return row.value
+                finally:
+                    db.close()
+            except Exception as e:
+                print(f"⚠️  LLM 캐시 조회 실패: {e}")
+
+        with self._lock:
+            self.stats["misses"] += 1
+        return None
+
+    def set(self, key: str, kind: str, value: Any, model: str, prompt_version: str, latency_ms: int = 0):
+        """LLM 결과 저장 (LRU + DB)"""
+        if not self.enabled:
+            return
+
+        expires_at = datetime.now() + timedelta(seconds=self.ttl_seconds)
+        self._remember(key, value, expires_at.timestamp(), latency_ms)
+        if not self.db_enabled:
+            return
+
+        try:
+            db = SessionLocal()
+            try:
+                stmt = pg_insert(LLMCacheEntry).values(
+                    cache_key=key, kind=kind, value=value, model=model,
+                    prompt_version=prompt_version, latency_ms=latency_ms, expires_at=expires_at
+                ).on_conflict_do_update(
+                    index_elements=['cache_key'],
+                    set_={"value": value, "latency_ms": latency_ms, "expires_at": expires_at}
+                )
+                db.execute(stmt)
+                db.commit()
+                self.flush_hits(db)
+
+                # 여러 스레드가 동시에 저장하므로 1000번째 쓰기를 정확히 한 스레드만 보도록 잠금 안에서 셈
+                with self._lock:
+                    self._writes += 1
+                    should_purge = self._writes % 1000 == 0
+                if should_purge:
+                    self.purge(db)
+            finally:
+                db.close()
+        except Exception as e:
+            print(f"⚠️  LLM 캐시 저장 실패: {e}")
+
+    def purge(self, db) -> int:
+        """만료된 행 삭제 + 최대 행 수 초과분(오래된 순) 삭제"""
+        deleted = db.query(LLMCacheEntry).filter(
+            LLMCacheEntry.expires_at <= datetime.now()
+        ).delete(synchronize_session=False)
+
+        overflow = db.query(LLMCacheEntry).count() - self.db_max_rows
+        if overflow > 0:
+            oldest_ids = db.query(LLMCacheEntry.id).order_by(LLMCacheEntry.created_at).limit(overflow)
+            deleted += db.query(LLMCacheEntry).filter(
+                LLMCacheEntry.id.in_(oldest_ids.scalar_subquery())
+            ).delete(synchronize_session=False)
+
+        db.commit()
+        return deleted
+
+    def get_stats(self) -> dict:
+        """히트율과 절약한 LLM 지연 시간"""
+        with self._lock:
+            stats = dict(self.stats)
+            stats["memory_entries"] = len(self._lru)
+
+        hits = stats["memory_hits"] + stats["db_hits"]
+        lookups = hits + stats["misses"]
+        stats["hit_rate"] = round(hits / lookups, 4) if lookups else 0.0
+        stats["latency_saved_seconds"] = round(stats.pop("latency_saved_ms") / 1000, 2)
+        stats["enabled"] = self.enabled
+        stats["db_enabled"] = self.db_enabled
+        stats["ttl_seconds"] = self.ttl_seconds
+        stats["max_size"] = self.max_size
+        return stats
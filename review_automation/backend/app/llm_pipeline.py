@@ -0,0 +1,106 @@
+# llm_pipeline.py - 대기 리뷰를 동시에 처리하는 비동기 LLM 파이프라인
+import asyncio
+import os
+import time
+from types import SimpleNamespace
+from typing import List, Tuple, Optional
+
+from dotenv import load_dotenv
+from sqlalchemy.orm import Session
+
+from app.models import Review
+from app.schemas import ReviewAnalysis
+from app.result_writer import write_results, failure_mode
+
+load_dotenv()
+
+# (리뷰 ID, 분석 결과 또는 None, 처리 방식, 실패 사유)
+Output = Tuple[int, Optional[ReviewAnalysis], str, Optional[str]]
+
+
+class AsyncReviewPipeline:
+    """LLM 요청은 concurrency개까지 동시에, DB 쓰기는 별도 작업자가 N개씩 묶어서 커밋
+
+    호출 속도는 LLMService의 토큰 버킷(RPM/TPM)이 조절하므로
+    처리량이 고정 sleep이 아니라 할당량 한도에 맞춰진다.
+    """
+
+    def __init__(self, llm_service, concurrency: int = None, write_batch_size: int = None):
+        self.llm_service = llm_service
+        self.concurrency = concurrency or llm_service.concurrency
+        self.write_batch_size = write_batch_size or int(os.getenv("LLM_WRITE_BATCH_SIZE", "20"))
+
+    def _analyze_unit(self, unit: List[SimpleNamespace]) -> List[Output]:
+        """작업 단위(리뷰 1개 또는 배치) 분석 (스레드에서 실행, DB 접근 없음)"""
+        if len(unit) > 1:
+            results = self.llm_service.analyze_review_batch(unit)
+            outputs = []
+            for review in unit:
+                if review.id in results:
+                    outputs.append((review.id, results[review.id], "batch", None))
+                else:
+                    # 배치 응답에서 빠진 리뷰는 개별 재시도
+                    outputs.append((review.id, *self.llm_service._analyze_safely(review)))
+            return outputs
+
+        return [(unit[0].id, *self.llm_service._analyze_safely(unit[0]))]
+
+    def _flush(self, db: Session, reviews_by_id: dict, results: List[Output], worker_id: Optional[str]) -> int:
+        """모인 결과를 한 트랜잭션으로 저장 (스레드에서 실행, 작업자 하나만 사용)"""
+        saved_count = write_results(db, [
+            (reviews_by_id[review_id], analysis, mode, error) for review_id, analysis, mode, error in results
+        ], worker_id=worker_id)
+        print(f"💾 {saved_count}개 결과 저장 (커밋 1회)")
+        return saved_count
+
+    async def run(self, db: Session, reviews: List[Review], worker_id: Optional[str] = None) -> int:
+        """대기 리뷰를 처리하고 성공 개수 반환 (worker_id는 작업 큐에서 리스를 잡은 작업자)"""
+        start_time = time.time()
+        reviews_by_id = {review.id: review for review in reviews}
+
+        # LLM 스레드에는 ORM 객체 대신 필요한 값만 복사해서 넘김 (커밋 시 만료/지연 로딩 방지)
+        snapshots = [
+            SimpleNamespace(id=r.id, customer_name=r.customer_name, review_text=r.review_text)
+            for r in reviews
+        ]
+        if self.llm_service.batch_size > 1:
+            units = self.llm_service._pack_batches(snapshots)
+        else:
+            units = [[snapshot] for snapshot in snapshots]
+
+        semaphore = asyncio.Semaphore(self.concurrency)
+        queue: asyncio.Queue = asyncio.Queue()
+        done = object()
+
+        async def worker(unit):
+            async with semaphore:
+                try:
+                    outputs = await asyncio.to_thread(self._analyze_unit, unit)
+                except Exception as e:
+                    print(f"❌ LLM 처리 실패: {e}")
+                    outputs = [(review.id, None, failure_mode(e), f"{type(e).__name__}: {e}") for review in unit]
+            for output in outputs:
+                await queue.put(output)
+
+        async def writer():
+            saved_count = 0
+            pending = []
+            while True:
+                item = await queue.get()
+                if item is not done:
+                    pending.append(item)
+                if pending and (item is done or len(pending) >= self.write_batch_size):
+                    saved_count += await asyncio.to_thread(self._flush, db, reviews_by_id, pending, worker_id)
+                    pending = []
+                if item is done:
+                    return saved_count
+
+        writer_task = asyncio.create_task(writer())
+        await asyncio.gather(*(worker(unit) for unit in units))
+        await queue.put(done)
+        success_count = await writer_task
+
+        elapsed = round(time.time() - start_time, 2)
+        print(f"⚡ 비동기 파이프라인: {success_count}/{len(reviews)}개, {elapsed}초 "
+              f"(동시 요청 {self.concurrency}, 리미터 대기 {round(self.llm_service.rate_limiter.waited_seconds, 1)}초)")
+        return success_count
@@ -0,0 +1,305 @@
+# llm_resilience.py - LLM 호출 재시도 / 서킷 브레이커 / 헤지 요청
+import os
+import random
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from typing import Callable, Iterator, Optional
+
+from dotenv import load_dotenv
+
+from app.llm_backends import LLMBackend, LLMBackendError, RateLimitedError
+
+load_dotenv()
+
+# Gemini(google.api_core) 예외 중 재시도할 만한 것 (패키지를 import하지 않도록 이름으로 비교)
+RETRYABLE_EXCEPTION_NAMES = {
+    'ResourceExhausted', 'TooManyRequests', 'ServiceUnavailable', 'DeadlineExceeded',
+    'InternalServerError', 'BadGateway', 'GatewayTimeout', 'Aborted',
+}
+RETRYABLE_STATUS_CODES = {429, 500, 502, 503, 504}
+
+
+class CircuitOpenError(LLMBackendError):
+    """서킷이 열려 있어 호출하지 않고 바로 실패"""
+
+    def __init__(self, retry_in: float):
+        super().__init__(f"LLM 서킷 열림 ({retry_in:.1f}초 후 재시도)", retryable=False)
+        self.retry_in = retry_in
+
+
+def is_retryable(error: Exception) -> bool:
+    """일시적인 오류(429/5xx/타임아웃/연결 오류)인지 판단"""
+    if isinstance(error, LLMBackendError):
+        return error.retryable
+    if isinstance(error, (TimeoutError, ConnectionError)):
+        return True
+    if getattr(error, 'code', None) in RETRYABLE_STATUS_CODES:
+        return True
+    return type(error).__name__ in RETRYABLE_EXCEPTION_NAMES
+
+
+def is_transient(error: Exception) -> bool:
+    """리뷰가 아니라 LLM 쪽 장애로 실패했는지 (서킷 열림 또는 재시도를 다 써 버린 일시적 오류)"""
+    return isinstance(error, CircuitOpenError) or is_retryable(error)
+
+
+class CircuitBreaker:
+    """연속 실패가 failure_threshold번이면 열리고, reset_timeout 뒤 한 번 시험 호출(half-open)
+
+    시험 호출이 성공하면 닫히고, 실패하면 다시 reset_timeout 동안 열린다.
+    시험 호출이 결과 없이 끝나면(release_trial) 또는 trial_timeout 안에 결과가 없으면 다음 호출이 다시 시험한다.
+    """
+
+    def __init__(self, failure_threshold: int = None, reset_timeout: float = None,
+                 trial_timeout: float = None):
+        self.failure_threshold = failure_threshold or int(os.getenv("LLM_BREAKER_FAILURES", "5"))
+        self.reset_timeout = reset_timeout or float(os.getenv("LLM_BREAKER_RESET_SECONDS", "30"))
+        self.trial_timeout = trial_timeout or float(os.getenv("LLM_BREAKER_TRIAL_TIMEOUT", "120"))
+        self.state = "closed"
+        self._failures = 0
+        self._opened_at = 0.0
+        self._trial_in_flight = False
+        self._trial_started_at = 0.0
+        self._lock = threading.Lock()
+        self.open_count = 0
+
+    def allow(self) -> bool:
+        """호출해도 되면 시험 호출 여부를 반환 (True면 결과를 기록하거나 release_trial 필요), 아니면 CircuitOpenError"""
+        with self._lock:
+            if self.state == "closed":
+                return False
+            now = time.monotonic()
+            elapsed = now - self._opened_at
+            if self.state == "open" and elapsed >= self.reset_timeout:
+                self.state = "half_open"
+            if self.state == "half_open" and self._trial_in_flight \
+                    and now - self._trial_started_at >= self.trial_timeout:
+                print(f"⚠️  LLM 서킷 시험 호출이 {self.trial_timeout}초 동안 결과 없음 - 다시 시험")
+                self._trial_in_flight = False
+            if self.state == "half_open" and not self._trial_in_flight:
+                self._trial_in_flight = True
+                self._trial_started_at = now
+                return True
+            raise CircuitOpenError(max(0.0, self.reset_timeout - elapsed))
+
+    def release_trial(self):
+        """시험 호출이 성공/실패 없이 끝났을 때(스트림을 중간에 닫는 등) 다음 호출이 시험할 수 있게 반납"""
+        with self._lock:
+            self._trial_in_flight = False
+
+    def record_success(self):
+        with self._lock:
+            if self.state != "closed":
+                print("✓ LLM 서킷 닫힘 (시험 호출 성공)")
+            self.state = "closed"
+            self._failures = 0
+            self._trial_in_flight = False
+
+    def record_failure(self):
+        with self._lock:
+            self._failures += 1
+            if self.state == "half_open" or self._failures >= self.failure_threshold:
+                if self.state != "open":
+                    self.open_count += 1
+                    print(f"🚫 LLM 서킷 열림: 연속 실패 {self._failures}회, {self.reset_timeout}초 동안 호출 중단")
+                self.state = "open"
+                self._opened_at = time.monotonic()
+                self._trial_in_flight = False
+
+
+class LatencyTracker:
+    """최근 성공 호출 지연 시간의 백분위수"""
+
+    def __init__(self, window: int = 200):
+        self._samples = deque(maxlen=window)
+        self._lock = threading.Lock()
+
+    def record(self, seconds: float):
+        with self._lock:
+            self._samples.append(seconds)
+
+    def percentile(self, pct: float, min_samples: int = 1) -> Optional[float]:
+        with self._lock:
+            samples = sorted(self._samples)
+        if len(samples) < min_samples:
+            return None
+        return samples[min(len(samples) - 1, int(len(samples) * pct / 100))]
+
+
+class ResilientBackend(LLMBackend):
+    """다른 백엔드를 감싸서 재시도 / 서킷 브레이커 / 헤지 요청을 적용
+
+    - 재시도: 일시적 오류만, 지수 백오프 + full jitter (429의 Retry-After는 최소 대기로 존중)
+    - 서킷 브레이커: 장애 중에는 기다리지 않고 바로 실패해서 배치 전체가 멈추지 않게
+    - 헤지: 최근 p95 지연을 넘기면 같은 요청을 한 번 더 보내고 먼저 온 응답 사용
+    before_attempt는 시도(헤지 포함)마다 호출되므로 여기서 토큰 버킷을 잡으면 된다.
+    """
+
+    def __init__(self, backend: LLMBackend, before_attempt: Callable[[str], None] = None,
+                 max_attempts: int = None, base_delay: float = None, max_delay: float = None,
+                 breaker: CircuitBreaker = None, hedge_enabled: bool = None):
+        self.backend = backend
+        self.name = backend.name
+        self.model_name = backend.model_name
+        self.before_attempt = before_attempt
+
+        self.max_attempts = max_attempts or int(os.getenv("LLM_RETRY_MAX_ATTEMPTS", "4"))
+        self.base_delay = base_delay if base_delay is not None else float(os.getenv("LLM_RETRY_BASE_DELAY", "0.5"))
+        self.max_delay = max_delay if max_delay is not None else float(os.getenv("LLM_RETRY_MAX_DELAY", "20"))
+        self.breaker = breaker or CircuitBreaker()
+
+        if hedge_enabled is None:
+            hedge_enabled = os.getenv("LLM_HEDGE_ENABLED", "false").lower() == "true"
+        self.hedge_enabled = hedge_enabled
+        self.hedge_percentile = float(os.getenv("LLM_HEDGE_PERCENTILE", "95"))
+        self.hedge_min_samples = int(os.getenv("LLM_HEDGE_MIN_SAMPLES", "20"))
+        self.latency = LatencyTracker()
+        self._executor = ThreadPoolExecutor(
+            max_workers=int(os.getenv("LLM_HEDGE_WORKERS", "16")),
+            thread_name_prefix="llm-hedge"
+        ) if hedge_enabled else None
+
+        self._stats_lock = threading.Lock()
+        self.stats = {"calls": 0, "attempts": 0, "retries": 0, "failures": 0,
+                      "fast_failures": 0, "hedges": 0, "hedge_wins": 0}
+
+    def _count(self, key: str, amount: int = 1):
+        with self._stats_lock:
+            self.stats[key] += amount
+
+    def _record_error(self, error: Exception) -> bool:
+        """재시도할 만한 오류만 서킷에 실패로 기록 (기록했으면 True)
+
+        요청 자체가 잘못된 경우(4xx 등)는 장애도 회복도 아니므로 성공/실패 어느 쪽으로도 기록하지 않는다.
+        (half-open 시험 호출이 4xx로 끝나면 서킷을 닫지 않고 시험 호출만 반납)
+        """
+        if not is_retryable(error):
+            return False
+        self.breaker.record_failure()
+        return True
+
+    def _call_once(self, prompt: str) -> str:
+        """단일 시도 (서킷 확인 → 토큰 버킷 → 호출 → 결과 기록)"""
+        trial = self.breaker.allow()
+        recorded = False
+        try:
+            if self.before_attempt:
+                self.before_attempt(prompt)
+            self._count("attempts")
+
+            start_time = time.monotonic()
+            try:
+                text = self.backend.generate(prompt)
+            except Exception as e:
+                recorded = self._record_error(e)
+                raise
+
+            self.latency.record(time.monotonic() - start_time)
+            recorded = True
+            self.breaker.record_success()
+            return text
+        finally:
+            if trial and not recorded:
+                self.breaker.release_trial()
+
+    def _hedged_call(self, prompt: str) -> str:
+        """p95를 넘기면 두 번째 요청을 보내고 먼저 성공한 응답 반환"""
+        threshold = self.latency.percentile(self.hedge_percentile, self.hedge_min_samples)
+        if threshold is None:
+            return self._call_once(prompt)
+
+        primary = self._executor.submit(self._call_once, prompt)
+        done, _ = wait([primary], timeout=threshold)
+        if done:
+            return primary.result()
+
+        self._count("hedges")
+        hedge = self._executor.submit(self._call_once, prompt)
+        pending = {primary, hedge}
+        error = None
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                if future.exception() is None:
+                    if future is hedge:
+                        self._count("hedge_wins")
+                    # 남은 요청은 취소할 수 없으므로 결과만 버린다
+                    return future.result()
+                error = future.exception()
+        raise error
+
+    def _backoff(self, attempt: int, error: Exception) -> float:
+        delay = random.uniform(0, min(self.max_delay, self.base_delay * (2 ** attempt)))
+        if isinstance(error, RateLimitedError) and error.retry_after:
+            delay = max(delay, error.retry_after)
+        return delay
+
+    def generate(self, prompt: str) -> str:
+        self._count("calls")
+        for attempt in range(self.max_attempts):
+            try:
+                if self._executor is not None:
+                    return self._hedged_call(prompt)
+                return self._call_once(prompt)
+            except CircuitOpenError:
+                self._count("fast_failures")
+                raise
+            except Exception as e:
+                if not is_retryable(e) or attempt == self.max_attempts - 1:
+                    self._count("failures")
+                    raise
+                delay = self._backoff(attempt, e)
+                self._count("retries")
+                print(f"🔁 LLM 재시도 {attempt + 1}/{self.max_attempts - 1} ({round(delay, 2)}초 후): {e}")
+                time.sleep(delay)
+
+    def generate_stream(self, prompt: str) -> Iterator[str]:
+        """스트리밍 호출 (첫 조각이 오기 전의 실패만 재시도, 헤지는 하지 않음)"""
+        self._count("calls")
+        for attempt in range(self.max_attempts):
+            started = False
+            trial = False
+            recorded = False
+            try:
+                trial = self.breaker.allow()
+                if self.before_attempt:
+                    self.before_attempt(prompt)
+                self._count("attempts")
+
+                for piece in self.backend.generate_stream(prompt):
+                    started = True
+                    yield piece
+                recorded = True
+                self.breaker.record_success()
+                return
+            except CircuitOpenError:
+                self._count("fast_failures")
+                raise
+            except Exception as e:
+                recorded = self._record_error(e)
+                # 이미 일부를 내보냈다면 재시도하면 중복 출력이 되므로 그대로 실패
+                if started or not is_retryable(e) or attempt == self.max_attempts - 1:
+                    self._count("failures")
+                    raise
+                delay = self._backoff(attempt, e)
+                self._count("retries")
+                print(f"🔁 LLM 스트리밍 재시도 {attempt + 1}/{self.max_attempts - 1} ({round(delay, 2)}초 후): {e}")
+                time.sleep(delay)
+            finally:
+                # 클라이언트가 연결을 끊어 제너레이터가 닫히거나(GeneratorExit) 4xx로 끝나면 성공도 실패도 아니므로 시험 호출만 반납
+                if trial and not recorded:
+                    self.breaker.release_trial()
+
+    def get_stats(self) -> dict:
+        with self._stats_lock:
+            stats = dict(self.stats)
+        stats["circuit_state"] = self.breaker.state
+        stats["circuit_open_count"] = self.breaker.open_count
+        stats["hedge_enabled"] = self.hedge_enabled
+        p50 = self.latency.percentile(50)
+        p95 = self.latency.percentile(95)
+        stats["latency_p50_ms"] = round(p50 * 1000) if p50 is not None else None
+        stats["latency_p95_ms"] = round(p95 * 1000) if p95 is not None else None
+        return stats
@@ -8,23 +8,67 @@ os.environ['GRPC_TRACE'] = ''
 logging.getLogger('absl').setLevel(logging.ERROR)
 warnings.filterwarnings('ignore')
 
-import google.generativeai as genai
 from dotenv import load_dotenv
-from typing import Optional, Dict
+from typing import Optional, Dict, List, Tuple, Iterator
 from sqlalchemy.orm import Session
 from app.models import Review, SystemLog
+from app.schemas import ReviewAnalysis
+from app.rate_limiter import RateLimiter
+from app.llm_pipeline import AsyncReviewPipeline
+from app.llm_cache import LLMCache
+from app.llm_backends import LLMBackend, get_llm_backend
+from app.llm_resilience import ResilientBackend, is_transient
+from app.sentiment import classify_sentiment
+from app.keywords import get_keyword_extractor
+from app.near_dupe import get_near_dupe_index, simhash
+from app.result_writer import ResultWriter, Result, write_results, failure_mode
+from app.reply_jobs import run_claimed_batch, make_worker_id, blocked_review_filter
+from app.priority import assign_missing_priorities
+from pydantic import ValidationError
+import asyncio
+import json
+import threading
 import time
+from types import SimpleNamespace
 
 load_dotenv()
 
 class LLMService:
-    def __init__(self):
-        api_key = os.getenv("GEMINI_API_KEY")
-        if not api_key:
-            raise ValueError("GEMINI_API_KEY가 설정되지 않았습니다.")
+    def __init__(self, backend: LLMBackend = None):
+        # 분당 요청/토큰 한도를 지키는 토큰 버킷 (고정 sleep 대신 모든 호출에 적용)
+        self.rate_limiter = RateLimiter()
         
-        genai.configure(api_key=api_key)
-        self.model = genai.GenerativeModel('models/gemini-2.5-flash-lite')
+        # LLM_BACKEND=gemini|openai|stub (Gemini만 GEMINI_API_KEY 필요)
+        # 재시도/헤지 요청도 각각 토큰 버킷을 거치도록 시도마다 _acquire 호출
+        self.backend = ResilientBackend(backend or get_llm_backend(), before_attempt=self._acquire)
+        self.model_name = self.backend.model_name
+        
+        # 프롬프트를 바꾸면 버전을 올려서 이전 캐시를 무효화
+        self.prompt_version = os.getenv("LLM_PROMPT_VERSION", "v1")
+        self.cache = LLMCache()
+        
+        # 통합 모드: 답변/키워드/감성을 한 번의 호출(JSON 응답)로 받음
+        self.combined_mode = os.getenv("LLM_COMBINED_MODE", "true").lower() == "true"
+        
+        # 배치 모드: 리뷰 N개를 한 번의 요청으로 분석 (1 이하면 사용 안 함)
+        self.batch_size = int(os.getenv("LLM_BATCH_SIZE", "1"))
+        # 배치 하나에 담을 입력+출력 추정 토큰 상한
+        self.batch_token_budget = int(os.getenv("LLM_BATCH_TOKEN_BUDGET", "8000"))
+        
+        # 동시에 진행할 LLM 요청 수 (1이면 기존 순차 처리)
+        self.concurrency = int(os.getenv("LLM_CONCURRENCY", "1"))
+        
+        # 로컬 감성 분류기 신뢰도가 이 값 이상이면 로컬 라벨 사용 (1 초과면 항상 LLM)
+        # 단독 호출 모드에서는 감성 호출을 건너뛰고, 통합/배치 모드에서는 LLM이 준 감성을 로컬 라벨로 덮어쓴다
+        self.local_sentiment_threshold = float(os.getenv("LOCAL_SENTIMENT_THRESHOLD", "0.6"))
+        self.sentiment_stats = {"local": 0, "llm": 0}
+        self._stats_lock = threading.Lock()
+        
+        # 거의 같은 리뷰의 답변 재작성 방식 (paraphrase: 짧은 재작성 호출, template: 이름만 교체)
+        self.near_dupe_reply_mode = os.getenv("NEAR_DUPE_REPLY", "paraphrase").lower()
+        
+        # 작업 큐: reply_jobs에서 SKIP LOCKED로 리스를 잡은 리뷰만 처리 (false면 기존처럼 바로 조회)
+        self.job_queue_enabled = os.getenv("REPLY_JOB_QUEUE", "true").lower() == "true"
         
         # 기본 프롬프트 설정
         self.system_prompt = """당신은 친절하고 전문적인 식당 사장님입니다.
@@ -40,30 +84,233 @@ class LLMService:
 7. 과도한 존댓말이나 형식적인 표현은 피하세요
 """
     
-    def generate_reply(self, review: Review) -> Optional[str]:
-        """리뷰에 대한 답변 생성"""
+    def _acquire(self, prompt: str):
+        """분당 요청/토큰 한도 내에서 대기 (입력은 글자 수, 출력은 고정값으로 토큰 추정)"""
+        self.rate_limiter.acquire(len(prompt) + 300)
+    
+    def _generate(self, prompt: str) -> str:
+        """LLM 호출 후 응답 텍스트 반환 (일시적 오류는 재시도, 장애 중에는 서킷 브레이커로 즉시 실패)"""
+        return self.backend.generate(prompt).strip()
+    
+    def analyze_review(self, review: Review) -> Optional[ReviewAnalysis]:
+        """한 번의 호출로 답변 + 키워드 + 감성을 JSON으로 받아 스키마 검증"""
         try:
             prompt = f"""{self.system_prompt}
 
 고객명: {review.customer_name}
 리뷰 내용: {review.review_text}
 
+위 리뷰를 분석해서 아래 JSON 형식으로만 응답하세요. 다른 설명은 붙이지 마세요.
+{{
+  "reply": "위 가이드라인에 따른 답변",
+  "keywords": ["음식, 서비스, 분위기 등 핵심 키워드 3-5개"],
+  "sentiment": "긍정, 부정, 중립 중 하나"
+}}"""
+
+            print(f"🤖 LLM 통합 분석 중... (리뷰 ID: {review.id})")
+            
+            analysis = self._parse_analysis(self._generate(prompt))
+            
+            print(f"✓ 통합 분석 완료: {analysis.reply[:50]}...")
+            return analysis
+            
+        except (ValueError, ValidationError) as e:
+            print(f"⚠️  통합 응답 파싱 실패, 개별 호출로 전환: {e}")
+            return None
+        except Exception as e:
+            print(f"❌ LLM 통합 분석 실패: {e}")
+            if is_transient(e):
+                # LLM 장애면 개별 호출로 전환해도 같은 이유로 실패하므로 바로 올려 보냄
+                raise
+            return None
+    
+    def _parse_analysis(self, text: str) -> ReviewAnalysis:
+        """LLM 응답에서 JSON 객체를 꺼내 ReviewAnalysis로 검증"""
+        # ```json ... ``` 코드블록이나 앞뒤 설명이 붙어도 객체 부분만 사용
+        start, end = text.find('{'), text.rfind('}')
+        if start == -1 or end < start:
+            raise ValueError(f"JSON 객체가 없습니다: {text[:100]}")
+        
+        return ReviewAnalysis.model_validate(json.loads(text[start:end + 1]))
+    
+    def _estimate_tokens(self, review: Review) -> int:
+        """리뷰 하나를 배치에 넣을 때의 대략적인 토큰 수 (한국어는 글자당 약 1토큰, 출력 포함)"""
+        return len(review.customer_name or '') + len(review.review_text or '') + 200
+    
+    def _pack_batches(self, reviews: List[Review]) -> List[List[Review]]:
+        """리뷰를 batch_size / 토큰 예산 안에서 순서대로 묶음"""
+        batches = []
+        current, current_tokens = [], 0
+        
+        for review in reviews:
+            tokens = self._estimate_tokens(review)
+            if current and (len(current) >= self.batch_size
+                            or current_tokens + tokens > self.batch_token_budget):
+                batches.append(current)
+                current, current_tokens = [], 0
+            current.append(review)
+            current_tokens += tokens
+        
+        if current:
+            batches.append(current)
+        return batches
+    
+    def analyze_review_batch(self, reviews: List[Review]) -> Dict[int, ReviewAnalysis]:
+        """리뷰 여러 개를 한 번의 호출로 분석해서 {리뷰 ID: 결과} 반환
+        
+        항목별로 스키마를 검증하고, 누락되거나 잘못된 항목은 결과에서 빠진다 (호출한 쪽이 개별 재시도).
+        캐시에 있거나 거의 같은 리뷰에 이미 답변한 리뷰는 프롬프트에 넣지 않는다.
+        호출 자체가 실패하면(LLM 장애, 잘못된 요청) 예외를 그대로 올려서 리뷰마다 다시 호출하지 않게 한다.
+        """
+        results = {}
+        cache_keys = {}
+        misses = []
+        for r in reviews:
+            cache_keys[r.id] = self._cache_key("analysis", r.review_text, r.customer_name)
+            cached = self.cache.get(cache_keys[r.id])
+            if cached is not None:
+                results[r.id] = self._with_local_models(ReviewAnalysis.model_validate(cached), r.review_text,
+                                                        count=False)
+                continue
+            near_duplicate = self.reuse_near_duplicate(r)
+            if near_duplicate:
+                results[r.id] = near_duplicate
+            else:
+                misses.append(r)
+        
+        if not misses:
+            return results
+        reviews = misses
+        start_time = time.time()
+        
+        reviews_block = "\n".join(
+            json.dumps({"id": r.id, "customer_name": r.customer_name, "review_text": r.review_text},
+                       ensure_ascii=False)
+            for r in reviews
+        )
+        prompt = f"""{self.system_prompt}
+
+아래는 한 줄에 하나씩 JSON으로 적은 리뷰 {len(reviews)}개입니다.
+{reviews_block}
+
+각 리뷰를 분석해서 아래 형식의 JSON 배열로만 응답하세요. 다른 설명은 붙이지 마세요.
+id는 입력의 id를 그대로 사용하고, 모든 리뷰에 대해 하나씩 작성하세요.
+[
+  {{
+    "id": 리뷰 id,
+    "reply": "위 가이드라인에 따른 답변",
+    "keywords": ["음식, 서비스, 분위기 등 핵심 키워드 3-5개"],
+    "sentiment": "긍정, 부정, 중립 중 하나"
+  }}
+]"""
+        
+        print(f"🤖 LLM 배치 분석 중... ({len(reviews)}개, 리뷰 ID: {[r.id for r in reviews]})")
+        
+        try:
+            text = self._generate(prompt)
+        except Exception as e:
+            print(f"❌ LLM 배치 분석 실패: {e}")
+            raise
+        
+        try:
+            start, end = text.find('['), text.rfind(']')
+            if start == -1 or end < start:
+                raise ValueError(f"JSON 배열이 없습니다: {text[:100]}")
+            items = json.loads(text[start:end + 1])
+        except ValueError as e:
+            print(f"⚠️  배치 응답 파싱 실패, 개별 호출로 전환: {e}")
+            return results
+        
+        expected_ids = {r.id for r in reviews}
+        generated = {}
+        for item in items if isinstance(items, list) else []:
+            try:
+                review_id = int(item.get('id'))
+                if review_id in expected_ids and review_id not in generated:
+                    generated[review_id] = ReviewAnalysis.model_validate(item)
+            except (TypeError, ValueError, AttributeError) as e:
+                print(f"⚠️  배치 항목 검증 실패: {e}")
+        
+        # 배치 지연 시간은 항목 수로 나눠서 캐시에 기록
+        per_item_start = time.time() - (time.time() - start_time) / max(len(reviews), 1)
+        for review_id, analysis in generated.items():
+            self._cache_set(cache_keys[review_id], "analysis", analysis.model_dump(), per_item_start)
+        
+        print(f"✓ 배치 분석 완료: {len(generated)}/{len(reviews)}개")
+        review_texts = {r.id: r.review_text for r in reviews}
+        for review_id, analysis in generated.items():
+            results[review_id] = self._with_local_models(analysis, review_texts[review_id])
+        return results
+    
+    def _cache_key(self, kind: str, review_text: str, customer_name: str = None) -> str:
+        """캐시 키 (답변처럼 고객명이 들어가는 결과만 customer_name 포함)"""
+        return self.cache.make_key(kind, self.model_name, self.prompt_version, review_text, customer_name)
+    
+    def _cache_set(self, key: str, kind: str, value, start_time: float):
+        self.cache.set(key, kind, value, self.model_name, self.prompt_version,
+                       latency_ms=int((time.time() - start_time) * 1000))
+    
+    def _reply_prompt(self, review) -> str:
+        return f"""{self.system_prompt}
+
+고객명: {review.customer_name}
+리뷰 내용: {review.review_text}
+
 위 리뷰에 대한 답변을 작성해주세요:"""
+    
+    def generate_reply(self, review: Review) -> str:
+        """리뷰에 대한 답변 생성 (실패하면 예외 - 실패 사유가 작업 큐까지 전달되도록)"""
+        cache_key = self._cache_key("reply", review.review_text, review.customer_name)
+        cached = self.cache.get(cache_key)
+        if cached is not None:
+            return cached
+        
+        start_time = time.time()
+        try:
+            prompt = self._reply_prompt(review)
 
             print(f"🤖 LLM 답변 생성 중... (리뷰 ID: {review.id})")
             
-            response = self.model.generate_content(prompt)
-            generated_reply = response.text.strip()
+            generated_reply = self._generate(prompt)
+            self._cache_set(cache_key, "reply", generated_reply, start_time)
             
             print(f"✓ 답변 생성 완료: {generated_reply[:50]}...")
             return generated_reply
             
         except Exception as e:
             print(f"❌ LLM 답변 생성 실패: {e}")
-            return None
+            raise
+    
+    def _with_local_models(self, analysis: ReviewAnalysis, review_text: str, count: bool = True) -> ReviewAnalysis:
+        """통합/배치 응답을 로컬 결과로 보정
+        
+        - 로컬 추출기를 쓰면 LLM 키워드 대신 TF-IDF 키워드로 교체 (집계 시 표기가 일정하도록)
+        - 로컬 감성 분류기가 확신하면 LLM 감성 대신 로컬 라벨 사용 (count면 라벨 출처를 통계에 반영)
+        """
+        extractor = get_keyword_extractor()
+        if extractor is not None:
+            analysis.keywords = extractor.extract(review_text)
+        
+        label, confidence = classify_sentiment(review_text)
+        local = confidence >= self.local_sentiment_threshold
+        if local:
+            analysis.sentiment = label
+        if count:
+            self._count_sentiment("local" if local else "llm")
+        return analysis
     
     def extract_keywords(self, review_text: str) -> list:
-        """리뷰에서 키워드 추출 (간단한 버전)"""
+        """리뷰에서 키워드 추출 (KEYWORD_EXTRACTOR=local이면 LLM 호출 없이 TF-IDF)"""
+        extractor = get_keyword_extractor()
+        if extractor is not None:
+            return extractor.extract(review_text)
+        
+        cache_key = self._cache_key("keywords", review_text)
+        cached = self.cache.get(cache_key)
+        if cached is not None:
+            return cached
+        
+        start_time = time.time()
         try:
             prompt = f"""다음 리뷰에서 핵심 키워드를 3-5개 추출해주세요.
 음식, 서비스, 분위기 등 주요 요소를 중심으로 추출하세요.
@@ -73,18 +320,33 @@ class LLMService:
 
 키워드:"""
 
-            response = self.model.generate_content(prompt)
-            keywords_str = response.text.strip()
-            keywords = [k.strip() for k in keywords_str.split(',')]
+            keywords_str = self._generate(prompt)
+            keywords = [k.strip() for k in keywords_str.split(',')][:5]  # 최대 5개
+            self._cache_set(cache_key, "keywords", keywords, start_time)
             
-            return keywords[:5]  # 최대 5개
+            return keywords
             
         except Exception as e:
             print(f"⚠️  키워드 추출 실패: {e}")
             return []
     
     def analyze_sentiment(self, review_text: str) -> str:
-        """감성 분석 (긍정/부정/중립)"""
+        """감성 분석 (긍정/부정/중립)
+        
+        로컬 사전 분류기로 먼저 판단하고, 신뢰도가 낮을 때만 LLM에 묻는다.
+        """
+        label, confidence = classify_sentiment(review_text)
+        if confidence >= self.local_sentiment_threshold:
+            self._count_sentiment("local")
+            return label
+        self._count_sentiment("llm")
+        
+        cache_key = self._cache_key("sentiment", review_text)
+        cached = self.cache.get(cache_key)
+        if cached is not None:
+            return cached
+        
+        start_time = time.time()
         try:
             prompt = f"""다음 리뷰의 감성을 분석하세요.
 '긍정', '부정', '중립' 중 하나만 반환하세요.
@@ -93,125 +355,310 @@ class LLMService:
 
 감성:"""
 
-            response = self.model.generate_content(prompt)
-            sentiment = response.text.strip()
+            sentiment = self._generate(prompt)
             
             # 결과 정규화
             if '긍정' in sentiment:
-                return '긍정'
+                sentiment = '긍정'
             elif '부정' in sentiment:
-                return '부정'
+                sentiment = '부정'
             else:
-                return '중립'
+                sentiment = '중립'
+            
+            self._cache_set(cache_key, "sentiment", sentiment, start_time)
+            return sentiment
                 
         except Exception as e:
             print(f"⚠️  감성 분석 실패: {e}")
             return '중립'
     
-    def process_review(self, db: Session, review_id: int) -> bool:
-        """리뷰를 처리하여 답변 생성 및 DB 업데이트"""
+    def _count_sentiment(self, source: str):
+        with self._stats_lock:
+            self.sentiment_stats[source] += 1
+    
+    def get_stats(self) -> dict:
+        """캐시 통계 + 감성 라벨을 로컬 분류기로 정한 비율"""
+        with self._stats_lock:
+            sentiment = dict(self.sentiment_stats)
+        total = sentiment["local"] + sentiment["llm"]
+        # 단독 호출 모드에서는 이 비율만큼 감성 LLM 호출을 건너뛴다 (통합/배치 모드는 호출 수 변화 없음)
+        sentiment["local_ratio"] = round(sentiment["local"] / total, 4) if total else 0.0
+        sentiment["threshold"] = self.local_sentiment_threshold
+        
+        index = get_near_dupe_index()
+        return {
+            "cache": self.cache.get_stats(),
+            "sentiment": sentiment,
+            "near_duplicate": index.get_stats() if index is not None else None,
+            "resilience": self.backend.get_stats()
+        }
+    
+    def _print_review_start(self, review):
+        print(f"\n{'='*50}")
+        print(f"📝 리뷰 처리 시작 (ID: {review.id})")
+        print(f"고객: {review.customer_name}")
+        print(f"리뷰: {review.review_text[:100]}...")
+        print(f"{'='*50}")
+    
+    def _analyze_safely(self, review, fresh: bool = False) -> Tuple[Optional[ReviewAnalysis], str, Optional[str]]:
+        """generate_analysis를 예외 없이 (결과, 처리 방식, 실패 사유)로 반환
+        
+        실패하면 결과는 None이고 실패 사유에 예외 메시지(없으면 빈 응답)를 담는다.
+        LLM 장애(서킷 열림 / 429 / 5xx)로 실패했으면 처리 방식이 UNAVAILABLE이다.
+        이 사유가 결과 저장 때 작업 행(reply_jobs.last_error)에 남고 finish_reply_jobs가 그걸 보고 처리한다.
+        """
         try:
-            review = db.query(Review).filter(Review.id == review_id).first()
-            
-            if not review:
-                print(f"❌ 리뷰를 찾을 수 없음: ID {review_id}")
-                return False
-            
-            if review.generated_reply:
-                print(f"⏭️  이미 답변이 생성된 리뷰: ID {review_id}")
-                return False
-            
-            print(f"\n{'='*50}")
-            print(f"📝 리뷰 처리 시작 (ID: {review.id})")
-            print(f"고객: {review.customer_name}")
-            print(f"리뷰: {review.review_text[:100]}...")
-            print(f"{'='*50}")
-            
-            # 답변 생성
-            reply = self.generate_reply(review)
-            if not reply:
-                return False
-            
-            # 키워드 추출
-            keywords = self.extract_keywords(review.review_text)
-            
-            # 감성 분석
-            sentiment = self.analyze_sentiment(review.review_text)
-            
-            # DB 업데이트
-            review.generated_reply = reply
-            review.keywords = keywords
-            review.sentiment = sentiment
-            db.commit()
-            
-            # 성공 로그
-            log = SystemLog(
+            analysis, mode = self.generate_analysis(review, fresh=fresh)
+        except Exception as e:
+            print(f"❌ 리뷰 처리 실패 (ID: {review.id}): {e}")
+            return None, failure_mode(e), f"{type(e).__name__}: {e}"
+        
+        if analysis is None:
+            return None, mode, "LLM 응답에서 답변을 만들지 못함"
+        return analysis, mode, None
+    
+    def _analyze_for_write(self, review, fresh: bool = False) -> Optional[Result]:
+        """이미 불러온 리뷰 하나 분석 → ResultWriter에 넘길 결과 (이미 답변이 있으면 None, fresh면 새로 생성)"""
+        if review.generated_reply and not fresh:
+            print(f"⏭️  이미 답변이 생성된 리뷰: ID {review.id}")
+            return None
+        
+        self._print_review_start(review)
+        analysis, mode, error = self._analyze_safely(review, fresh=fresh)
+        if analysis:
+            print(f"✅ 분석 완료 (리뷰 ID: {review.id}, {mode}): {analysis.reply[:50]}...")
+        return review, analysis, mode, error
+    
+    def process_review(self, db: Session, review_id: int, fresh: bool = False) -> bool:
+        """리뷰를 처리하여 답변 생성 및 DB 업데이트 (fresh면 캐시/유사 리뷰 재사용 없이 새로 생성)
+        
+        답변 / 지문 / 로그는 한 번의 커밋으로 저장한다.
+        fresh면 기존 답변이 있어도 다시 생성하고, 새 답변을 저장할 때까지 기존 답변을 유지한다.
+        """
+        review = db.query(Review).filter(Review.id == review_id).first()
+        if not review:
+            print(f"❌ 리뷰를 찾을 수 없음: ID {review_id}")
+            return False
+        
+        result = self._analyze_for_write(review, fresh=fresh)
+        if result is None:
+            return False
+        return write_results(db, [result], replace=fresh) > 0
+    
+    def _template_reply(self, reply: str, previous_name: str, customer_name: str) -> str:
+        """이전 답변의 고객명만 새 고객명으로 바꾼 답변"""
+        if previous_name and customer_name:
+            return reply.replace(previous_name, customer_name)
+        return reply
+    
+    def paraphrase_reply(self, reply: str, previous_name: str, customer_name: str) -> str:
+        """이전 답변을 새 고객에게 맞게 짧게 재작성 (실패하면 템플릿)"""
+        templated = self._template_reply(reply, previous_name, customer_name)
+        if self.near_dupe_reply_mode != "paraphrase":
+            return templated
+        
+        try:
+            prompt = f"""다음은 비슷한 리뷰에 달았던 사장님 답변입니다.
+의미와 길이는 유지하되 표현만 자연스럽게 바꿔서 {customer_name}님에게 보내는 답변으로 다시 써주세요.
+답변만 출력하세요.
+
+이전 답변: {templated}
+
+새 답변:"""
+            return self._generate(prompt) or templated
+        except Exception as e:
+            print(f"⚠️  답변 재작성 실패, 템플릿 사용: {e}")
+            return templated
+    
+    def reuse_near_duplicate(self, review) -> Optional[ReviewAnalysis]:
+        """답변이 끝난 리뷰 중 거의 같은 것이 있으면 키워드/감성은 그대로, 답변은 재작성해서 반환"""
+        index = get_near_dupe_index()
+        if index is None:
+            return None
+        
+        match = index.find(simhash(review.review_text))
+        if match is None:
+            return None
+        
+        print(f"♻️  유사 리뷰 재사용: ID {review.id} ≈ ID {match['review_id']} (거리 {match['distance']})")
+        reply = self.paraphrase_reply(match["reply"], match["customer_name"], review.customer_name)
+        return ReviewAnalysis(reply=reply, keywords=match["keywords"], sentiment=match["sentiment"])
+    
+    def generate_analysis(self, review, fresh: bool = False) -> Tuple[Optional[ReviewAnalysis], str]:
+        """리뷰 하나의 답변/키워드/감성 생성 후 (결과, 처리 방식) 반환
+        
+        DB를 건드리지 않으므로 id/customer_name/review_text만 있는 객체로도 호출할 수 있다.
+        """
+        # 같은 텍스트(+고객명)의 이전 결과가 있으면 LLM 호출 없이 재사용
+        cache_key = self._cache_key("analysis", review.review_text, review.customer_name)
+        cached = None if fresh else self.cache.get(cache_key)
+        if cached is not None:
+            return self._with_local_models(ReviewAnalysis.model_validate(cached), review.review_text,
+                                           count=False), "cache"
+        
+        # 거의 같은 리뷰에 이미 답변했다면 전체 분석 없이 재사용
+        analysis = None if fresh else self.reuse_near_duplicate(review)
+        if analysis:
+            return analysis, "near_duplicate"
+        
+        start_time = time.time()
+        
+        # 통합 모드: 한 번의 호출로 답변/키워드/감성 (실패 시 개별 호출로 폴백)
+        analysis = self.analyze_review(review) if self.combined_mode else None
+        if analysis:
+            self._cache_set(cache_key, "analysis", analysis.model_dump(), start_time)
+            return self._with_local_models(analysis, review.review_text), "combined"
+        
+        # 답변 생성
+        reply = self.generate_reply(review)
+        if not reply:
+            return None, "single"
+        
+        # 키워드 추출
+        keywords = self.extract_keywords(review.review_text)
+        
+        # 감성 분석
+        sentiment = self.analyze_sentiment(review.review_text)
+        
+        analysis = ReviewAnalysis(reply=reply, keywords=keywords, sentiment=sentiment)
+        self._cache_set(cache_key, "analysis", analysis.model_dump(), start_time)
+        return analysis, "single"
+    
+    def stream_reply(self, review) -> Iterator[str]:
+        """답변을 생성되는 대로 조각 단위로 반환 (재생성용이라 캐시는 보지 않음)"""
+        print(f"🤖 LLM 답변 스트리밍 중... (리뷰 ID: {review.id})")
+        yield from self.backend.generate_stream(self._reply_prompt(review))
+    
+    def save_streamed_reply(self, db: Session, review: Review, reply: str) -> Tuple[list, str]:
+        """스트리밍이 끝난 답변 저장 (키워드/감성은 로컬 우선으로 채움)"""
+        keywords = self.extract_keywords(review.review_text)
+        sentiment = self.analyze_sentiment(review.review_text)
+        self._save_result(db, review, reply, keywords, sentiment, mode="stream")
+        return keywords, sentiment
+    
+    def _save_result(self, db: Session, review: Review, reply: str, keywords: list,
+                     sentiment: str, mode: str) -> bool:
+        """생성 결과를 리뷰에 반영하고 성공 로그 기록 (커밋 1회)"""
+        analysis = SimpleNamespace(reply=reply, keywords=keywords, sentiment=sentiment)
+        if not write_results(db, [(review, analysis, mode, None)], replace=True):
+            raise RuntimeError(f"답변 저장 실패: 리뷰 ID {review.id}")
+        
+        print(f"\n✅ 처리 완료! (리뷰 ID: {review.id})")
+        print(f"   답변: {reply}")
+        print(f"   키워드: {keywords}")
+        print(f"   감성: {sentiment}\n")
+        return True
+    
+    def _process_batches(self, db: Session, pending_reviews: List[Review], worker_id: str = None) -> int:
+        """배치 모드: 묶음마다 한 번 호출, 응답에서 빠진 리뷰는 개별 재시도 (저장은 N개씩 묶어서)"""
+        with ResultWriter(db, worker_id=worker_id) as writer:
+            for batch in self._pack_batches(pending_reviews):
+                try:
+                    results = self.analyze_review_batch(batch)
+                except Exception as e:
+                    # 배치 호출 자체가 실패하면 리뷰마다 다시 부르지 않고 묶음 전체를 실패로 기록
+                    for review in batch:
+                        writer.add(review, None, failure_mode(e), f"{type(e).__name__}: {e}")
+                    continue
+                
+                for review in batch:
+                    analysis = results.get(review.id)
+                    if analysis is None:
+                        print(f"🔁 배치 응답에 없는 리뷰 개별 재시도: ID {review.id}")
+                        result = self._analyze_for_write(review)
+                        if result is not None:
+                            writer.add(*result)
+                        continue
+                    writer.add(review, analysis, "batch")
+        
+        return writer.saved_count
+    
+    def _log_near_dupe_stats(self, db: Session, before: Optional[dict], processed: int):
+        """이번 실행의 유사 리뷰 재사용률을 SystemLog에 기록"""
+        index = get_near_dupe_index()
+        if index is None or before is None or not processed:
+            return
+        
+        after = index.get_stats()
+        lookups = after["lookups"] - before["lookups"]
+        hits = after["hits"] - before["hits"]
+        try:
+            db.add(SystemLog(
                 log_type="llm",
-                message=f"답변 생성 완료: 리뷰 ID {review.id}",
+                message=f"유사 리뷰 재사용: {hits}/{lookups}개",
                 details={
-                    "review_id": review.id,
-                    "keywords": keywords,
-                    "sentiment": sentiment,
-                    "reply_length": len(reply)
+                    "lookups": lookups,
+                    "hits": hits,
+                    "hit_rate": round(hits / lookups, 4) if lookups else 0.0,
+                    "index_entries": after["entries"],
+                    "max_distance": after["max_distance"]
                 }
-            )
-            db.add(log)
+            ))
             db.commit()
-            
-            print(f"\n✅ 처리 완료!")
-            print(f"   답변: {reply}")
-            print(f"   키워드: {keywords}")
-            print(f"   감성: {sentiment}\n")
-            
-            return True
-            
         except Exception as e:
             db.rollback()
-            print(f"❌ 리뷰 처리 실패: {e}")
-            
-            # 에러 로그
-            log = SystemLog(
-                log_type="error",
-                message=f"리뷰 처리 실패: ID {review_id}",
-                details={"error": str(e)}
-            )
-            db.add(log)
-            db.commit()
-            
-            return False
+            print(f"⚠️  유사 리뷰 통계 기록 실패: {e}")
     
-    def process_all_pending_reviews(self, db: Session, max_count: int = 10):
-        """답변이 없는 모든 리뷰 처리"""
-        pending_reviews = db.query(Review).filter(
-            Review.generated_reply.is_(None)
-        ).limit(max_count).all()
-        
+    def process_reviews(self, db: Session, pending_reviews: List[Review], worker_id: str = None) -> int:
+        """이미 가져온 리뷰 목록 처리 (성공 수 반환, worker_id는 작업 큐에서 리스를 잡은 작업자)"""
         print(f"\n🚀 {len(pending_reviews)}개의 대기 중인 리뷰 처리 시작...\n")
         
-        success_count = 0
-        for review in pending_reviews:
-            if self.process_review(db, review.id):
-                success_count += 1
-            time.sleep(1)  # API rate limit 고려
+        index = get_near_dupe_index()
+        near_dupe_before = index.get_stats() if index is not None else None
         
+        if self.concurrency > 1:
+            # 비동기 파이프라인: 여러 요청을 동시에 보내고 DB 쓰기는 묶어서
+            success_count = asyncio.run(AsyncReviewPipeline(self).run(db, pending_reviews, worker_id))
+        elif self.batch_size > 1:
+            success_count = self._process_batches(db, pending_reviews, worker_id)
+        else:
+            # 이미 불러온 리뷰를 그대로 쓰고, 결과는 LLM_WRITE_BATCH_SIZE개마다 한 번에 커밋
+            with ResultWriter(db, worker_id=worker_id) as writer:
+                for review in pending_reviews:
+                    # API rate limit은 _generate의 토큰 버킷이 관리
+                    result = self._analyze_for_write(review)
+                    if result is not None:
+                        writer.add(*result)
+            success_count = writer.saved_count
+        
+        self._log_near_dupe_stats(db, near_dupe_before, len(pending_reviews))
         print(f"\n📊 처리 완료: {success_count}/{len(pending_reviews)}개 성공")
         return success_count
     
-    def generate_customer_story(self, customer_data: dict) -> str:
-        """고객 데이터를 바탕으로 AI가 스토리 생성"""
-        try:
-            name = customer_data.get('name', '고객')
-            total_reviews = customer_data.get('totalReviews', 0)
-            positive_reviews = customer_data.get('positiveReviews', 0)
-            loyalty_score = customer_data.get('loyaltyScore', 0)
-            top_keywords = customer_data.get('topKeywords', [])
-            first_review_date = customer_data.get('firstReviewDate', '')
-            last_review_date = customer_data.get('lastReviewDate', '')
-            review_samples = customer_data.get('reviewSamples', [])
-            
-            keywords_str = ', '.join([k.get('keyword', '') for k in top_keywords[:5]])
-            
-            prompt = f"""당신은 카페/레스토랑의 고객 관계 관리 전문가입니다.
+    def process_all_pending_reviews(self, db: Session, max_count: int = 10, worker_id: str = None):
+        """답변이 없는 모든 리뷰 처리
+        
+        작업 큐를 쓰면 reply_jobs에서 리스를 잡은 리뷰만 처리하므로
+        여러 레플리카/작업자나 겹친 요청이 같은 리뷰에 LLM을 중복 호출하지 않는다.
+        """
+        if not self.job_queue_enabled:
+            # 부정적인 리뷰 / 최근 리뷰 / 주요 고객부터 (priority 인덱스로 상위 max_count개)
+            # 데드 레터 / 백오프 중인 리뷰는 건너뛰어 매번 같은 실패 리뷰에 한도를 쓰지 않음
+            assign_missing_priorities(db)
+            pending_reviews = db.query(Review).filter(
+                Review.generated_reply.is_(None),
+                ~blocked_review_filter()
+            ).order_by(Review.priority.desc(), Review.id).limit(max_count).all()
+            return self.process_reviews(db, pending_reviews)
+        
+        claimed, success_count = run_claimed_batch(db, self, worker_id or make_worker_id(), max_count)
+        if not claimed:
+            print("\n📭 가져갈 대기 작업이 없습니다 (다른 작업자가 처리 중이거나 모두 완료)")
+        return success_count
+    
+    def _customer_story_prompt(self, customer_data: dict) -> str:
+        name = customer_data.get('name', '고객')
+        total_reviews = customer_data.get('totalReviews', 0)
+        positive_reviews = customer_data.get('positiveReviews', 0)
+        loyalty_score = customer_data.get('loyaltyScore', 0)
+        top_keywords = customer_data.get('topKeywords', [])
+        first_review_date = customer_data.get('firstReviewDate', '')
+        last_review_date = customer_data.get('lastReviewDate', '')
+        review_samples = customer_data.get('reviewSamples', [])
+
+        keywords_str = ', '.join([k.get('keyword', '') for k in top_keywords[:5]])
+
+        prompt = f"""당신은 카페/레스토랑의 고객 관계 관리 전문가입니다.
 다음 고객 데이터를 바탕으로 자연스럽고 감성적인 고객 스토리를 작성해주세요.
 
 고객 정보:
@@ -235,15 +682,31 @@ class LLMService:
 6. 과도한 수식어는 피하고 진정성 있게 작성하세요
 
 고객 스토리:"""
+        return prompt
+    
+    def stream_customer_story(self, customer_data: dict) -> Iterator[str]:
+        """고객 스토리를 생성되는 대로 조각 단위로 반환"""
+        print(f"📖 고객 스토리 스트리밍 중: {customer_data.get('name', '고객')}님")
+        yield from self.backend.generate_stream(self._customer_story_prompt(customer_data))
+    
+    def write_customer_story(self, customer_data: dict) -> str:
+        """고객 데이터를 바탕으로 AI가 스토리 생성 (실패하면 예외 - 저장소는 다음 갱신 때 다시 시도)"""
+        name = customer_data.get('name', '고객')
+        prompt = self._customer_story_prompt(customer_data)
 
-            print(f"📖 고객 스토리 생성 중: {name}님")
-            
-            response = self.model.generate_content(prompt)
-            story = response.text.strip()
-            
-            print(f"✓ 스토리 생성 완료: {story[:50]}...")
-            return story
-            
+        print(f"📖 고객 스토리 생성 중: {name}님")
+        
+        story = self._generate(prompt)
+        if not story:
+            raise ValueError("LLM이 빈 스토리를 반환했습니다")
+        
+        print(f"✓ 스토리 생성 완료: {story[:50]}...")
+        return story
+    
+    def generate_customer_story(self, customer_data: dict) -> str:
+        """고객 데이터를 바탕으로 AI가 스토리 생성 (실패하면 기본 스토리)"""
+        try:
+            return self.write_customer_story(customer_data)
         except Exception as e:
             print(f"❌ 고객 스토리 생성 실패: {e}")
             # 실패 시 기본 스토리 반환
@@ -0,0 +1,117 @@
+# llm_stub_server.py - OpenAI 호환 /v1/chat/completions 스텁 서버 (부하 테스트용)
+#
+# 실행: python -m app.llm_stub_server --port 8001
+# 백엔드 설정: LLM_BACKEND=openai, LLM_BASE_URL=http://localhost:8001/v1
+# 지연/오류/429 동작은 StubBackend와 같은 LLM_STUB_* 환경변수로 조절한다.
+import argparse
+import json
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from app.llm_backends import StubBackend, stub_reply, split_stream_chunks
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    backend: StubBackend = None
+
+    def _send_json(self, status: int, body: dict, headers: dict = None):
+        payload = json.dumps(body, ensure_ascii=False).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json; charset=utf-8')
+        self.send_header('Content-Length', str(len(payload)))
+        for key, value in (headers or {}).items():
+            self.send_header(key, value)
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def do_GET(self):
+        if self.path == '/health':
+            self._send_json(200, {"status": "ok"})
+        else:
+            self._send_json(404, {"error": "not found"})
+
+    def do_POST(self):
+        if not self.path.endswith('/chat/completions'):
+            self._send_json(404, {"error": "not found"})
+            return
+
+        length = int(self.headers.get('Content-Length', 0))
+        request = json.loads(self.rfile.read(length) or b'{}')
+        prompt = "\n".join(m.get("content", "") for m in request.get("messages", []))
+
+        latency, outcome = self.backend.draw()
+        if outcome == "rate_limited":
+            self._send_json(429, {"error": {"message": "rate limited"}}, {"Retry-After": "1"})
+            return
+
+        if request.get("stream"):
+            self._send_stream(request, prompt, latency, outcome)
+            return
+
+        time.sleep(latency)
+        if outcome == "error":
+            self._send_json(500, {"error": {"message": "stub error"}})
+            return
+
+        self._send_json(200, {
+            "id": f"stub-{int(time.time() * 1000)}",
+            "object": "chat.completion",
+            "model": request.get("model", "stub"),
+            "choices": [{
+                "index": 0,
+                "message": {"role": "assistant", "content": stub_reply(prompt)},
+                "finish_reason": "stop"
+            }]
+        })
+
+    def _send_stream(self, request: dict, prompt: str, latency: float, outcome: str):
+        """stream=true 요청: OpenAI 형식 SSE 조각 (첫 조각까지 지연의 절반)"""
+        time.sleep(latency / 2)
+        if outcome == "error":
+            self._send_json(500, {"error": {"message": "stub error"}})
+            return
+
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/event-stream; charset=utf-8')
+        self.send_header('Cache-Control', 'no-cache')
+        self.end_headers()
+
+        pieces = split_stream_chunks(stub_reply(prompt))
+        for i, piece in enumerate(pieces):
+            if i:
+                time.sleep(latency / 2 / len(pieces))
+            chunk = {
+                "object": "chat.completion.chunk",
+                "model": request.get("model", "stub"),
+                "choices": [{"index": 0, "delta": {"content": piece}, "finish_reason": None}]
+            }
+            self.wfile.write(f"data: {json.dumps(chunk, ensure_ascii=False)}\n\n".encode('utf-8'))
+            self.wfile.flush()
+        self.wfile.write(b"data: [DONE]\n\n")
+        self.wfile.flush()
+
+    def log_message(self, format, *args):
+        # 부하 테스트 중 요청마다 찍히는 접근 로그는 생략
+        pass
+
+
+def run(host: str = "0.0.0.0", port: int = 8001):
+    StubHandler.backend = StubBackend()
+    server = ThreadingHTTPServer((host, port), StubHandler)
+    backend = StubHandler.backend
+    print(f"🧪 LLM 스텁 서버 시작: http://{host}:{port}/v1 "
+          f"(지연 중앙값 {backend.latency_ms}ms, 오류율 {backend.error_rate}, 429 비율 {backend.rate_limit_rate})")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="OpenAI 호환 LLM 스텁 서버")
+    parser.add_argument("--host", default="0.0.0.0")
+    parser.add_argument("--port", type=int, default=8001)
+    args = parser.parse_args()
+    run(args.host, args.port)
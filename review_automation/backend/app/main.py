@@ -1,16 +1,133 @@
-from fastapi import FastAPI, Depends, HTTPException
+from fastapi import FastAPI, Depends, HTTPException, BackgroundTasks
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
 from sqlalchemy import func, desc
-from app.database import get_db
+from app.database import get_db, SessionLocal
 from app.models import Review, SystemLog
-from app.scraper import ReviewScraper
-from app.llm_service import LLMService
-from typing import List, Dict
+from typing import List, Dict, Callable
 from datetime import datetime, timedelta
 from pydantic import BaseModel
+import os
+import asyncio
+import json
+import threading
+import time
+from types import SimpleNamespace
+from contextlib import asynccontextmanager
+from sqlalchemy import text
+
+# 전역 서비스 인스턴스 (import 시점이 아니라 처음 쓰일 때 생성)
+# LLM 클라이언트 설정 / 스케줄러 소스 파싱이 서버가 요청을 받기 전에 일어나지 않도록 한다.
+# 스크래퍼(requests/httpx) / 스케줄러 / 고객 스토리 / LLM / 작업 큐 모듈도 여기나 쓰는 엔드포인트 안에서 불러와서
+# /health는 이 모듈들을 불러오지 않고 응답한다.
+_services: Dict[str, object] = {}
+_services_lock = threading.Lock()
+
+
+def _get_service(name: str, factory: Callable[[], object]):
+    service = _services.get(name)
+    if service is None:
+        with _services_lock:
+            service = _services.get(name)
+            if service is None:
+                service = _services[name] = factory()
+    return service
+
+
+def get_scraper():
+    def create():
+        from app.scraper import ReviewScraper
+        return ReviewScraper()
+    return _get_service("scraper", create)
+
+
+def get_llm_service():
+    def create():
+        # LLM 백엔드(Gemini 등) 모듈도 여기서 처음 불러온다
+        from app.llm_service import LLMService
+        return LLMService()
+    return _get_service("llm_service", create)
+
+
+def get_scheduler():
+    def create():
+        from app.scheduler import ScrapeScheduler
+        return ScrapeScheduler()
+    return _get_service("scheduler", create)
+
+
+def get_story_store():
+    def create():
+        from app.customer_stories import CustomerStoryStore
+        return CustomerStoryStore(get_llm_service())
+    return _get_service("story_store", create)
+
+
+# 시작 시 준비 작업 상태 (/ready에서 확인)
+readiness = {
+    "started_at": None,
+    "warmup_done": False,
+    "warmup_seconds": None,
+    "tasks": {},
+}
+
+
+def _run_warmup(name: str, warm: Callable[[Session], object], failure_note: str):
+    db = SessionLocal()
+    start_time = time.time()
+    try:
+        warm(db)
+        readiness["tasks"][name] = "ok"
+    except Exception as e:
+        readiness["tasks"][name] = f"failed: {e}"
+        print(f"⚠️  {failure_note}: {e}")
+    finally:
+        db.close()
+        print(f"  - {name}: {round(time.time() - start_time, 2)}초")
+
+
+def _warm_in_memory_indexes():
+    """인메모리 인덱스 준비 (비어 있어도 동작은 하므로 서버 시작을 막지 않고 뒤에서 실행)"""
+    from app.dedupe import warm_dedupe_index
+    from app.keywords import warm_keyword_corpus
+    from app.near_dupe import warm_near_dupe_index
+    
+    start_time = time.time()
+    # 인덱스가 비어 있어도 DB 유니크 제약으로 중복은 걸러지므로 시작은 계속
+    _run_warmup("dedupe_index", warm_dedupe_index, "중복 체크 인덱스 준비 실패")
+    # 문서 빈도가 비어 있으면 TF 위주로 추출되다가 수집이 진행되며 채워진다
+    _run_warmup("keyword_corpus", warm_keyword_corpus, "키워드 코퍼스 준비 실패")
+    # 인덱스가 비어 있으면 모든 리뷰가 기존처럼 LLM으로 처리된다
+    _run_warmup("near_dupe_index", warm_near_dupe_index, "유사 리뷰 인덱스 준비 실패")
+    readiness["warmup_seconds"] = round(time.time() - start_time, 2)
+    readiness["warmup_done"] = True
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """인메모리 인덱스(중복 체크 / 키워드 코퍼스 / 유사 리뷰)는 백그라운드에서 준비하고 바로 요청을 받기 시작
+    
+    준비 상태는 /ready에서 확인할 수 있다. 적응형 스크래핑 스케줄러는 인덱스 준비가 끝난 뒤 시작한다.
+    """
+    readiness["started_at"] = datetime.now().isoformat()
+    
+    async def warm_then_schedule():
+        await asyncio.to_thread(_warm_in_memory_indexes)
+        if os.getenv("SCRAPE_SCHEDULER_ENABLED", "true").lower() == "true":
+            get_scheduler().start()
+    
+    app.state.warmup_task = asyncio.create_task(warm_then_schedule())
+    try:
+        yield
+    finally:
+        # 준비가 끝나기 전에 종료되면 스케줄러를 시작하지 않도록
+        app.state.warmup_task.cancel()
+        if "scheduler" in _services:
+            await get_scheduler().stop()
+
 
-app = FastAPI(title="AI 리뷰 답변 시스템")
+app = FastAPI(title="AI 리뷰 답변 시스템", lifespan=lifespan)
 
 # CORS 설정 (프론트엔드에서 API 호출 가능하도록)
 app.add_middleware(
@@ -21,10 +138,6 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# 전역 서비스 인스턴스
-scraper = ReviewScraper()
-llm_service = LLMService()
-
 
 # === Pydantic 모델 (응답 스키마) ===
 class ReviewResponse(BaseModel):
@@ -41,6 +154,10 @@ class ReviewResponse(BaseModel):
         from_attributes = True
 
 
+class DeadLetterRetryRequest(BaseModel):
+    review_ids: List[int] | None = None
+
+
 class StatsResponse(BaseModel):
     total_reviews: int
     replied_reviews: int
@@ -61,11 +178,52 @@ def read_root():
             "reviews": "/reviews/recent",
             "stats": "/stats",
             "scrape": "/scrape",
-            "generate": "/generate-replies"
+            "scrape_all": "/scrape-all",
+            "generate": "/generate-replies",
+            "customer_stories": "/customer-stories",
+            "health": "/health",
+            "ready": "/ready"
         }
     }
 
 
+@app.get("/health")
+def health_check():
+    """프로세스 생존 확인 (DB/LLM을 건드리지 않으므로 시작 직후부터 200)"""
+    return {"status": "ok"}
+
+
+@app.get("/ready")
+def readiness_check():
+    """요청을 처리할 준비 상태 (DB 연결 + 인메모리 인덱스 준비 여부)
+    
+    DB에 연결할 수 없으면 503. 인덱스 준비 중에도 요청은 처리되므로 warming으로만 표시한다.
+    """
+    db_ok = True
+    db_error = None
+    db = SessionLocal()
+    try:
+        db.execute(text("SELECT 1"))
+    except Exception as e:
+        db_ok = False
+        db_error = str(e)
+    finally:
+        db.close()
+    
+    body = {
+        "status": ("ready" if readiness["warmup_done"] else "warming") if db_ok else "unavailable",
+        "database": "ok" if db_ok else f"failed: {db_error}",
+        "started_at": readiness["started_at"],
+        "warmup_done": readiness["warmup_done"],
+        "warmup_seconds": readiness["warmup_seconds"],
+        "warmup_tasks": readiness["tasks"],
+        "services_created": sorted(_services.keys()),
+    }
+    if not db_ok:
+        raise HTTPException(status_code=503, detail=body)
+    return body
+
+
 @app.get("/reviews/recent", response_model=List[ReviewResponse])
 def get_recent_reviews(
     limit: int = 20,
@@ -107,9 +265,10 @@ def get_review(review_id: int, db: Session = Depends(get_db)):
 @app.get("/stats", response_model=StatsResponse)
 def get_statistics(db: Session = Depends(get_db)):
     """통계 데이터"""
+    # 대기 수는 부분 인덱스(ix_reviews_pending_*)로 세고 답변 수는 전체에서 뺀다
     total = db.query(Review).count()
-    replied = db.query(Review).filter(Review.generated_reply.isnot(None)).count()
-    pending = total - replied
+    pending = db.query(Review).filter(Review.generated_reply.is_(None)).count()
+    replied = total - pending
     
     positive = db.query(Review).filter(Review.sentiment == '긍정').count()
     negative = db.query(Review).filter(Review.sentiment == '부정').count()
@@ -125,6 +284,18 @@ def get_statistics(db: Session = Depends(get_db)):
     )
 
 
+@app.get("/stats/llm-cache")
+def get_llm_cache_stats():
+    """LLM 결과 캐시 히트율 / 절약한 지연 시간"""
+    return get_llm_service().cache.get_stats()
+
+
+@app.get("/stats/llm")
+def get_llm_stats():
+    """LLM 캐시 + 로컬 감성 분류로 LLM 호출을 건너뛴 비율"""
+    return get_llm_service().get_stats()
+
+
 @app.get("/stats/sentiment-trend")
 def get_sentiment_trend(days: int = 7, db: Session = Depends(get_db)):
     """최근 N일간 감성 추이"""
@@ -156,13 +327,41 @@ def get_sentiment_trend(days: int = 7, db: Session = Depends(get_db)):
 @app.post("/scrape")
 def trigger_scraping(db: Session = Depends(get_db)):
     """스크래핑 작업 실행"""
+    from app.scraper import ScrapeInProgressError
+    
     try:
-        saved_count = scraper.run_scraping_job(db)
+        saved_count = get_scraper().run_scraping_job(db)
         return {
             "success": True,
             "message": f"{saved_count}개의 새로운 리뷰를 저장했습니다",
             "saved_count": saved_count
         }
+    except ScrapeInProgressError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"스크래핑 실패: {str(e)}")
+
+
+@app.get("/scheduler/status")
+def get_scheduler_status():
+    """스크래핑 스케줄러 상태 (소스별 폴링 간격, 마지막 실행 결과)"""
+    return get_scheduler().status()
+
+
+@app.post("/scrape-all")
+def trigger_multi_source_scraping(db: Session = Depends(get_db)):
+    """설정된 모든 소스(SCRAPE_SOURCES)를 동시에 스크래핑"""
+    from app.async_scraper import AsyncMultiSourceScraper
+    
+    try:
+        summaries = AsyncMultiSourceScraper().run_scraping_job(db)
+        saved_count = sum(s["saved_count"] for s in summaries)
+        return {
+            "success": True,
+            "message": f"{len(summaries)}개 소스에서 {saved_count}개의 새로운 리뷰를 저장했습니다",
+            "saved_count": saved_count,
+            "sources": summaries
+        }
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"스크래핑 실패: {str(e)}")
 
@@ -174,7 +373,7 @@ def trigger_reply_generation(
 ):
     """LLM 답변 생성 작업 실행"""
     try:
-        success_count = llm_service.process_all_pending_reviews(db, max_count)
+        success_count = get_llm_service().process_all_pending_reviews(db, max_count)
         return {
             "success": True,
             "message": f"{success_count}개의 답변을 생성했습니다",
@@ -184,6 +383,38 @@ def trigger_reply_generation(
         raise HTTPException(status_code=500, detail=f"답변 생성 실패: {str(e)}")
 
 
+@app.get("/jobs/stats")
+def get_reply_job_stats(db: Session = Depends(get_db)):
+    """답변 생성 작업 큐 상태 (상태별 작업 수, 리스를 잡은 작업자 수, 만료된 리스)"""
+    from app.reply_jobs import get_job_stats
+    return get_job_stats(db)
+
+
+@app.get("/dead-letter")
+def get_dead_letters(limit: int = 50, offset: int = 0, db: Session = Depends(get_db)):
+    """재시도 한도를 넘겨 더 이상 자동 처리하지 않는 리뷰 (마지막 오류 포함)"""
+    from app.reply_jobs import get_job_stats, list_dead_letters
+    stats = get_job_stats(db)
+    return {
+        "total": stats["dead"],
+        "max_attempts": stats["max_attempts"],
+        "items": list_dead_letters(db, limit=limit, offset=offset)
+    }
+
+
+@app.post("/dead-letter/retry")
+def retry_dead_letter_reviews(request: DeadLetterRetryRequest = None, db: Session = Depends(get_db)):
+    """데드 레터 리뷰를 다시 대기열로 (review_ids가 없으면 전부)"""
+    from app.reply_jobs import retry_dead_letters
+    review_ids = request.review_ids if request else None
+    retried = retry_dead_letters(db, review_ids)
+    return {
+        "success": True,
+        "message": f"{retried}개 리뷰를 다시 대기열에 넣었습니다",
+        "retried_count": retried
+    }
+
+
 @app.post("/reviews/{review_id}/regenerate-reply")
 def regenerate_reply(review_id: int, db: Session = Depends(get_db)):
     """특정 리뷰의 답변 재생성"""
@@ -192,12 +423,9 @@ def regenerate_reply(review_id: int, db: Session = Depends(get_db)):
     if not review:
         raise HTTPException(status_code=404, detail="리뷰를 찾을 수 없습니다")
     
-    # 기존 답변 초기화
-    review.generated_reply = None
-    db.commit()
-    
-    # 답변 재생성
-    success = llm_service.process_review(db, review_id)
+    # 답변 재생성 (캐시/유사 리뷰 결과를 재사용하지 않고 새로 생성)
+    # 기존 답변은 새 답변을 저장할 때 덮어쓰므로 생성이 실패해도 그대로 남는다
+    success = get_llm_service().process_review(db, review_id, fresh=True)
     
     if success:
         return {"success": True, "message": "답변이 재생성되었습니다"}
@@ -205,6 +433,60 @@ def regenerate_reply(review_id: int, db: Session = Depends(get_db)):
         raise HTTPException(status_code=500, detail="답변 재생성 실패")
 
 
+def _sse(event: str, data: dict) -> str:
+    """Server-Sent Events 한 건"""
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+
+def _sse_response(events) -> StreamingResponse:
+    # 프록시(nginx 등)가 버퍼링하지 않도록
+    return StreamingResponse(events, media_type="text/event-stream", headers={
+        "Cache-Control": "no-cache",
+        "X-Accel-Buffering": "no"
+    })
+
+
+@app.post("/reviews/{review_id}/regenerate-reply/stream")
+def regenerate_reply_stream(review_id: int, db: Session = Depends(get_db)):
+    """답변 재생성 (SSE 스트리밍)
+    
+    token 이벤트로 생성 중인 조각을, 끝나면 저장 후 done 이벤트로 전체 답변/키워드/감성을 보낸다.
+    """
+    review = db.query(Review).filter(Review.id == review_id).first()
+    
+    if not review:
+        raise HTTPException(status_code=404, detail="리뷰를 찾을 수 없습니다")
+    
+    snapshot = SimpleNamespace(id=review.id, customer_name=review.customer_name, review_text=review.review_text)
+    
+    def events():
+        pieces = []
+        try:
+            for piece in get_llm_service().stream_reply(snapshot):
+                pieces.append(piece)
+                yield _sse("token", {"text": piece})
+        except Exception as e:
+            print(f"❌ 답변 스트리밍 실패: {e}")
+            yield _sse("error", {"detail": f"답변 재생성 실패: {e}"})
+            return
+        
+        reply = "".join(pieces).strip()
+        session = SessionLocal()
+        try:
+            target = session.query(Review).filter(Review.id == review_id).first()
+            keywords, sentiment = get_llm_service().save_streamed_reply(session, target, reply)
+        except Exception as e:
+            session.rollback()
+            yield _sse("error", {"detail": f"답변 저장 실패: {e}"})
+            return
+        finally:
+            session.close()
+        
+        yield _sse("done", {"review_id": review_id, "reply": reply, "keywords": keywords, "sentiment": sentiment})
+    
+    return _sse_response(events())
+
+
 @app.get("/logs/recent")
 def get_recent_logs(limit: int = 50, db: Session = Depends(get_db)):
     """최근 시스템 로그"""
@@ -240,6 +522,7 @@ def post_replies_to_dummy_site(
                 Review.generated_reply.isnot(None),
                 Review.reply_posted == False
             )\
+            .order_by(Review.id)\
             .limit(max_count)\
             .all()
         
@@ -284,6 +567,29 @@ def post_replies_to_dummy_site(
         raise HTTPException(status_code=500, detail=f"답변 게시 실패: {str(e)}")
 
 
+@app.get("/customer-stories")
+def get_customer_stories(background_tasks: BackgroundTasks, db: Session = Depends(get_db)):
+    """저장된 고객 스토리 조회 (LLM 호출 없이 DB 한 번 읽기)
+    
+    리뷰가 바뀐 고객이 있는지는 응답 후 백그라운드에서 확인하고, 바뀐 고객만 다시 생성한다.
+    """
+    story_store = get_story_store()
+    stories = story_store.list_stories(db)
+    if story_store.refresh_due():
+        background_tasks.add_task(story_store.refresh_in_background)
+    return {
+        "stories": stories,
+        "last_refresh": story_store.last_result
+    }
+
+
+@app.post("/customer-stories/refresh")
+def refresh_customer_stories(background_tasks: BackgroundTasks):
+    """고객 스토리 변경 확인 즉시 요청 (백그라운드 실행)"""
+    background_tasks.add_task(get_story_store().refresh_in_background)
+    return {"success": True, "message": "고객 스토리 갱신을 시작했습니다."}
+
+
 @app.post("/generate-customer-story")
 def generate_customer_story(
     customer_data: dict,
@@ -291,7 +597,7 @@ def generate_customer_story(
 ):
     """고객 스토리 생성 (Gemini AI 사용)"""
     try:
-        story = llm_service.generate_customer_story(customer_data)
+        story = get_llm_service().generate_customer_story(customer_data)
         return {
             "success": True,
             "story": story
@@ -300,6 +606,38 @@ def generate_customer_story(
         raise HTTPException(status_code=500, detail=f"스토리 생성 실패: {str(e)}")
 
 
+
+@app.post("/generate-customer-story/stream")
+def generate_customer_story_stream(customer_data: dict):
+    """고객 스토리 생성 (SSE 스트리밍, 완료 시 저장소에 있는 고객이면 스토리 반영)"""
+    
+    def events():
+        pieces = []
+        try:
+            for piece in get_llm_service().stream_customer_story(customer_data):
+                pieces.append(piece)
+                yield _sse("token", {"text": piece})
+        except Exception as e:
+            print(f"❌ 고객 스토리 스트리밍 실패: {e}")
+            yield _sse("error", {"detail": f"스토리 생성 실패: {e}"})
+            return
+        
+        story = "".join(pieces).strip()
+        session = SessionLocal()
+        try:
+            persisted = get_story_store().save_story(session, customer_data.get("name", ""), story)
+        except Exception as e:
+            session.rollback()
+            print(f"⚠️  고객 스토리 저장 실패: {e}")
+            persisted = False
+        finally:
+            session.close()
+        
+        yield _sse("done", {"story": story, "persisted": persisted})
+    
+    return _sse_response(events())
+
+
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run(app, host="0.0.0.0", port=8000)
\ No newline at end of file
@@ -0,0 +1,48 @@
+# migrate.py - alembic 마이그레이션 적용 (init_db.create_all로 만든 기존 DB도 이어서 관리)
+#
+# 실행: python -m app.migrate
+# alembic_version 테이블 없이 reviews 테이블만 있으면 create_all 시절의 DB로 보고
+# 빠진 테이블/컬럼을 채운 뒤 baseline(0001)으로 stamp하고 나서 upgrade head를 실행한다.
+import os
+import sys
+
+from alembic import command
+from alembic.config import Config
+from dotenv import load_dotenv
+from sqlalchemy import inspect
+
+from app.database import engine, Base
+from app.init_db import add_missing_columns
+from app import models  # noqa: F401 - 모든 테이블을 메타데이터에 등록
+
+load_dotenv()
+
+BASELINE_REVISION = "0001"
+ALEMBIC_INI = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "alembic.ini")
+
+
+def get_alembic_config() -> Config:
+    return Config(ALEMBIC_INI)
+
+
+def migrate():
+    config = get_alembic_config()
+    inspector = inspect(engine)
+
+    if not inspector.has_table("alembic_version") and inspector.has_table("reviews"):
+        print("🔖 create_all로 만든 기존 DB - baseline으로 stamp")
+        Base.metadata.create_all(bind=engine)
+        add_missing_columns()
+        command.stamp(config, BASELINE_REVISION)
+
+    print("🔧 마이그레이션 적용 중 (upgrade head)...")
+    command.upgrade(config, "head")
+    print("✓ 마이그레이션 완료!")
+
+
+if __name__ == "__main__":
+    try:
+        migrate()
+    except Exception as e:
+        print(f"❌ 마이그레이션 실패: {e}")
+        sys.exit(1)
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Text, DateTime, Boolean, JSON
+from sqlalchemy import Column, Integer, BigInteger, Float, String, Text, DateTime, Boolean, JSON, ForeignKey, Index, text
 from sqlalchemy.sql import func
 from app.database import Base
 import json
@@ -29,10 +29,31 @@ class Review(Base):
     # 감성 분석 (긍정/부정/중립)
     sentiment = Column(String(20), nullable=True)
     
+    # 답변 생성 우선순위 (부정도 + 고객 등급 + 작성 시각, app/priority.py) - 클수록 먼저
+    priority = Column(Float, nullable=True)
+    
     # 타임스탬프
     created_at = Column(DateTime, server_default=func.now())
     updated_at = Column(DateTime, server_default=func.now(), onupdate=func.now())
     
+    # 자주 쓰는 조회용 인덱스 (운영 DB에는 alembic 마이그레이션이 CONCURRENTLY로 생성)
+    # 대기/게시 대기 인덱스는 해당 행만 담는 부분 인덱스라 크기와 조회 비용이 테이블이 아니라 대기 건수에 비례
+    __table_args__ = (
+        # 최근 리뷰 / 감성 추이
+        Index("ix_reviews_review_date", review_date.desc()),
+        # 감성별 개수 / 기간별 감성 집계
+        Index("ix_reviews_sentiment_review_date", "sentiment", "review_date"),
+        # 답변 생성 대상 (우선순위 순) + 우선순위 미계산 대기 리뷰
+        Index("ix_reviews_pending_priority", priority.desc(), "id",
+              postgresql_where=text("generated_reply IS NULL")),
+        # 답변 대기 목록 (최신순)
+        Index("ix_reviews_pending_review_date", review_date.desc(),
+              postgresql_where=text("generated_reply IS NULL")),
+        # 게시 대기 (답변은 있고 아직 게시 안 됨)
+        Index("ix_reviews_unposted", "id",
+              postgresql_where=text("reply_posted = false AND generated_reply IS NOT NULL")),
+    )
+    
     def __repr__(self):
         return f"<Review(id={self.id}, customer={self.customer_name}, date={self.review_date})>"
 
@@ -48,4 +69,142 @@ class SystemLog(Base):
     created_at = Column(DateTime, server_default=func.now())
     
     def __repr__(self):
-        return f"<SystemLog(type={self.log_type}, time={self.created_at})>"
\ No newline at end of file
+        return f"<SystemLog(type={self.log_type}, time={self.created_at})>"
+
+class ScrapeCursor(Base):
+    """소스별 스크래핑 커서 (증분 수집용 하이 워터 마크)"""
+    __tablename__ = "scrape_cursors"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    
+    # 리뷰 소스 식별자 (base_url)
+    source = Column(String(500), unique=True, nullable=False, index=True)
+    
+    # 소스가 내려준 다음 커서 (불투명 문자열)
+    cursor = Column(String(200), nullable=True)
+    
+    # 마지막으로 본 리뷰 (커서를 지원하지 않는 소스는 날짜로 since 요청)
+    last_review_id = Column(String(200), nullable=True)
+    last_review_date = Column(DateTime, nullable=True)
+    
+    # 조건부 요청용 검증자 (다음 요청의 If-None-Match / If-Modified-Since)
+    etag = Column(String(200), nullable=True)
+    last_modified = Column(String(100), nullable=True)
+    
+    updated_at = Column(DateTime, server_default=func.now(), onupdate=func.now())
+    
+    def __repr__(self):
+        return f"<ScrapeCursor(source={self.source}, cursor={self.cursor})>"
+
+
+class LLMCacheEntry(Base):
+    """LLM 결과 캐시 (정규화된 리뷰 텍스트 + 모델 + 프롬프트 버전 기준)"""
+    __tablename__ = "llm_cache"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    
+    # sha256(종류 | 모델 | 프롬프트 버전 | 고객명 | 정규화된 텍스트)
+    cache_key = Column(String(64), unique=True, nullable=False, index=True)
+    
+    # analysis, reply, keywords, sentiment
+    kind = Column(String(20), nullable=False)
+    value = Column(JSON, nullable=False)
+    
+    model = Column(String(100), nullable=False)
+    prompt_version = Column(String(20), nullable=False)
+    
+    # 원래 생성에 걸린 시간 (히트 시 절약한 지연 시간 집계용)
+    latency_ms = Column(Integer, default=0)
+    hit_count = Column(Integer, default=0)
+    
+    created_at = Column(DateTime, server_default=func.now())
+    expires_at = Column(DateTime, nullable=False, index=True)
+    
+    def __repr__(self):
+        return f"<LLMCacheEntry(kind={self.kind}, key={self.cache_key[:8]})>"
+
+
+class ReviewFingerprint(Base):
+    """답변이 끝난 리뷰의 SimHash 지문 (유사 리뷰 인덱스 복원용)"""
+    __tablename__ = "review_fingerprints"
+    
+    review_id = Column(Integer, ForeignKey("reviews.id", ondelete="CASCADE"), primary_key=True)
+    
+    # 64비트 SimHash (부호 있는 정수로 저장)
+    simhash = Column(BigInteger, nullable=False)
+    
+    created_at = Column(DateTime, server_default=func.now())
+    
+    def __repr__(self):
+        return f"<ReviewFingerprint(review_id={self.review_id}, simhash={self.simhash})>"
+
+
+class CustomerStory(Base):
+    """고객별 AI 스토리 (리뷰 집합 다이제스트가 바뀔 때만 다시 생성)"""
+    __tablename__ = "customer_stories"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    customer_name = Column(String(100), unique=True, nullable=False, index=True)
+    
+    # 스토리를 만들 때 사용한 리뷰 집합의 sha256 (다르면 재생성 대상)
+    review_digest = Column(String(64), nullable=True)
+    
+    story = Column(Text, nullable=False)
+    
+    # 카드에 표시할 통계 (리뷰 수, 긍정 비율, 충성도, 고객 유형, 주요 키워드, 최근 리뷰)
+    profile = Column(JSON, nullable=False)
+    loyalty_score = Column(Integer, default=0, index=True)
+    
+    # ready: 최신 / stale: 리뷰가 바뀌어 재생성 대기 (기존 스토리 표시) / pending: 첫 생성 대기
+    status = Column(String(20), nullable=False, default="pending")
+    
+    generated_at = Column(DateTime, nullable=True)
+    updated_at = Column(DateTime, server_default=func.now(), onupdate=func.now())
+    
+    def __repr__(self):
+        return f"<CustomerStory(customer={self.customer_name}, status={self.status})>"
+
+
+class ReplyJob(Base):
+    """답변 생성 작업 큐 (리뷰당 한 행, 작업자가 SKIP LOCKED로 가져가 리스를 잡고 처리)"""
+    __tablename__ = "reply_jobs"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    review_id = Column(Integer, ForeignKey("reviews.id", ondelete="CASCADE"), unique=True, nullable=False)
+    
+    # pending: 대기 / running: 작업자가 리스 보유 / done: 완료 / dead: 재시도 한도 초과 (데드 레터)
+    status = Column(String(20), nullable=False, default="pending")
+    
+    # 등록 시점의 reviews.priority (가져갈 때 상태별 우선순위 순으로 정렬)
+    priority = Column(Float, nullable=False, default=0)
+    
+    # 리스를 잡은 작업자와 만료 시각 (하트비트로 연장, 만료되면 다른 작업자가 가져감)
+    worker_id = Column(String(100), nullable=True)
+    leased_until = Column(DateTime, nullable=True)
+    heartbeat_at = Column(DateTime, nullable=True)
+    
+    attempts = Column(Integer, nullable=False, default=0)
+    last_error = Column(Text, nullable=True)
+    # last_error가 LLM 장애(서킷 열림 / 429 / 5xx / 타임아웃) 때문이면 True - 시도 횟수에 넣지 않음
+    last_error_transient = Column(Boolean, nullable=True, default=False)
+    
+    # 실패 후 지수 백오프 - 이 시각 전에는 가져가지 않음
+    next_attempt_at = Column(DateTime, nullable=True, index=True)
+    
+    created_at = Column(DateTime, server_default=func.now())
+    updated_at = Column(DateTime, server_default=func.now(), onupdate=func.now())
+    finished_at = Column(DateTime, nullable=True)
+    
+    __table_args__ = (
+        # 가져갈 작업 (우선순위 순) / 리스 만료 확인 / 데드 레터 조회 - 상태별 부분 인덱스
+        # (status 전체 인덱스는 두지 않음 - 대부분인 done 행까지 담고, 플래너가 부분 인덱스 대신 고르기도 함)
+        Index("ix_reply_jobs_claimable", priority.desc(), "id",
+              postgresql_where=text("status = 'pending'")),
+        Index("ix_reply_jobs_running_lease", "leased_until",
+              postgresql_where=text("status = 'running'")),
+        Index("ix_reply_jobs_dead", finished_at.desc(),
+              postgresql_where=text("status = 'dead'")),
+    )
+    
+    def __repr__(self):
+        return f"<ReplyJob(review_id={self.review_id}, status={self.status}, worker={self.worker_id})>"
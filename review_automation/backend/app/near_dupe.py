@@ -0,0 +1,181 @@
+# near_dupe.py - 거의 같은 리뷰를 찾아 이전 분석 결과를 재사용하는 SimHash 인덱스
+import hashlib
+import os
+import re
+import threading
+import time
+from collections import Counter, defaultdict
+from typing import Optional, Dict, List
+
+from dotenv import load_dotenv
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.orm import Session
+
+from app.llm_cache import normalize_text
+from app.models import Review, ReviewFingerprint
+
+load_dotenv()
+
+FINGERPRINT_BITS = 64
+_MASK = (1 << FINGERPRINT_BITS) - 1
+
+
+def _shingles(text: str, size: int = 3) -> Counter:
+    """공백/문장부호를 뺀 글자 n-gram (한국어는 어절보다 글자 단위가 변형에 강함)"""
+    text = re.sub(r'[\W_]+', '', normalize_text(text).lower())
+    if len(text) <= size:
+        return Counter([text]) if text else Counter()
+    return Counter(text[i:i + size] for i in range(len(text) - size + 1))
+
+
+def simhash(text: str) -> int:
+    """64비트 SimHash (n-gram 빈도를 가중치로 사용)"""
+    weights = [0] * FINGERPRINT_BITS
+    for shingle, count in _shingles(text).items():
+        h = int.from_bytes(hashlib.blake2b(shingle.encode('utf-8'), digest_size=8).digest(), 'little')
+        for bit in range(FINGERPRINT_BITS):
+            weights[bit] += count if (h >> bit) & 1 else -count
+
+    fingerprint = 0
+    for bit, weight in enumerate(weights):
+        if weight > 0:
+            fingerprint |= 1 << bit
+    return fingerprint
+
+
+def to_signed(fingerprint: int) -> int:
+    """BigInteger 컬럼 저장용 (부호 있는 64비트)"""
+    return fingerprint - (1 << FINGERPRINT_BITS) if fingerprint >= 1 << (FINGERPRINT_BITS - 1) else fingerprint
+
+
+class SimHashIndex:
+    """답변이 끝난 리뷰의 SimHash를 밴드별로 나눠 담은 인덱스
+
+    지문을 num_bands개 구간으로 나누면, 해밍 거리가 num_bands 미만인 두 지문은
+    비둘기집 원리로 최소 한 구간이 완전히 같다. 그 구간의 후보만 거리 계산한다.
+    """
+
+    def __init__(self, max_distance: int = None, num_bands: int = 4):
+        self.max_distance = max_distance if max_distance is not None else int(os.getenv("NEAR_DUPE_MAX_DISTANCE", "6"))
+        self.num_bands = max(num_bands, self.max_distance + 1)
+        self.band_bits = FINGERPRINT_BITS // self.num_bands
+
+        self._bands = defaultdict(list)
+        # review_id -> {"fingerprint", "customer_name", "reply", "keywords", "sentiment"}
+        self._entries: Dict[int, Dict] = {}
+        self._lock = threading.Lock()
+
+        self.stats = {"lookups": 0, "hits": 0}
+
+    def _band_keys(self, fingerprint: int):
+        band_mask = (1 << self.band_bits) - 1
+        return [(i, (fingerprint >> (i * self.band_bits)) & band_mask) for i in range(self.num_bands)]
+
+    def add(self, review_id: int, fingerprint: int, customer_name: str, reply: str,
+            keywords: List[str], sentiment: str):
+        fingerprint &= _MASK
+        with self._lock:
+            if review_id in self._entries:
+                return
+            self._entries[review_id] = {
+                "review_id": review_id,
+                "fingerprint": fingerprint,
+                "customer_name": customer_name,
+                "reply": reply,
+                "keywords": keywords or [],
+                "sentiment": sentiment,
+            }
+            for key in self._band_keys(fingerprint):
+                self._bands[key].append(review_id)
+
+    def find(self, fingerprint: int) -> Optional[Dict]:
+        """거리 max_distance 이내에서 가장 가까운 답변 완료 리뷰 (없으면 None)"""
+        fingerprint &= _MASK
+        best, best_distance = None, self.max_distance + 1
+
+        with self._lock:
+            self.stats["lookups"] += 1
+            seen = set()
+            for key in self._band_keys(fingerprint):
+                for review_id in self._bands.get(key, ()):
+                    if review_id in seen:
+                        continue
+                    seen.add(review_id)
+                    entry = self._entries[review_id]
+                    distance = bin(entry["fingerprint"] ^ fingerprint).count('1')
+                    if distance < best_distance:
+                        best, best_distance = entry, distance
+            if best:
+                self.stats["hits"] += 1
+
+        return dict(best, distance=best_distance) if best else None
+
+    def get_stats(self) -> dict:
+        with self._lock:
+            stats = dict(self.stats)
+            stats["entries"] = len(self._entries)
+        stats["hit_rate"] = round(stats["hits"] / stats["lookups"], 4) if stats["lookups"] else 0.0
+        stats["max_distance"] = self.max_distance
+        return stats
+
+    def __len__(self):
+        return len(self._entries)
+
+
+_index = None
+_index_lock = threading.Lock()
+
+
+def get_near_dupe_index() -> Optional[SimHashIndex]:
+    """프로세스 전역 인덱스 (NEAR_DUPE_ENABLED=false면 None)"""
+    global _index
+
+    if os.getenv("NEAR_DUPE_ENABLED", "true").lower() != "true":
+        return None
+
+    with _index_lock:
+        if _index is None:
+            _index = SimHashIndex()
+        return _index
+
+
+def remember_answer(review_id: int, fingerprint: int, customer_name: str, reply: str,
+                    keywords: List[str], sentiment: str):
+    """커밋이 끝난 답변을 인덱스에 반영"""
+    index = get_near_dupe_index()
+    if index is not None:
+        index.add(review_id, fingerprint, customer_name, reply, keywords, sentiment)
+
+
+def warm_near_dupe_index(db: Session, batch_size: int = 2000) -> Optional[int]:
+    """저장된 지문 + 답변으로 인덱스 채우기 (앱 시작 시)
+
+    지문이 없는 기존 답변 리뷰는 여기서 계산해서 함께 저장한다.
+    """
+    index = get_near_dupe_index()
+    if index is None:
+        return None
+
+    start_time = time.time()
+    rows = db.query(Review, ReviewFingerprint.simhash).outerjoin(
+        ReviewFingerprint, ReviewFingerprint.review_id == Review.id
+    ).filter(Review.generated_reply.isnot(None)).yield_per(batch_size)
+
+    missing = []
+    for review, stored in rows:
+        fingerprint = stored if stored is not None else simhash(review.review_text)
+        if stored is None:
+            missing.append({"review_id": review.id, "simhash": to_signed(fingerprint)})
+        index.add(review.id, fingerprint, review.customer_name, review.generated_reply,
+                  review.keywords, review.sentiment)
+
+    if missing:
+        # 다른 인스턴스가 동시에 워밍하거나 작업자가 먼저 저장했을 수 있으므로 충돌은 무시
+        db.execute(pg_insert(ReviewFingerprint).values(missing).on_conflict_do_nothing(
+            index_elements=["review_id"]
+        ))
+        db.commit()
+
+    print(f"✓ 유사 리뷰 인덱스 준비: {len(index)}개 (새 지문 {len(missing)}개, "
+          f"{round(time.time() - start_time, 2)}초)")
+    return len(index)
@@ -0,0 +1,105 @@
+# priority.py - 답변 생성 우선순위 (부정적인 리뷰 / 최근 리뷰 / 주요 고객 먼저)
+#
+# 우선순위 = 부정도 × PRIORITY_NEGATIVITY_WEIGHT
+#          + 고객 등급 × PRIORITY_TIER_WEIGHT
+#          + 리뷰 작성 시각(에포크 기준 시간) × PRIORITY_RECENCY_WEIGHT
+#
+# 최근성을 "지금부터 몇 시간 전"이 아니라 작성 시각 자체로 넣기 때문에 시간이 지나도 점수를 다시 계산할 필요가 없다.
+# 기본값이면 확실한 부정 리뷰는 72시간 더 최근의 무난한 리뷰보다, VIP 리뷰는 24시간 더 최근의 리뷰보다 먼저 처리된다.
+import math
+import os
+from datetime import datetime
+from typing import Dict, Iterable
+
+from dotenv import load_dotenv
+from sqlalchemy.orm import Session
+
+from app.models import Review, CustomerStory
+from app.sentiment import score_sentiment
+
+load_dotenv()
+
+# 고객 유형(customer_stories.profile.customerType)별 등급 점수
+TIER_SCORES = {
+    "vip": 1.0,
+    "loyal": 0.5,
+    "normal": 0.0,
+    # 반복 악성 리뷰가 일반 고객의 불만 리뷰를 밀어내지 않도록 부정도 가산을 일부 상쇄
+    "blacklist": -0.5,
+}
+
+_EPOCH = datetime(1970, 1, 1)
+
+
+def _names(env_name: str) -> set:
+    return {name.strip() for name in os.getenv(env_name, "").split(",") if name.strip()}
+
+
+def negativity(text: str) -> float:
+    """부정 점수 비율 × 근거량 (0~1, 로컬 감성 사전만 사용하므로 LLM 호출 없음)"""
+    scores = score_sentiment(text)
+    total = sum(scores.values())
+    if total == 0:
+        return 0.0
+    return scores['부정'] / total * (1 - math.exp(-total / 2))
+
+
+def load_customer_tiers(db: Session) -> Dict[str, str]:
+    """고객명 → 유형 (저장된 고객 스토리 프로필 + PRIORITY_VIP/BLACKLIST_CUSTOMERS 환경변수)"""
+    tiers = {
+        name: (profile or {}).get("customerType", "normal")
+        for name, profile in db.query(CustomerStory.customer_name, CustomerStory.profile)
+    }
+    tiers.update({name: "vip" for name in _names("PRIORITY_VIP_CUSTOMERS")})
+    tiers.update({name: "blacklist" for name in _names("PRIORITY_BLACKLIST_CUSTOMERS")})
+    return tiers
+
+
+def compute_priority(review_text: str, review_date: datetime, tier: str = "normal") -> float:
+    negativity_weight = float(os.getenv("PRIORITY_NEGATIVITY_WEIGHT", "72"))
+    tier_weight = float(os.getenv("PRIORITY_TIER_WEIGHT", "24"))
+    recency_weight = float(os.getenv("PRIORITY_RECENCY_WEIGHT", "1"))
+
+    hours = (review_date - _EPOCH).total_seconds() / 3600 if review_date else 0.0
+    return round(
+        negativity(review_text) * negativity_weight
+        + TIER_SCORES.get(tier, 0.0) * tier_weight
+        + hours * recency_weight,
+        4
+    )
+
+
+def assign_priorities(db: Session, reviews: Iterable[Review], tiers: Dict[str, str] = None) -> int:
+    """리뷰 목록의 우선순위 계산 후 일괄 저장 (커밋 포함)"""
+    reviews = list(reviews)
+    if not reviews:
+        return 0
+
+    tiers = tiers if tiers is not None else load_customer_tiers(db)
+    mappings = [
+        {"id": r.id, "priority": compute_priority(r.review_text, r.review_date, tiers.get(r.customer_name, "normal"))}
+        for r in reviews
+    ]
+    db.bulk_update_mappings(Review, mappings)
+    db.commit()
+    return len(mappings)
+
+
+def assign_missing_priorities(db: Session, batch_size: int = 2000) -> int:
+    """우선순위가 없는 대기 리뷰만 계산 (작업 등록 / 대기 리뷰 조회 전에 호출)"""
+    assigned = 0
+    tiers = None
+    while True:
+        batch = db.query(Review).filter(
+            Review.generated_reply.is_(None),
+            Review.priority.is_(None)
+        ).limit(batch_size).all()
+        if not batch:
+            break
+        if tiers is None:
+            tiers = load_customer_tiers(db)
+        assigned += assign_priorities(db, batch, tiers)
+
+    if assigned:
+        print(f"🎯 대기 리뷰 우선순위 계산: {assigned}개")
+    return assigned
@@ -0,0 +1,57 @@
+# rate_limiter.py - LLM 호출용 토큰 버킷 (분당 요청 수 / 분당 토큰 수)
+import os
+import threading
+import time
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+
+class TokenBucket:
+    """초당 rate개씩 채워지고 최대 capacity개까지 쌓이는 버킷 (스레드 안전)"""
+
+    def __init__(self, rate_per_minute: float, capacity: float = None):
+        self.rate = rate_per_minute / 60.0
+        self.capacity = capacity or rate_per_minute
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def reserve(self, amount: float) -> float:
+        """amount만큼 선점하고 사용 가능해질 때까지 기다려야 할 시간(초) 반환
+
+        버킷을 음수로 빌려 쓰므로 대기 중인 호출끼리도 순서대로 간격이 벌어진다.
+        """
+        amount = min(amount, self.capacity)
+        with self._lock:
+            self._refill()
+            self._tokens -= amount
+            if self._tokens >= 0:
+                return 0.0
+            return -self._tokens / self.rate
+
+
+class RateLimiter:
+    """분당 요청 수(RPM)와 분당 토큰 수(TPM)를 동시에 지키는 리미터"""
+
+    def __init__(self, requests_per_minute: float = None, tokens_per_minute: float = None):
+        self.requests_per_minute = requests_per_minute or float(os.getenv("LLM_RPM", "60"))
+        self.tokens_per_minute = tokens_per_minute or float(os.getenv("LLM_TPM", "250000"))
+        self.requests = TokenBucket(self.requests_per_minute)
+        self.tokens = TokenBucket(self.tokens_per_minute)
+        self.waited_seconds = 0.0
+        self._lock = threading.Lock()
+
+    def acquire(self, tokens: int = 0):
+        """요청 1개 + 추정 토큰만큼 허용될 때까지 대기 (호출 스레드를 막음)"""
+        wait = max(self.requests.reserve(1), self.tokens.reserve(tokens))
+        if wait > 0:
+            with self._lock:
+                self.waited_seconds += wait
+            time.sleep(wait)
@@ -0,0 +1,357 @@
+# reply_jobs.py - 답변 생성 작업 큐 (여러 작업자/레플리카가 같은 리뷰를 중복 처리하지 않도록)
+import os
+import socket
+import threading
+import uuid
+from datetime import datetime, timedelta
+from typing import List, Optional, Tuple
+
+from dotenv import load_dotenv
+from sqlalchemy import select, func, exists, update, bindparam
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.orm import Session
+
+from app.database import SessionLocal
+from app.models import Review, ReplyJob
+from app.priority import assign_missing_priorities
+
+load_dotenv()
+
+# 리스 유지 시간(초) - 하트비트가 끊긴 작업자의 작업은 이 시간 뒤 다른 작업자가 가져간다
+LEASE_SECONDS = float(os.getenv("REPLY_JOB_LEASE_SECONDS", "120"))
+
+# 실패한 리뷰 재시도: base × 2^(시도-1)초 뒤 (최대 max초), max_attempts번 실패하면 데드 레터
+MAX_ATTEMPTS = int(os.getenv("REPLY_JOB_MAX_ATTEMPTS", "5"))
+RETRY_BASE_SECONDS = float(os.getenv("REPLY_JOB_RETRY_BASE_SECONDS", "60"))
+RETRY_MAX_SECONDS = float(os.getenv("REPLY_JOB_RETRY_MAX_SECONDS", "3600"))
+
+
+def retry_delay(attempts: int) -> float:
+    """attempts번째 실패 뒤 기다릴 시간(초)"""
+    return min(RETRY_MAX_SECONDS, RETRY_BASE_SECONDS * (2 ** max(0, attempts - 1)))
+
+
+def blocked_review_filter():
+    """데드 레터이거나 백오프 중인 리뷰 (작업 큐를 쓰지 않는 경로에서 제외할 때 사용)"""
+    return exists().where(
+        ReplyJob.review_id == Review.id,
+        (ReplyJob.status == "dead") | (ReplyJob.next_attempt_at > datetime.now())
+    )
+
+
+def make_worker_id() -> str:
+    """호스트 + PID + 임의 접미사 (같은 프로세스 안에서도 호출마다 다름)"""
+    return f"{socket.gethostname()}-{os.getpid()}-{uuid.uuid4().hex[:6]}"
+
+
+def enqueue_pending_reviews(db: Session) -> int:
+    """답변이 없고 작업 행도 없는 리뷰를 pending 작업으로 등록 (여러 번 호출해도 안전)
+
+    우선순위가 없는 대기 리뷰는 먼저 계산해서 작업 행에 함께 복사한다.
+    """
+    assign_missing_priorities(db)
+    missing = select(Review.id, func.coalesce(Review.priority, 0)).where(
+        Review.generated_reply.is_(None),
+        ~exists().where(ReplyJob.review_id == Review.id)
+    )
+    stmt = pg_insert(ReplyJob).from_select(["review_id", "priority"], missing).on_conflict_do_nothing(
+        index_elements=["review_id"]
+    )
+    result = db.execute(stmt)
+    db.commit()
+    return result.rowcount or 0
+
+
+def _lock_claimable_jobs(db: Session, limit: int, now: datetime) -> List[ReplyJob]:
+    """대기 중이거나 리스가 만료된 작업을 우선순위 순으로 잠금 (다른 작업자가 잠근 행은 건너뜀)"""
+    claimable = (
+        (ReplyJob.status == "pending")
+        & ((ReplyJob.next_attempt_at.is_(None)) | (ReplyJob.next_attempt_at <= now))
+    ) | ((ReplyJob.status == "running") & (ReplyJob.leased_until < now))
+    return db.execute(
+        select(ReplyJob)
+        .where(claimable)
+        .order_by(ReplyJob.priority.desc(), ReplyJob.id)
+        .limit(limit)
+        .with_for_update(skip_locked=True)
+    ).scalars().all()
+
+
+def claim_reply_jobs(db: Session, worker_id: str, limit: int,
+                     lease_seconds: float = None) -> List[Review]:
+    """대기 중이거나 리스가 만료된 작업을 우선순위 순으로 최대 limit개 가져와 리스를 잡음
+
+    SELECT ... FOR UPDATE SKIP LOCKED라서 동시에 가져가는 다른 작업자는 이 행들을 건너뛴다.
+    커밋 후에는 worker_id / leased_until이 소유권을 나타낸다.
+    """
+    lease_seconds = lease_seconds or LEASE_SECONDS
+
+    now = datetime.now()
+    jobs = _lock_claimable_jobs(db, limit, now)
+    # 새 리뷰는 스크래핑 저장 때 등록되므로, 가져갈 작업이 없을 때만 작업 행이 빠진 리뷰를 확인
+    # (매번 호출하면 가져갈 때마다 대기 리뷰 전체를 훑는다)
+    if not jobs and enqueue_pending_reviews(db):
+        jobs = _lock_claimable_jobs(db, limit, now)
+
+    if not jobs:
+        db.commit()
+        return []
+
+    claimed = []
+    for job in jobs:
+        if job.status == "running":
+            # 처리 중에 작업자가 계속 죽는 리뷰도 한도를 넘으면 데드 레터로
+            if job.attempts >= MAX_ATTEMPTS:
+                print(f"☠️  리스 만료 반복 → 데드 레터: 리뷰 ID {job.review_id}")
+                job.status = "dead"
+                job.leased_until = None
+                job.finished_at = now
+                job.last_error = f"리스 만료 {job.attempts}회 (작업자 중단 반복)"
+                continue
+            print(f"♻️  리스 만료 작업 회수: 리뷰 ID {job.review_id} (이전 작업자 {job.worker_id})")
+        job.status = "running"
+        job.worker_id = worker_id
+        job.leased_until = now + timedelta(seconds=lease_seconds)
+        job.heartbeat_at = now
+        job.attempts += 1
+        # 이번 시도의 실패 사유는 결과 저장 때 record_failures가 다시 채운다
+        job.last_error = None
+        job.last_error_transient = False
+        claimed.append(job)
+    db.commit()
+
+    if not claimed:
+        return []
+
+    review_ids = [job.review_id for job in claimed]
+    reviews = db.query(Review).filter(Review.id.in_(review_ids)).order_by(
+        Review.priority.desc(), Review.id
+    ).all()
+    # 작업 등록 뒤 다른 경로(재생성 등)로 답변이 생긴 리뷰는 바로 완료 처리
+    answered = [r.id for r in reviews if r.generated_reply is not None]
+    if answered:
+        finish_reply_jobs(db, worker_id, answered)
+    return [r for r in reviews if r.generated_reply is None]
+
+
+def extend_leases(db: Session, worker_id: str, review_ids: List[int],
+                  lease_seconds: float = None) -> int:
+    """하트비트: 아직 이 작업자 소유인 작업의 리스 연장 (연장된 행 수 반환)"""
+    lease_seconds = lease_seconds or LEASE_SECONDS
+    now = datetime.now()
+    updated = db.query(ReplyJob).filter(
+        ReplyJob.review_id.in_(review_ids),
+        ReplyJob.worker_id == worker_id,
+        ReplyJob.status == "running"
+    ).update({
+        ReplyJob.leased_until: now + timedelta(seconds=lease_seconds),
+        ReplyJob.heartbeat_at: now,
+    }, synchronize_session=False)
+    db.commit()
+    return updated
+
+
+def finish_reply_jobs(db: Session, worker_id: str, review_ids: List[int],
+                      error: Optional[str] = None) -> Tuple[int, int]:
+    """처리한 작업 마무리 (완료 수, 실패 수)
+
+    - 답변이 저장된 리뷰: done
+    - 답변이 없는 리뷰: 지수 백오프 뒤 다시 pending, MAX_ATTEMPTS번째 실패면 dead
+      (실패 사유는 결과 저장 때 record_failures가 last_error에 남긴 리뷰별 예외 메시지)
+    - error가 있거나(배치 전체가 예외로 중단) LLM 장애로 실패한 리뷰(last_error_transient)는
+      리뷰 탓이 아니므로 시도 횟수를 되돌리고 짧게 쉰 뒤 pending - 장애 동안 멀쩡한 리뷰가 데드 레터로 가지 않게
+
+    worker_id가 일치하는 행만 바꾸므로 리스를 잃은 작업자가 다른 작업자의 상태를 덮어쓰지 않는다.
+    """
+    if not review_ids:
+        return 0, 0
+
+    answered = {row.id for row in db.query(Review.id).filter(
+        Review.id.in_(review_ids), Review.generated_reply.isnot(None)
+    )}
+    unanswered = [review_id for review_id in review_ids if review_id not in answered]
+    now = datetime.now()
+    owned = (ReplyJob.worker_id == worker_id) & (ReplyJob.status == "running")
+
+    done = 0
+    if answered:
+        done = db.query(ReplyJob).filter(ReplyJob.review_id.in_(answered), owned).update({
+            ReplyJob.status: "done",
+            ReplyJob.leased_until: None,
+            ReplyJob.next_attempt_at: None,
+            ReplyJob.finished_at: now,
+            ReplyJob.last_error: None,
+        }, synchronize_session=False)
+
+    failed = 0
+    dead = []
+    if unanswered:
+        jobs = db.query(ReplyJob).filter(ReplyJob.review_id.in_(unanswered), owned).all()
+        for job in jobs:
+            job.leased_until = None
+            if error or job.last_error_transient:
+                job.attempts = max(0, job.attempts - 1)
+                job.status = "pending"
+                job.next_attempt_at = now + timedelta(seconds=RETRY_BASE_SECONDS)
+                job.last_error = error or job.last_error
+            elif job.attempts >= MAX_ATTEMPTS:
+                job.status = "dead"
+                job.finished_at = now
+                job.last_error = job.last_error or "LLM 답변 생성 실패"
+                dead.append(job.review_id)
+            else:
+                job.status = "pending"
+                job.next_attempt_at = now + timedelta(seconds=retry_delay(job.attempts))
+                job.last_error = job.last_error or "LLM 답변 생성 실패"
+        failed = len(jobs)
+
+    db.commit()
+    if dead:
+        print(f"☠️  {len(dead)}개 리뷰 데드 레터 이동 ({MAX_ATTEMPTS}회 실패): {dead}")
+    lost = len(review_ids) - done - failed
+    if lost:
+        print(f"⚠️  리스를 잃은 작업 {lost}개 (다른 작업자가 가져감)")
+    return done, failed
+
+
+def record_failures(db: Session, errors: List[Tuple[int, str, bool]], worker_id: Optional[str] = None):
+    """리뷰별 (실패 사유, LLM 장애 여부)를 작업 행에 기록 (커밋은 호출한 쪽에서 - 결과 저장과 같은 트랜잭션)
+
+    finish_reply_jobs처럼 worker_id가 리스를 잡고 있는 행만 바꾼다. 리스를 잃은 작업자가
+    다시 가져간 작업자의 실패 사유 / LLM 장애 여부를 덮어쓰지 않도록.
+    worker_id가 없으면(작업 큐 밖의 재생성 등) 실행 중이 아닌 행에만 남긴다.
+    """
+    if errors:
+        jobs = ReplyJob.__table__
+        if worker_id is not None:
+            owned = (jobs.c.worker_id == worker_id) & (jobs.c.status == "running")
+        else:
+            owned = jobs.c.status != "running"
+        db.execute(
+            update(jobs)
+            .where(jobs.c.review_id == bindparam("failed_review_id"), owned)
+            .values(last_error=bindparam("error"), last_error_transient=bindparam("transient")),
+            [
+                {"failed_review_id": review_id, "error": error[:1000], "transient": transient}
+                for review_id, error, transient in errors
+            ]
+        )
+
+
+def list_dead_letters(db: Session, limit: int = 50, offset: int = 0) -> List[dict]:
+    """데드 레터 작업 + 리뷰 내용 (최근에 포기한 순)"""
+    rows = db.query(ReplyJob, Review).join(Review, Review.id == ReplyJob.review_id).filter(
+        ReplyJob.status == "dead"
+    ).order_by(ReplyJob.finished_at.desc(), ReplyJob.id.desc()).offset(offset).limit(limit).all()
+    return [
+        {
+            "review_id": review.id,
+            "customer_name": review.customer_name,
+            "review_text": review.review_text,
+            "review_date": review.review_date.isoformat() if review.review_date else None,
+            "attempts": job.attempts,
+            "last_error": job.last_error,
+            "dead_at": job.finished_at.isoformat() if job.finished_at else None,
+        }
+        for job, review in rows
+    ]
+
+
+def retry_dead_letters(db: Session, review_ids: Optional[List[int]] = None) -> int:
+    """데드 레터 작업을 시도 횟수 0으로 되돌려 바로 다시 가져갈 수 있게 함 (review_ids가 없으면 전부)"""
+    query = db.query(ReplyJob).filter(ReplyJob.status == "dead")
+    if review_ids:
+        query = query.filter(ReplyJob.review_id.in_(review_ids))
+    retried = query.update({
+        ReplyJob.status: "pending",
+        ReplyJob.attempts: 0,
+        ReplyJob.next_attempt_at: None,
+        ReplyJob.finished_at: None,
+        ReplyJob.worker_id: None,
+    }, synchronize_session=False)
+    db.commit()
+    if retried:
+        print(f"🔁 데드 레터 {retried}개 재시도 대기열로 이동")
+    return retried
+
+
+class LeaseHeartbeat:
+    """처리하는 동안 별도 스레드/세션으로 리스를 주기적으로 연장하는 컨텍스트 매니저"""
+
+    def __init__(self, worker_id: str, review_ids: List[int], lease_seconds: float = None):
+        self.worker_id = worker_id
+        self.review_ids = list(review_ids)
+        self.lease_seconds = lease_seconds or LEASE_SECONDS
+        # 리스가 만료되기 전에 두 번은 더 연장할 수 있도록
+        self.interval = self.lease_seconds / 3
+        self._stop = threading.Event()
+        self._thread = None
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            db = SessionLocal()
+            try:
+                extended = extend_leases(db, self.worker_id, self.review_ids, self.lease_seconds)
+                if extended < len(self.review_ids):
+                    print(f"⚠️  리스 연장 {extended}/{len(self.review_ids)}개 (일부 작업이 끝났거나 회수됨)")
+            except Exception as e:
+                db.rollback()
+                print(f"⚠️  리스 하트비트 실패: {e}")
+            finally:
+                db.close()
+
+    def __enter__(self):
+        self._thread = threading.Thread(target=self._run, name=f"lease-{self.worker_id}", daemon=True)
+        self._thread.start()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self._stop.set()
+        self._thread.join()
+        return False
+
+
+def run_claimed_batch(db: Session, llm_service, worker_id: str, limit: int) -> Tuple[int, int]:
+    """작업을 가져와 처리하고 마무리 (가져온 수, 성공 수)"""
+    reviews = claim_reply_jobs(db, worker_id, limit)
+    if not reviews:
+        return 0, 0
+
+    review_ids = [r.id for r in reviews]
+    error = None
+    try:
+        with LeaseHeartbeat(worker_id, review_ids):
+            llm_service.process_reviews(db, reviews, worker_id=worker_id)
+    except Exception as e:
+        db.rollback()
+        error = str(e)
+        print(f"❌ 작업 배치 처리 중단: {e}")
+    finally:
+        done, _ = finish_reply_jobs(db, worker_id, review_ids, error=error)
+    return len(reviews), done
+
+
+def get_job_stats(db: Session) -> dict:
+    """상태별 작업 수 + 실행 중인 작업자 수 + 백오프 중인 작업 수"""
+    now = datetime.now()
+    counts = dict(db.query(ReplyJob.status, func.count(ReplyJob.id)).group_by(ReplyJob.status).all())
+    workers = db.query(func.count(func.distinct(ReplyJob.worker_id))).filter(
+        ReplyJob.status == "running"
+    ).scalar()
+    expired = db.query(func.count(ReplyJob.id)).filter(
+        ReplyJob.status == "running", ReplyJob.leased_until < now
+    ).scalar()
+    backing_off = db.query(func.count(ReplyJob.id)).filter(
+        ReplyJob.status == "pending", ReplyJob.next_attempt_at > now
+    ).scalar()
+    return {
+        "pending": counts.get("pending", 0),
+        "running": counts.get("running", 0),
+        "done": counts.get("done", 0),
+        "dead": counts.get("dead", 0),
+        "backing_off": backing_off or 0,
+        "active_workers": workers or 0,
+        "expired_leases": expired or 0,
+        "lease_seconds": LEASE_SECONDS,
+        "max_attempts": MAX_ATTEMPTS,
+    }
@@ -0,0 +1,209 @@
+# result_writer.py - 생성 결과 일괄 저장 (리뷰 N개당 한 트랜잭션)
+import os
+from typing import List, Optional, Tuple, Any
+
+from dotenv import load_dotenv
+from sqlalchemy import (
+    insert, update, values, column, cast, Integer, Text, String, JSON, inspect as sa_inspect,
+)
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.orm import Session
+from sqlalchemy.orm.attributes import set_committed_value
+
+from app.models import Review, SystemLog, ReviewFingerprint
+from app.near_dupe import simhash, to_signed, remember_answer
+from app.llm_resilience import is_transient
+from app.reply_jobs import record_failures
+
+load_dotenv()
+
+# (리뷰, 분석 결과 또는 None, 처리 방식, 실패 사유) - 리뷰는 ORM 객체나 id/customer_name/review_text를 가진 객체
+# 분석 결과가 None이면 실패 사유에 예외 메시지가 들어 있고, 저장할 때 작업 행의 last_error로 남는다.
+Result = Tuple[Any, Optional[Any], str, Optional[str]]
+
+# LLM 장애(서킷 열림 / 429 / 5xx)로 실패한 결과의 처리 방식 - 작업 큐가 시도 횟수에 넣지 않는다
+UNAVAILABLE = "unavailable"
+
+
+def failure_mode(error: Exception) -> str:
+    """실패한 결과의 처리 방식 (LLM 장애면 UNAVAILABLE, 아니면 error)"""
+    return UNAVAILABLE if is_transient(error) else "error"
+
+
+def _update_statement(rows: List[Tuple[int, str, list, str]], replace: bool = False):
+    """UPDATE reviews ... FROM (VALUES ...) 한 문장으로 여러 리뷰 갱신
+
+    값은 VALUES 열의 타입으로 바인드한다 (keywords는 JSON 타입이 직렬화).
+    VALUES 안의 바인드 값은 text로 추론되므로 JSON 컬럼에 넣는 keywords만 SET에서 캐스트한다.
+
+    replace가 아니면 아직 답변이 없는 리뷰만 갱신한다. 리스를 잃은 작업자나 늦게 끝난 요청이
+    다른 작업자가 먼저 저장한 답변을 덮어쓰지 않도록. 실제로 갱신한 리뷰 ID를 RETURNING으로 돌려준다.
+    """
+    reviews = Review.__table__
+    v = values(
+        column("id", Integer), column("reply", Text), column("keywords", JSON), column("sentiment", String(20)),
+        name="v"
+    ).data(rows)
+    stmt = update(reviews).where(reviews.c.id == v.c.id)
+    if not replace:
+        stmt = stmt.where(reviews.c.generated_reply.is_(None))
+    return stmt.values(
+        generated_reply=v.c.reply,
+        keywords=cast(v.c.keywords, JSON),
+        sentiment=v.c.sentiment,
+    ).returning(reviews.c.id)
+
+
+def _write(db: Session, results: List[Result], replace: bool,
+           worker_id: Optional[str] = None) -> List[Tuple[Any, Any, int]]:
+    """결과 묶음을 현재 트랜잭션에 기록 (커밋하지 않음) 후 실제로 저장한 (리뷰, 분석 결과, 지문) 반환
+
+    리뷰 갱신은 UPDATE ... FROM (VALUES ...) 한 번, 지문은 upsert 한 번, 로그는 INSERT 한 번.
+    """
+    answered = [(review, analysis, mode) for review, analysis, mode, _ in results if analysis is not None]
+    failed = [(review, mode, error) for review, analysis, mode, error in results if analysis is None]
+
+    written = []
+    if answered:
+        rows = [(review.id, analysis.reply, analysis.keywords, analysis.sentiment) for review, analysis, _ in answered]
+        updated = set(db.execute(_update_statement(rows, replace)).scalars())
+
+        written = [(review, analysis, mode) for review, analysis, mode in answered if review.id in updated]
+        skipped = len(answered) - len(written)
+        if skipped:
+            print(f"⏭️  이미 답변이 저장된 리뷰 {skipped}개 건너뜀 (다른 작업자가 먼저 저장)")
+
+    fingerprints = {review.id: simhash(review.review_text) for review, _, _ in written}
+    if fingerprints:
+        stmt = pg_insert(ReviewFingerprint).values([
+            {"review_id": review_id, "simhash": to_signed(fingerprint)}
+            for review_id, fingerprint in fingerprints.items()
+        ])
+        db.execute(stmt.on_conflict_do_update(
+            index_elements=["review_id"], set_={"simhash": stmt.excluded.simhash}
+        ))
+
+    # 실패 사유는 작업 행에도 남겨서 재시도 / 데드 레터 조회 때 볼 수 있게
+    record_failures(db, [
+        (review.id, error or "LLM 답변 생성 실패", mode == UNAVAILABLE) for review, mode, error in failed
+    ], worker_id)
+
+    logs = [
+        {
+            "log_type": "llm",
+            "message": f"답변 생성 완료: 리뷰 ID {review.id}",
+            "details": {
+                "review_id": review.id,
+                "keywords": analysis.keywords,
+                "sentiment": analysis.sentiment,
+                "reply_length": len(analysis.reply),
+                "mode": mode
+            }
+        }
+        for review, analysis, mode in written
+    ] + [
+        {
+            "log_type": "error",
+            "message": f"리뷰 처리 실패: ID {review.id}",
+            "details": {"error": error or "LLM 답변 생성 실패", "mode": mode}
+        }
+        for review, mode, error in failed
+    ]
+    if logs:
+        db.execute(insert(SystemLog), logs)
+
+    return [(review, analysis, fingerprints[review.id]) for review, analysis, _ in written]
+
+
+def _write_rows_individually(db: Session, results: List[Result], replace: bool,
+                             worker_id: Optional[str] = None) -> List[Tuple[Any, Any, int]]:
+    """실패한 묶음을 SAVEPOINT로 행마다 격리해서 기록 (커밋은 호출한 쪽에서 한 번)
+
+    그래도 저장하지 못한 리뷰는 실패 사유를 작업 행에 남겨 다음 시도 때 다시 처리한다.
+    """
+    written = []
+    for result in results:
+        review = result[0]
+        try:
+            with db.begin_nested():
+                written.extend(_write(db, [result], replace, worker_id))
+        except Exception as e:
+            print(f"❌ 결과 저장 실패 (리뷰 ID: {review.id}): {e}")
+            with db.begin_nested():
+                record_failures(db, [(review.id, f"결과 저장 실패: {e}", False)], worker_id)
+    return written
+
+
+def write_results(db: Session, results: List[Result], replace: bool = False,
+                  worker_id: Optional[str] = None) -> int:
+    """결과 묶음을 한 트랜잭션으로 저장하고 저장된 리뷰 수 반환
+
+    묶음 저장이 실패하면(한 행의 값이 잘못됐거나 제약을 어긴 경우 등) 행 단위로 다시 시도해서
+    나머지 결과까지 버리지 않는다. replace면 이미 있는 답변도 덮어쓴다 (재생성).
+    worker_id는 작업 큐에서 가져온 리뷰일 때 실패 사유를 그 작업자 소유의 작업 행에만 남기기 위한 값.
+    이미 불러온 ORM 객체에는 저장된 값을 커밋된 상태로 반영해서 다시 조회하지 않아도 되게 한다.
+    """
+    if not results:
+        return 0
+
+    try:
+        written = _write(db, results, replace, worker_id)
+        db.commit()
+    except Exception as e:
+        db.rollback()
+        # 한 건이어도 같은 경로로 - 그래도 실패하면 실패 사유가 작업 행에 남는다
+        print(f"⚠️  결과 일괄 저장 실패, 행 단위로 재시도 ({len(results)}개): {e}")
+        try:
+            written = _write_rows_individually(db, results, replace, worker_id)
+            db.commit()
+        except Exception as e:
+            db.rollback()
+            print(f"❌ 결과 행 단위 저장 실패: {e}")
+            return 0
+
+    for review, analysis, fingerprint in written:
+        if sa_inspect(review, raiseerr=False) is not None:
+            set_committed_value(review, "generated_reply", analysis.reply)
+            set_committed_value(review, "keywords", analysis.keywords)
+            set_committed_value(review, "sentiment", analysis.sentiment)
+        remember_answer(review.id, fingerprint, review.customer_name,
+                        analysis.reply, analysis.keywords, analysis.sentiment)
+
+    return len(written)
+
+
+class ResultWriter:
+    """결과를 모아 두었다가 batch_size개마다 write_results로 저장
+
+    with 블록을 벗어날 때 남은 결과도 저장한다.
+    """
+
+    def __init__(self, db: Session, batch_size: int = None, worker_id: str = None):
+        self.db = db
+        self.worker_id = worker_id
+        self.batch_size = batch_size or int(os.getenv("LLM_WRITE_BATCH_SIZE", "20"))
+        self.pending: List[Result] = []
+        self.saved_count = 0
+        self.commits = 0
+
+    def add(self, review, analysis, mode: str, error: str = None):
+        self.pending.append((review, analysis, mode, error))
+        if len(self.pending) >= self.batch_size:
+            self.flush()
+
+    def flush(self) -> int:
+        if not self.pending:
+            return 0
+        batch, self.pending = self.pending, []
+        saved = write_results(self.db, batch, worker_id=self.worker_id)
+        self.saved_count += saved
+        self.commits += 1
+        print(f"💾 {saved}개 결과 저장 (커밋 1회, 묶음 {len(batch)}개)")
+        return saved
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.flush()
+        return False
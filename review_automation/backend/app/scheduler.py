@@ -0,0 +1,114 @@
+# scheduler.py - 소스별 적응형 폴링 스크래핑 스케줄러
+import asyncio
+import os
+import time
+from datetime import datetime
+from typing import Dict, Optional
+
+from dotenv import load_dotenv
+
+from app.database import SessionLocal
+from app.scraper import ReviewScraper, ScrapeInProgressError
+from app.async_scraper import parse_sources
+
+load_dotenv()
+
+
+class ScrapeScheduler:
+    """앱 시작 시 asyncio 태스크로 돌면서 각 소스를 주기적으로 스크래핑
+
+    새 리뷰가 계속 들어오면 폴링 간격을 줄이고, 빈 결과가 이어지면 늘린다.
+    실제 스크래핑은 스레드에서 실행되어 이벤트 루프(HTTP 요청 처리)를 막지 않는다.
+    """
+
+    def __init__(self, scrapers: Dict[str, ReviewScraper] = None, min_interval: float = None,
+                 max_interval: float = None, backoff: float = None):
+        if scrapers is None:
+            scrapers = {
+                source["name"]: ReviewScraper(base_url=source["url"], source_prefix=source["name"])
+                for source in parse_sources()
+            }
+        self.scrapers = scrapers
+
+        # 폴링 간격 범위(초)와 빈 결과 시 간격 증가 배수
+        self.min_interval = min_interval or float(os.getenv("SCRAPE_MIN_INTERVAL", "30"))
+        self.max_interval = max_interval or float(os.getenv("SCRAPE_MAX_INTERVAL", "1800"))
+        self.backoff = backoff or float(os.getenv("SCRAPE_BACKOFF", "2"))
+
+        self.state = {
+            name: {
+                "interval": self.min_interval,
+                "last_run_at": None,
+                "last_saved": None,
+                "last_error": None,
+                "runs": 0
+            }
+            for name in self.scrapers
+        }
+        self._tasks = []
+
+    def _run_once(self, name: str) -> int:
+        """소스 하나를 한 번 스크래핑 (스레드에서 실행)"""
+        db = SessionLocal()
+        try:
+            return self.scrapers[name].run_scraping_job(db)
+        finally:
+            db.close()
+
+    def _next_interval(self, interval: float, saved_count: Optional[int]) -> float:
+        """새 리뷰가 있으면 간격 절반, 없거나 실패하면 backoff배"""
+        if saved_count:
+            return max(self.min_interval, interval / self.backoff)
+        return min(self.max_interval, interval * self.backoff)
+
+    async def _poll_source(self, name: str):
+        """소스 하나의 폴링 루프"""
+        state = self.state[name]
+
+        while True:
+            saved_count = None
+            start_time = time.time()
+
+            try:
+                saved_count = await asyncio.to_thread(self._run_once, name)
+                state["last_error"] = None
+            except ScrapeInProgressError as e:
+                # 수동 /scrape 또는 다른 레플리카가 실행 중 - 이번 회차는 건너뜀
+                print(f"⏭️  [{name}] {e}")
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                state["last_error"] = str(e)
+                print(f"❌ [{name}] 예약 스크래핑 실패: {e}")
+
+            state["interval"] = self._next_interval(state["interval"], saved_count)
+            state["last_run_at"] = datetime.now().isoformat()
+            state["last_saved"] = saved_count
+            state["runs"] += 1
+
+            print(f"⏰ [{name}] {saved_count}개 저장, "
+                  f"{round(time.time() - start_time, 2)}초 소요 → 다음 실행 {state['interval']:.0f}초 후")
+            await asyncio.sleep(state["interval"])
+
+    def start(self):
+        """소스별 폴링 태스크 시작 (실행 중인 이벤트 루프 안에서 호출)"""
+        if self._tasks:
+            return
+        self._tasks = [asyncio.create_task(self._poll_source(name)) for name in self.scrapers]
+        print(f"⏰ 스크래핑 스케줄러 시작: {len(self._tasks)}개 소스")
+
+    async def stop(self):
+        """폴링 태스크 종료"""
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    def status(self) -> Dict:
+        """소스별 폴링 상태"""
+        return {
+            "running": bool(self._tasks),
+            "min_interval": self.min_interval,
+            "max_interval": self.max_interval,
+            "sources": self.state
+        }
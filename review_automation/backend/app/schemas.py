@@ -1,7 +1,7 @@
 # schemas.py - Pydantic 스키마
-from pydantic import BaseModel
+from pydantic import BaseModel, field_validator
 from datetime import datetime
-from typing import Optional, List
+from typing import Optional, List, Literal
 
 class ReviewBase(BaseModel):
     customer_name: str
@@ -29,4 +29,24 @@ class StatsResponse(BaseModel):
     pending_reviews: int
     positive_count: int
     negative_count: int
-    neutral_count: int
\ No newline at end of file
+    neutral_count: int
+
+class ReviewAnalysis(BaseModel):
+    """LLM 한 번의 호출로 받는 리뷰 분석 결과 (답변 + 키워드 + 감성)"""
+    reply: str
+    keywords: List[str] = []
+    sentiment: Literal['긍정', '부정', '중립']
+    
+    @field_validator('reply')
+    @classmethod
+    def reply_not_empty(cls, value: str) -> str:
+        value = value.strip()
+        if not value:
+            raise ValueError("reply가 비어 있습니다")
+        return value
+    
+    @field_validator('keywords')
+    @classmethod
+    def normalize_keywords(cls, value: List[str]) -> List[str]:
+        keywords = [k.strip() for k in value if k and k.strip()]
+        return keywords[:5]  # 최대 5개
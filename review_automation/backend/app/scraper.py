@@ -1,119 +1,516 @@
 import requests
-from bs4 import BeautifulSoup
 from datetime import datetime
-from typing import List, Dict
+from typing import List, Dict, Optional, Tuple, Iterable, Iterator
 import os
+import math
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
 from dotenv import load_dotenv
+from sqlalchemy import text
 from sqlalchemy.orm import Session
-from app.models import Review, SystemLog
+from contextlib import contextmanager
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from app.models import Review, SystemLog, ScrapeCursor
+from app.json_stream import iter_json_array, batched
+from app.dedupe import get_dedupe_index, add_to_index
+from app.keywords import add_to_corpus
+from app.reply_jobs import enqueue_pending_reviews
+from itertools import islice
 import time
 
 load_dotenv()
 
+
+class ScrapeInProgressError(Exception):
+    """같은 소스의 스크래핑이 이미 실행 중일 때 발생"""
+    pass
+
+
 class ReviewScraper:
-    def __init__(self, base_url: str = None):
+    def __init__(self, base_url: str = None, incremental: bool = None, chunk_size: int = None,
+                 streaming: bool = None, source_prefix: str = "dummy",
+                 page_size: int = None, page_workers: int = None):
         self.base_url = base_url or os.getenv("DUMMY_SITE_URL", "http://localhost:5000")
+        
+        # source_id 접두사 (여러 지점을 수집할 때 리뷰 ID 충돌 방지)
+        self.source_prefix = source_prefix
+        
+        # 증분 수집 모드: 저장된 커서 이후의 새 리뷰만 요청
+        if incremental is None:
+            incremental = os.getenv("SCRAPE_INCREMENTAL", "true").lower() == "true"
+        self.incremental = incremental
+        
+        # 일괄 저장 시 한 번의 INSERT에 담을 리뷰 수
+        self.chunk_size = chunk_size or int(os.getenv("SCRAPE_CHUNK_SIZE", "500"))
+        
+        # 스트리밍 모드: 응답을 청크 단위로 파싱하며 배치마다 바로 저장
+        if streaming is None:
+            streaming = os.getenv("SCRAPE_STREAMING", "false").lower() == "true"
+        self.streaming = streaming
+        
+        # 페이지 모드: page_size > 0 이면 페이지를 병렬로 받아 도착 순서대로 저장
+        if page_size is None:
+            page_size = int(os.getenv("SCRAPE_PAGE_SIZE", "0"))
+        self.page_size = page_size
+        self.page_workers = page_workers or int(os.getenv("SCRAPE_PAGE_WORKERS", "4"))
+        
         self.session = requests.Session()
         self.session.headers.update({
             'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
         })
     
     def scrape_reviews(self) -> List[Dict]:
-        """더미 사이트에서 리뷰를 스크래핑 (API 방식)"""
+        """더미 사이트에서 리뷰를 스크래핑 (API 방식, 전체 수집)"""
+        reviews, _ = self.fetch_reviews()
+        return reviews
+    
+    def fetch_reviews(self, cursor: Optional[ScrapeCursor] = None) -> Tuple[List[Dict], Dict]:
+        """리뷰 API 호출 후 (정규화된 리뷰 목록, 응답 메타데이터) 반환
+        
+        cursor가 주어지면 그 이후의 새 리뷰만, 변경이 있을 때만 요청한다.
+        """
         try:
             # 더미 사이트는 JSON API를 제공하므로 직접 API를 호출
             api_url = f"{self.base_url}/api/reviews"
-            print(f"🔍 {api_url} 에서 리뷰 수집 중...")
+            params = self.build_incremental_params(cursor)
+            print(f"🔍 {api_url} 에서 리뷰 수집 중... {params or ''}")
             
-            response = self.session.get(api_url, timeout=10)
+            response = self.session.get(
+                api_url, params=params, headers=self.build_conditional_headers(cursor), timeout=10
+            )
             response.raise_for_status()
             
+            meta = self.response_meta(response)
+            if meta['not_modified']:
+                print("✓ 변경 없음 (304 Not Modified)")
+                return [], meta
+            
             # JSON 데이터 파싱
             reviews_data = response.json()
             reviews = []
             
             for review in reviews_data:
-                try:
-                    # 날짜 파싱 (더미 사이트는 'YYYY-MM-DD' 형식)
-                    review_date_str = review.get('date', '')
-                    # 시간이 없으면 00:00:00 추가
-                    if len(review_date_str) == 10:  # YYYY-MM-DD
-                        review_date_str += ' 00:00:00'
-                    
-                    review_date = datetime.strptime(review_date_str, '%Y-%m-%d %H:%M:%S')
-                    
-                    reviews.append({
-                        'source_id': f"dummy_{review['id']}",
-                        'customer_name': review.get('customer_name', '익명'),
-                        'review_text': review.get('review_text', ''),
-                        'review_date': review_date
-                    })
-                    
-                except Exception as e:
-                    print(f"⚠️  개별 리뷰 파싱 에러: {e}")
-                    print(f"    문제 리뷰 데이터: {review}")
-                    continue
+                parsed = self.parse_review(review)
+                if parsed:
+                    reviews.append(parsed)
             
             print(f"✓ {len(reviews)}개의 리뷰를 수집했습니다.")
-            return reviews
+            return reviews, meta
+            
+        except requests.RequestException as e:
+            print(f"❌ 스크래핑 실패: {e}")
+            return [], self.response_meta(None, error=str(e))
+    
+    def stream_reviews(self, cursor: Optional[ScrapeCursor] = None) -> Tuple[Iterator[Dict], Dict]:
+        """리뷰 API를 스트리밍으로 호출 후 (정규화된 리뷰 제너레이터, 응답 메타데이터) 반환
+        
+        응답 본문은 제너레이터를 소비하는 동안 조금씩 내려받아 파싱한다.
+        """
+        try:
+            api_url = f"{self.base_url}/api/reviews"
+            params = self.build_incremental_params(cursor)
+            print(f"🔍 {api_url} 에서 리뷰 스트리밍 수집 중... {params or ''}")
+            
+            response = self.session.get(
+                api_url, params=params, headers=self.build_conditional_headers(cursor),
+                timeout=10, stream=True
+            )
+            response.raise_for_status()
+            
+        except requests.RequestException as e:
+            print(f"❌ 스크래핑 실패: {e}")
+            return iter([]), self.response_meta(None, error=str(e))
+        
+        meta = self.response_meta(response)
+        if meta['not_modified']:
+            print("✓ 변경 없음 (304 Not Modified)")
+            response.close()
+            return iter([]), meta
+        
+        return self._iter_response_reviews(response), meta
+    
+    def _iter_response_reviews(self, response: requests.Response) -> Iterator[Dict]:
+        """스트리밍 응답 본문에서 리뷰를 하나씩 정규화해서 반환"""
+        try:
+            for review in iter_json_array(response.iter_content(chunk_size=64 * 1024)):
+                parsed = self.parse_review(review)
+                if parsed:
+                    yield parsed
+        finally:
+            response.close()
+    
+    def fetch_review_pages(self, cursor: Optional[ScrapeCursor] = None) -> Tuple[Iterator[Dict], Dict]:
+        """리뷰 API를 페이지 단위로 병렬 호출 후 (정규화된 리뷰 제너레이터, 응답 메타데이터) 반환
+        
+        첫 페이지로 전체 개수(X-Total-Count)와 커서/검증자를 받고,
+        나머지 페이지는 최대 page_workers개씩 동시에 요청한다.
+        """
+        api_url = f"{self.base_url}/api/reviews"
+        params = self.build_incremental_params(cursor)
+        
+        try:
+            print(f"🔍 {api_url} 에서 리뷰 페이지 수집 중... {params or ''} (page_size={self.page_size})")
+            response = self.session.get(
+                api_url, params={**params, 'page': 1, 'page_size': self.page_size},
+                headers=self.build_conditional_headers(cursor), timeout=10
+            )
+            response.raise_for_status()
             
         except requests.RequestException as e:
             print(f"❌ 스크래핑 실패: {e}")
-            return []
+            return iter([]), self.response_meta(None, error=str(e))
+        
+        meta = self.response_meta(response)
+        if meta['not_modified']:
+            print("✓ 변경 없음 (304 Not Modified)")
+            return iter([]), meta
+        
+        total_count = int(response.headers.get('X-Total-Count', 0))
+        total_pages = max(math.ceil(total_count / self.page_size), 1)
+        print(f"✓ 전체 {total_count}개 / {total_pages}페이지")
+        
+        # 리뷰는 뒤에만 추가되므로 같은 파라미터로 요청하면 앞 페이지 내용은 변하지 않는다
+        # (수집 중 추가된 리뷰는 첫 페이지의 커서 기준으로 다음 실행에서 수집)
+        return self._iter_pages(api_url, params, response.json(), total_pages), meta
+    
+    def _fetch_page(self, api_url: str, params: Dict, page: int) -> List[Dict]:
+        """페이지 하나를 받아 정규화"""
+        response = self.session.get(
+            api_url, params={**params, 'page': page, 'page_size': self.page_size}, timeout=10
+        )
+        response.raise_for_status()
+        
+        reviews = []
+        for review in response.json():
+            parsed = self.parse_review(review)
+            if parsed:
+                reviews.append(parsed)
+        return reviews
+    
+    def _iter_pages(self, api_url: str, params: Dict, first_page: List[Dict],
+                    total_pages: int) -> Iterator[Dict]:
+        """나머지 페이지를 제한된 병렬도로 받아 도착하는 순서대로 리뷰 반환"""
+        for review in first_page:
+            parsed = self.parse_review(review)
+            if parsed:
+                yield parsed
+        
+        pages = iter(range(2, total_pages + 1))
+        with ThreadPoolExecutor(max_workers=self.page_workers) as executor:
+            # 저장이 느려도 메모리에 쌓이는 페이지는 page_workers개로 제한
+            in_flight = {
+                executor.submit(self._fetch_page, api_url, params, page)
+                for page in islice(pages, self.page_workers)
+            }
+            
+            while in_flight:
+                done, in_flight = wait(in_flight, return_when=FIRST_COMPLETED)
+                for future in done:
+                    for page in islice(pages, 1):
+                        in_flight.add(executor.submit(self._fetch_page, api_url, params, page))
+                    yield from future.result()
+    
+    def parse_review(self, review: Dict) -> Optional[Dict]:
+        """API 응답의 리뷰 한 건을 DB 저장 형식으로 정규화"""
+        try:
+            # 날짜 파싱 (더미 사이트는 'YYYY-MM-DD' 형식)
+            review_date_str = review.get('date', '')
+            # 시간이 없으면 00:00:00 추가
+            if len(review_date_str) == 10:  # YYYY-MM-DD
+                review_date_str += ' 00:00:00'
+            
+            review_date = datetime.strptime(review_date_str, '%Y-%m-%d %H:%M:%S')
+            
+            return {
+                'source_id': f"{self.source_prefix}_{review['id']}",
+                'customer_name': review.get('customer_name', '익명'),
+                'review_text': review.get('review_text', ''),
+                'review_date': review_date
+            }
+            
+        except Exception as e:
+            print(f"⚠️  개별 리뷰 파싱 에러: {e}")
+            print(f"    문제 리뷰 데이터: {review}")
+            return None
+    
+    def build_incremental_params(self, cursor: Optional[ScrapeCursor]) -> Dict:
+        """저장된 커서로 증분 요청 파라미터 구성"""
+        if not cursor:
+            return {}
+        
+        # 소스가 커서를 내려줬다면 커서 우선, 아니면 마지막 리뷰 날짜 기준
+        if cursor.cursor:
+            return {'cursor': cursor.cursor}
+        if cursor.last_review_date:
+            return {'since': cursor.last_review_date.strftime('%Y-%m-%d')}
+        return {}
+    
+    def build_conditional_headers(self, cursor: Optional[ScrapeCursor]) -> Dict:
+        """저장된 검증자(ETag / Last-Modified)로 조건부 요청 헤더 구성"""
+        headers = {}
+        if cursor and cursor.etag:
+            headers['If-None-Match'] = cursor.etag
+        if cursor and cursor.last_modified:
+            headers['If-Modified-Since'] = cursor.last_modified
+        return headers
+    
+    def response_meta(self, response, error: str = None) -> Dict:
+        """응답 헤더에서 다음 커서와 검증자 추출 (requests / httpx 응답 공용)
+        
+        응답이 없으면(요청 실패) failed=True와 실패 사유를 담는다.
+        """
+        if response is None:
+            return {'next_cursor': None, 'etag': None, 'last_modified': None, 'not_modified': False,
+                    'failed': True, 'error': error or "응답 없음"}
+        
+        return {
+            'next_cursor': response.headers.get('X-Next-Cursor'),
+            'etag': response.headers.get('ETag'),
+            'last_modified': response.headers.get('Last-Modified'),
+            'not_modified': response.status_code == 304,
+            'failed': False,
+            'error': None
+        }
+    
+    def load_cursor(self, db: Session) -> Optional[ScrapeCursor]:
+        """현재 소스의 커서 조회"""
+        return db.query(ScrapeCursor).filter(
+            ScrapeCursor.source == self.base_url
+        ).first()
+    
+    def save_cursor(self, db: Session, cursor: Optional[ScrapeCursor],
+                    meta: Dict, latest: Optional[Dict]):
+        """수집/저장이 끝난 뒤 커서와 검증자 전진
+        
+        304면 바뀐 것이 없고, 요청이 실패했으면 새 검증자를 모르므로 기존 커서/검증자를 그대로 둔다.
+        """
+        if meta['not_modified'] or meta['failed']:
+            return
+        
+        if cursor is None:
+            cursor = ScrapeCursor(source=self.base_url)
+            db.add(cursor)
+        
+        if meta['next_cursor']:
+            cursor.cursor = meta['next_cursor']
+        
+        # 다음 요청에서 그대로 돌려보낼 검증자 (없으면 비워서 조건부 요청 안 함)
+        cursor.etag = meta['etag']
+        cursor.last_modified = meta['last_modified']
+        
+        if latest:
+            if not cursor.last_review_date or latest['review_date'] >= cursor.last_review_date:
+                cursor.last_review_id = latest['source_id']
+                cursor.last_review_date = latest['review_date']
+        
+        db.commit()
+    
+    def save_reviews_to_db(self, db: Session, reviews: List[Dict], chunk_size: int = None) -> int:
+        """수집한 리뷰를 DB에 일괄 저장 (청크별 INSERT ... ON CONFLICT DO NOTHING)
+        
+        이미 아는 source_id는 프로세스 내 인덱스로 먼저 걸러내고,
+        나머지 중복은 source_id 유니크 제약으로 DB가 최종 확인한다.
+        """
+        chunk_size = chunk_size or self.chunk_size
+        saved_count = 0
+        
+        known_count = len(reviews)
+        reviews = self._filter_known_reviews(db, reviews)
+        known_count -= len(reviews)
+        if known_count:
+            print(f"⏭️  인덱스에서 걸러낸 기존 리뷰: {known_count}개")
+        
+        for start in range(0, len(reviews), chunk_size):
+            chunk = reviews[start:start + chunk_size]
+            saved_count += self._insert_chunk(db, chunk)
+        
+        skipped = len(reviews) - saved_count
+        if skipped:
+            print(f"⏭️  이미 존재하거나 저장 실패한 리뷰: {skipped}개")
+        
+        return saved_count
     
-    def save_reviews_to_db(self, db: Session, reviews: List[Dict]) -> int:
-        """수집한 리뷰를 DB에 저장 (중복 체크)"""
+    def save_review_stream(self, db: Session, reviews: Iterable[Dict]) -> Tuple[int, int, Optional[Dict]]:
+        """리뷰 이터러블을 고정 크기 배치로 나눠 저장 (메모리 사용량이 피드 크기와 무관)
+        
+        (수집 수, 저장 수, 가장 최근 리뷰) 반환
+        """
+        total_count = 0
         saved_count = 0
+        latest = None
+        
+        for batch in batched(reviews, self.chunk_size):
+            total_count += len(batch)
+            saved_count += self.save_reviews_to_db(db, batch)
+            
+            newest = max(batch, key=lambda r: r['review_date'])
+            if latest is None or newest['review_date'] >= latest['review_date']:
+                latest = newest
         
-        for review_data in reviews:
+        if saved_count:
+            # 새 리뷰는 저장한 김에 답변 작업으로 등록 (작업자가 가져갈 때마다 대기 리뷰를 훑지 않도록)
             try:
-                # 중복 체크
-                existing = db.query(Review).filter(
-                    Review.source_id == review_data['source_id']
-                ).first()
-                
-                if existing:
-                    print(f"⏭️  이미 존재하는 리뷰: {review_data['source_id']}")
-                    continue
-                
-                # 새 리뷰 저장
-                new_review = Review(**review_data)
-                db.add(new_review)
-                db.commit()
-                saved_count += 1
-                print(f"✓ 새 리뷰 저장: {review_data['customer_name']} - {review_data['source_id']}")
-                
+                enqueued = enqueue_pending_reviews(db)
+                if enqueued:
+                    print(f"📥 답변 작업 {enqueued}개 등록")
             except Exception as e:
                 db.rollback()
+                print(f"⚠️  답변 작업 등록 실패 (작업자가 큐가 비었을 때 다시 등록): {e}")
+        
+        return total_count, saved_count, latest
+    
+    def _filter_known_reviews(self, db: Session, reviews: List[Dict]) -> List[Dict]:
+        """중복 체크 인덱스로 이미 저장된 리뷰 제거 (DB 작업 전)"""
+        index = get_dedupe_index()
+        if index is None or not reviews:
+            return reviews
+        
+        candidates = [r['source_id'] for r in reviews if index.might_contain(r['source_id'])]
+        if not candidates:
+            return reviews
+        
+        if index.exact:
+            known = set(candidates)
+        else:
+            # 블룸 필터 양성은 오탐일 수 있으므로 청크당 한 번의 IN 쿼리로 확인
+            known = {
+                source_id for (source_id,) in db.query(Review.source_id).filter(
+                    Review.source_id.in_(candidates)
+                )
+            }
+        
+        return [r for r in reviews if r['source_id'] not in known]
+    
+    def _insert_statement(self, rows: List[Dict]):
+        """source_id 충돌 시 무시하고 새로 들어간 행의 source_id만 돌려주는 INSERT"""
+        return pg_insert(Review).values(rows).on_conflict_do_nothing(
+            index_elements=['source_id']
+        ).returning(Review.source_id)
+    
+    def _insert_chunk(self, db: Session, chunk: List[Dict]) -> int:
+        """청크 하나를 한 번의 INSERT + 한 번의 커밋으로 저장"""
+        try:
+            inserted_ids = db.execute(self._insert_statement(chunk)).scalars().all()
+            db.commit()
+            
+            # 새로 들어갔든 충돌로 건너뛰었든 이제 모두 DB에 존재
+            add_to_index(r['source_id'] for r in chunk)
+            # 키워드 문서 빈도는 실제로 새로 들어간 리뷰만 반영
+            inserted = set(inserted_ids)
+            add_to_corpus(r['review_text'] for r in chunk if r['source_id'] in inserted)
+            print(f"✓ 새 리뷰 {len(inserted_ids)}개 저장 (청크 {len(chunk)}개)")
+            return len(inserted_ids)
+            
+        except Exception as e:
+            db.rollback()
+            print(f"⚠️  청크 일괄 저장 실패, 행 단위로 재시도: {e}")
+            return self._insert_rows_individually(db, chunk)
+    
+    def _insert_rows_individually(self, db: Session, chunk: List[Dict]) -> int:
+        """실패한 청크를 SAVEPOINT로 행마다 격리해서 저장 (커밋은 한 번)"""
+        saved_count = 0
+        stored_ids = []
+        inserted_texts = []
+        
+        for review_data in chunk:
+            try:
+                with db.begin_nested():
+                    if db.execute(self._insert_statement([review_data])).first():
+                        saved_count += 1
+                        inserted_texts.append(review_data['review_text'])
+                stored_ids.append(review_data['source_id'])
+                        
+            except Exception as e:
                 print(f"❌ 리뷰 저장 실패: {e}")
                 
-                # 에러 로그 저장
+                # 에러 로그 저장 (같은 트랜잭션, 배치 전체는 롤백하지 않음)
                 log = SystemLog(
                     log_type="error",
                     message=f"리뷰 저장 실패: {review_data.get('source_id')}",
-                    details={"error": str(e), "review_data": review_data}
+                    details={
+                        "error": str(e),
+                        "review_data": {k: str(v) for k, v in review_data.items()}
+                    }
                 )
                 db.add(log)
-                db.commit()
         
+        db.commit()
+        add_to_index(stored_ids)
+        add_to_corpus(inserted_texts)
         return saved_count
     
+    @contextmanager
+    def single_flight(self, db: Session):
+        """같은 소스의 스크래핑이 겹치지 않도록 advisory lock 획득
+        
+        전용 커넥션에 세션 단위 락을 잡으므로 프로세스/레플리카 사이에서도 배타적이다.
+        """
+        lock_key = f"scrape:{self.base_url}"
+        conn = db.get_bind().connect()
+        
+        try:
+            acquired = conn.execute(
+                text("SELECT pg_try_advisory_lock(hashtext(:key))"), {"key": lock_key}
+            ).scalar()
+            conn.commit()
+            
+            if not acquired:
+                raise ScrapeInProgressError(f"이미 스크래핑이 실행 중입니다: {self.base_url}")
+            
+            try:
+                yield
+            finally:
+                conn.execute(text("SELECT pg_advisory_unlock(hashtext(:key))"), {"key": lock_key})
+                conn.commit()
+        finally:
+            conn.close()
+    
     def run_scraping_job(self, db: Session):
-        """스크래핑 작업 실행 (로깅 포함)"""
+        """스크래핑 작업 실행 (로깅 포함, 소스별 단일 실행)"""
+        with self.single_flight(db):
+            return self._run_scraping_job(db)
+    
+    def _run_scraping_job(self, db: Session):
+        """스크래핑 작업 본체 (수집 → 저장 → 커서 전진)"""
         start_time = time.time()
         
         # 시작 로그
         log = SystemLog(
             log_type="scraping",
             message="스크래핑 작업 시작",
-            details={"url": self.base_url}
+            details={"url": self.base_url, "incremental": self.incremental}
         )
         db.add(log)
         db.commit()
         
         try:
-            reviews = self.scrape_reviews()
-            saved_count = self.save_reviews_to_db(db, reviews)
+            cursor = self.load_cursor(db) if self.incremental else None
+            if self.page_size > 0:
+                reviews, meta = self.fetch_review_pages(cursor)
+            elif self.streaming:
+                reviews, meta = self.stream_reviews(cursor)
+            else:
+                reviews, meta = self.fetch_reviews(cursor)
+            
+            # 요청 실패는 완료가 아니라 에러로 기록하고 커서/검증자는 건드리지 않음
+            if meta['failed']:
+                log = SystemLog(
+                    log_type="error",
+                    message=f"스크래핑 실패: {meta['error']}",
+                    details={
+                        "url": self.base_url,
+                        "error": meta['error'],
+                        "elapsed_seconds": round(time.time() - start_time, 2)
+                    }
+                )
+                db.add(log)
+                db.commit()
+                return 0
+            
+            total_scraped, saved_count, latest = self.save_review_stream(db, reviews)
+            
+            # 저장까지 끝난 뒤에만 커서 전진 (실패 시 다음 실행에서 재수집)
+            if self.incremental:
+                self.save_cursor(db, cursor, meta, latest)
             
             elapsed = round(time.time() - start_time, 2)
             
@@ -122,16 +519,18 @@ class ReviewScraper:
                 log_type="scraping",
                 message=f"스크래핑 완료: {saved_count}개 저장",
                 details={
-                    "total_scraped": len(reviews),
+                    "total_scraped": total_scraped,
                     "saved_count": saved_count,
-                    "elapsed_seconds": elapsed
+                    "elapsed_seconds": elapsed,
+                    "cursor": meta['next_cursor'],
+                    "not_modified": meta['not_modified']
                 }
             )
             db.add(log)
             db.commit()
             
             print(f"\n📊 스크래핑 결과:")
-            print(f"   - 수집: {len(reviews)}개")
+            print(f"   - 수집: {total_scraped}개")
             print(f"   - 저장: {saved_count}개")
             print(f"   - 소요시간: {elapsed}초")
             
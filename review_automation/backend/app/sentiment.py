@@ -0,0 +1,92 @@
+# sentiment.py - 한국어 리뷰용 로컬 감성 분류기 (사전 기반, LLM 호출 없음)
+import math
+import re
+from typing import Tuple, Dict
+
+# 어간/표현 -> 가중치. 부분 문자열로 매칭하므로 활용형(맛있어요, 맛있고 ...)을 함께 잡는다.
+POSITIVE_TERMS: Dict[str, float] = {
+    '최고': 2.0, '맛있': 1.5, '맛나': 1.5, '친절': 1.5, '만족': 1.5, '추천': 1.5, '훌륭': 2.0,
+    '완벽': 2.0, '감사': 1.0, '깔끔': 1.0, '깨끗': 1.0, '신선': 1.0, '편안': 1.0, '편하': 1.0,
+    '행복': 1.5, '즐거': 1.5, '특별': 1.0, '기대': 1.0, '재방문': 1.5, '단골': 1.5, '좋': 1.0,
+    '사랑': 1.5, '예쁘': 1.0, '아늑': 1.0, '고소': 0.5, '달달': 0.5, '합리적': 1.0,
+    '가성비': 1.0, '뛰어나': 1.5, '대박': 1.5, '마음에 들': 1.5, '또 올': 1.5, '또 방문': 1.5,
+}
+
+NEGATIVE_TERMS: Dict[str, float] = {
+    '최악': 2.5, '맛없': 2.0, '맛이 없': 2.0, '별로': 1.5, '불친절': 2.0, '실망': 2.0,
+    '짜증': 2.0, '비싸': 1.0, '더럽': 2.0, '불쾌': 2.0, '느리': 1.0, '늦': 1.0, '식어': 1.0,
+    '불만': 1.5, '아깝': 1.5, '다시는': 2.0, '안 갑': 2.0, '안 가': 1.5, '환불': 1.5,
+    '엉망': 2.0, '시끄럽': 1.0, '불결': 2.0, '무례': 2.0, '형편없': 2.5, '후회': 2.0,
+    '화나': 2.0, '싱겁': 1.0, '비위생': 2.5, '기분 나쁘': 2.0, '나쁘': 1.5, '문제': 1.0,
+    '오래 기다': 1.5, '실수': 1.0, '불편': 1.5, '사과': 0.5, '비추천': 2.0, '안 올': 2.0,
+    '맛도 없': 2.0,
+}
+
+NEUTRAL_TERMS: Dict[str, float] = {
+    '보통': 1.5, '그냥': 1.0, '그저': 1.0, '무난': 1.5, '평범': 1.5, '나쁘지 않': 1.0,
+    '나쁘지도 않': 1.0,
+    '그럭저럭': 1.5, '쏘쏘': 1.5, '괜찮': 0.5,
+}
+
+# 긍정 표현 바로 앞/뒤에 오면 의미를 뒤집는 부정어
+NEGATION_BEFORE = ('안 ', '못 ', '안', '못')
+NEGATION_AFTER = ('지 않', '지않', '지 못', '지는 않', '진 않', '지 마')
+
+# 강조어 (바로 뒤 표현의 가중치 증가)
+INTENSIFIERS = ('정말', '너무', '진짜', '완전', '엄청', '매우', '아주', '특히')
+
+_LEXICON = sorted(
+    [(term, weight, '긍정') for term, weight in POSITIVE_TERMS.items()]
+    + [(term, weight, '부정') for term, weight in NEGATIVE_TERMS.items()]
+    + [(term, weight, '중립') for term, weight in NEUTRAL_TERMS.items()],
+    key=lambda entry: len(entry[0]),
+    reverse=True
+)
+
+
+def score_sentiment(text: str) -> Dict[str, float]:
+    """감성별 점수 계산 (긴 표현부터 매칭하고, 매칭된 구간은 가려서 중복 매칭 방지)"""
+    text = re.sub(r'\s+', ' ', text or '')
+    masked = text
+    scores = {'긍정': 0.0, '부정': 0.0, '중립': 0.0}
+
+    for term, base_weight, label in _LEXICON:
+        start = masked.find(term)
+        while start != -1:
+            weight = base_weight
+            end = start + len(term)
+            before = text[max(0, start - 2):start]
+            after = text[end:end + 5]
+
+            if text[max(0, start - 4):start].rstrip().endswith(INTENSIFIERS):
+                weight *= 1.5
+
+            # "안 좋", "친절하지 않" 처럼 긍정이 부정되면 부정으로
+            negated = label == '긍정' and (
+                before.endswith(NEGATION_BEFORE) or any(neg in after for neg in NEGATION_AFTER)
+            )
+            scores['부정' if negated else label] += weight
+
+            masked = masked[:start] + ' ' * len(term) + masked[end:]
+            start = masked.find(term, end)
+
+    return scores
+
+
+def classify_sentiment(text: str) -> Tuple[str, float]:
+    """(감성, 신뢰도 0~1) 반환
+
+    신뢰도 = (1위 - 2위) / 전체 점수 × (1 - e^(-전체 점수 / 2))
+    근거가 적거나 긍정/부정이 섞여 있으면 낮아진다.
+    """
+    scores = score_sentiment(text)
+    total = sum(scores.values())
+    if total == 0:
+        return '중립', 0.0
+
+    ranked = sorted(scores.items(), key=lambda item: item[1], reverse=True)
+    (label, top), (_, second) = ranked[0], ranked[1]
+
+    margin = (top - second) / total
+    evidence = 1 - math.exp(-total / 2)
+    return label, round(margin * evidence, 3)
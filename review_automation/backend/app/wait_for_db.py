@@ -0,0 +1,45 @@
+# wait_for_db.py - 데이터베이스가 연결을 받을 때까지 대기 (고정 sleep 대신)
+#
+# 실행: python -m app.wait_for_db [--timeout 60]
+# 연결되면 바로 0으로 종료하고, 제한 시간 안에 연결되지 않으면 1로 종료한다.
+import argparse
+import os
+import sys
+import time
+
+from dotenv import load_dotenv
+from sqlalchemy import text
+
+from app.database import engine
+
+load_dotenv()
+
+
+def wait_for_database(timeout: float = None, interval: float = 0.25, max_interval: float = 2.0) -> bool:
+    """SELECT 1이 성공할 때까지 재시도 (간격은 max_interval까지 두 배씩 증가)"""
+    timeout = timeout if timeout is not None else float(os.getenv("DB_WAIT_TIMEOUT", "60"))
+    start_time = time.monotonic()
+    attempt = 0
+
+    while True:
+        attempt += 1
+        try:
+            with engine.connect() as conn:
+                conn.execute(text("SELECT 1"))
+            print(f"✅ 데이터베이스 연결 성공 ({round(time.monotonic() - start_time, 2)}초, {attempt}회 시도)")
+            return True
+        except Exception as e:
+            elapsed = time.monotonic() - start_time
+            if elapsed + interval > timeout:
+                print(f"❌ 데이터베이스 연결 실패 - {timeout}초 초과: {e}")
+                return False
+            print(f"⏳ 데이터베이스 대기 중... ({attempt}회, {round(elapsed, 1)}초)")
+            time.sleep(interval)
+            interval = min(max_interval, interval * 2)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="데이터베이스 연결 대기")
+    parser.add_argument("--timeout", type=float, default=None)
+    args = parser.parse_args()
+    sys.exit(0 if wait_for_database(args.timeout) else 1)
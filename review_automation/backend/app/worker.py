@@ -0,0 +1,84 @@
+# worker.py - 답변 생성 작업자 (API 서버와 별도 프로세스로 N개 실행 가능)
+#
+# 실행: python -m app.worker [--batch-size 20] [--poll-interval 5] [--once]
+# 작업자마다 reply_jobs에서 SKIP LOCKED로 배치를 가져가므로 노드/프로세스 수만큼 처리량이 늘고,
+# 같은 리뷰를 두 작업자가 동시에 처리하지 않는다. LLM 동시성은 작업자별 LLM_CONCURRENCY 설정을 따른다.
+import argparse
+import os
+import signal
+import threading
+import time
+
+from dotenv import load_dotenv
+
+from app.database import SessionLocal
+from app.llm_service import LLMService
+from app.reply_jobs import make_worker_id, run_claimed_batch
+from app.wait_for_db import wait_for_database
+
+load_dotenv()
+
+
+class ReplyWorker:
+    """작업 가져오기 → 처리 → 마무리를 반복 (대기 작업이 없으면 poll_interval만큼 쉼)"""
+
+    def __init__(self, batch_size: int = None, poll_interval: float = None, llm_service: LLMService = None):
+        self.batch_size = batch_size or int(os.getenv("REPLY_WORKER_BATCH_SIZE", "20"))
+        self.poll_interval = poll_interval or float(os.getenv("REPLY_WORKER_POLL_INTERVAL", "5"))
+        self.llm_service = llm_service or LLMService()
+        self.worker_id = make_worker_id()
+        self._stop = threading.Event()
+        self.stats = {"batches": 0, "claimed": 0, "succeeded": 0}
+
+    def stop(self, *_):
+        if not self._stop.is_set():
+            print(f"🛑 작업자 종료 요청: 현재 배치를 마치고 종료합니다 ({self.worker_id})")
+        self._stop.set()
+
+    def run_once(self) -> int:
+        """배치 하나 처리 (가져온 작업 수 반환)"""
+        db = SessionLocal()
+        try:
+            claimed, succeeded = run_claimed_batch(db, self.llm_service, self.worker_id, self.batch_size)
+        finally:
+            db.close()
+
+        if claimed:
+            self.stats["batches"] += 1
+            self.stats["claimed"] += claimed
+            self.stats["succeeded"] += succeeded
+            print(f"✓ [{self.worker_id}] 배치 완료: {succeeded}/{claimed}개 성공 "
+                  f"(누적 {self.stats['succeeded']}/{self.stats['claimed']})")
+        return claimed
+
+    def run(self, once: bool = False):
+        print(f"👷 답변 생성 작업자 시작: {self.worker_id} "
+              f"(배치 {self.batch_size}개, 동시 요청 {self.llm_service.concurrency}, 폴링 {self.poll_interval}초)")
+        while not self._stop.is_set():
+            try:
+                claimed = self.run_once()
+            except Exception as e:
+                # DB 일시 장애 등 - 잠시 쉬었다가 계속
+                print(f"❌ 작업자 오류: {e}")
+                claimed = 0
+            if once:
+                break
+            if not claimed:
+                self._stop.wait(self.poll_interval)
+        print(f"👋 작업자 종료: {self.worker_id} {self.stats}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="답변 생성 작업자")
+    parser.add_argument("--batch-size", type=int, default=None)
+    parser.add_argument("--poll-interval", type=float, default=None)
+    parser.add_argument("--once", action="store_true", help="배치 하나만 처리하고 종료")
+    args = parser.parse_args()
+
+    if not wait_for_database():
+        raise SystemExit(1)
+
+    worker = ReplyWorker(batch_size=args.batch_size, poll_interval=args.poll_interval)
+    signal.signal(signal.SIGTERM, worker.stop)
+    signal.signal(signal.SIGINT, worker.stop)
+    worker.run(once=args.once)
@@ -1,6 +1,12 @@
 #!/bin/bash
 set -e
 
+# 사용법
+#   entrypoint.sh                        → DB 대기 → 마이그레이션(RUN_MIGRATIONS=true일 때) → API 서버
+#   entrypoint.sh python -m app.worker   → DB 대기 → 주어진 명령 실행 (마이그레이션은 하지 않음)
+# 마이그레이션은 API 서버 한 곳에서만 실행한다. 작업자는 docker-compose에서 backend가 healthy가 된 뒤 시작하므로
+# 여러 컨테이너가 동시에 alembic upgrade를 돌리지 않는다.
+
 echo "⏳ 데이터베이스 연결 대기 중..."
 
 # 환경 변수 기본값 설정
@@ -11,25 +17,26 @@ POSTGRES_DB=${POSTGRES_DB:-review_db}
 
 echo "🔍 연결 정보: $POSTGRES_USER@$POSTGRES_HOST:5432/$POSTGRES_DB"
 
-# PostgreSQL이 준비될 때까지 대기 (최대 60초)
-counter=0
-until PGPASSWORD=$POSTGRES_PASSWORD psql -h "$POSTGRES_HOST" -U "$POSTGRES_USER" -d "$POSTGRES_DB" -c '\q' 2>/dev/null; do
-  echo "⏳ PostgreSQL 대기 중... ($counter/30)"
-  sleep 2
-  counter=$((counter + 1))
-  if [ $counter -gt 30 ]; then
-    echo "❌ PostgreSQL 연결 실패 - 타임아웃"
-    exit 1
-  fi
-done
+# PostgreSQL이 준비될 때까지 대기 (최대 DB_WAIT_TIMEOUT초, 기본 60초)
+cd /app && python -m app.wait_for_db
 
-echo "✅ PostgreSQL 연결 성공!"
+if [ "$#" -gt 0 ]; then
+    echo "🚀 실행: $*"
+    exec "$@"
+fi
 
-# 데이터베이스 테이블 초기화
-echo "🔧 데이터베이스 테이블 초기화 중..."
-cd /app/app && python init_db.py
+# 데이터베이스 마이그레이션 (alembic upgrade head, create_all로 만든 기존 DB는 baseline stamp 후 적용)
+if [ "${RUN_MIGRATIONS:-true}" = "true" ]; then
+    echo "🔧 데이터베이스 마이그레이션 중..."
+    python -m app.migrate
+else
+    echo "⏭️  마이그레이션 건너뜀 (RUN_MIGRATIONS=${RUN_MIGRATIONS})"
+fi
 
 echo "🚀 애플리케이션 시작..."
 
-# uvicorn 실행
-exec uvicorn app.main:app --host 0.0.0.0 --port 8000 --reload
\ No newline at end of file
+# 코드 변경 시 자동 재시작은 개발 환경에서만 (UVICORN_RELOAD=true, make dev)
+if [ "${UVICORN_RELOAD:-false}" = "true" ]; then
+    exec uvicorn app.main:app --host 0.0.0.0 --port 8000 --reload
+fi
+exec uvicorn app.main:app --host 0.0.0.0 --port 8000
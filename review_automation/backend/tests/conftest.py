@@ -0,0 +1,52 @@
+# conftest.py - 테스트 공통 설정
+#
+# 기본은 임시 SQLite 파일 DB + 스텁 LLM 백엔드. PostgreSQL 전용 동작(SKIP LOCKED, ON CONFLICT 등)까지
+# 확인하려면 TEST_DATABASE_URL=postgresql://... 로 실행한다 (테스트마다 테이블을 지우고 다시 만든다).
+import os
+import tempfile
+
+# app.database가 import 시점에 엔진을 만들므로 app 모듈보다 먼저 설정
+_db_file = os.path.join(tempfile.mkdtemp(prefix="review_tests_"), "test.db")
+os.environ["DATABASE_URL"] = os.getenv("TEST_DATABASE_URL", f"sqlite:///{_db_file}")
+os.environ["LLM_BACKEND"] = "stub"
+os.environ["LLM_CACHE_ENABLED"] = "false"
+os.environ["NEAR_DUPE_ENABLED"] = "false"
+
+import pytest
+from sqlalchemy import JSON
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.sql.elements import Cast
+from sqlalchemy.sql.expression import Values
+
+from app.database import Base, engine, SessionLocal
+from app import models  # noqa: F401 - 모든 테이블을 메타데이터에 등록
+
+
+@compiles(Cast, "sqlite")
+def _sqlite_json_cast(element, compiler, **kw):
+    """SQLite에는 JSON 타입이 없어 CAST(... AS JSON)이 숫자 변환이 되므로 테스트 DB에서는 캐스트 생략"""
+    if isinstance(element.type, JSON):
+        return compiler.process(element.clause, **kw)
+    return compiler.visit_cast(element, **kw)
+
+
+@compiles(Values, "sqlite")
+def _sqlite_values(element, compiler, asfrom=False, from_linter=None, **kw):
+    """SQLite는 VALUES 별칭에 열 이름 목록을 붙일 수 없으므로 SELECT column1 AS 이름 ... 으로 감쌈"""
+    rows = compiler._render_values(element, **kw)
+    names = ", ".join(
+        f"column{i} AS {compiler.preparer.quote(col.name)}" for i, col in enumerate(element.columns, 1)
+    )
+    return f"(SELECT {names} FROM ({rows})) AS {compiler.preparer.quote(element.name)}"
+
+
+@pytest.fixture
+def db():
+    Base.metadata.drop_all(bind=engine)
+    Base.metadata.create_all(bind=engine)
+    session = SessionLocal()
+    try:
+        yield session
+    finally:
+        session.close()
+        Base.metadata.drop_all(bind=engine)
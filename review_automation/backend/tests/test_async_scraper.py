@@ -0,0 +1,99 @@
+import asyncio
+from contextlib import contextmanager
+
+import httpx
+import pytest
+
+from app.async_scraper import AsyncMultiSourceScraper
+from app.scraper import ReviewScraper, ScrapeInProgressError
+
+
+@pytest.fixture
+def busy_sources(monkeypatch):
+    """single_flight 대역 - busy에 넣은 URL은 다른 실행이 락을 잡고 있는 것으로 처리"""
+    busy, held = set(), []
+
+    @contextmanager
+    def single_flight(self, db):
+        if self.base_url in busy:
+            raise ScrapeInProgressError(f"이미 스크래핑이 실행 중입니다: {self.base_url}")
+        held.append(self.base_url)
+        try:
+            yield
+        finally:
+            held.remove(self.base_url)
+
+    monkeypatch.setattr(ReviewScraper, "single_flight", single_flight)
+    return busy, held
+
+
+def _fetched(source, reviews=()):
+    """_fetch_source가 돌려주는 성공 결과"""
+    meta = {"next_cursor": None, "etag": None, "last_modified": None, "not_modified": False,
+            "failed": False, "error": None}
+    return {"name": source["name"], "url": source["url"], "reviews": list(reviews), "meta": meta,
+            "fetch_seconds": 0}
+
+
+def _scraper(monkeypatch, fetch=None):
+    scraper = AsyncMultiSourceScraper(sources=[
+        {"name": "gangnam", "url": "http://gangnam.test"},
+        {"name": "hongdae", "url": "http://hongdae.test"},
+    ])
+    for source_scraper in scraper.scrapers.values():
+        source_scraper.incremental = False
+    if fetch is not None:
+        monkeypatch.setattr(scraper, "_fetch_source", fetch)
+    return scraper
+
+
+def test_source_locked_elsewhere_is_skipped(db, monkeypatch, busy_sources):
+    busy, held = busy_sources
+    busy.add("http://hongdae.test")
+    fetched = []
+
+    async def fetch(client, source, host_limits, params, headers):
+        fetched.append(source["name"])
+        assert held == ["http://gangnam.test"]  # 요청/저장하는 동안 락 유지
+        return _fetched(source)
+
+    summaries = asyncio.run(_scraper(monkeypatch, fetch).scrape_all(db))
+
+    assert fetched == ["gangnam"]
+    assert {s["source"]: "skipped" in s for s in summaries} == {"gangnam": False, "hongdae": True}
+    assert held == []
+
+
+def test_unexpected_fetch_error_fails_only_that_source(db, monkeypatch, busy_sources):
+    client = httpx.AsyncClient
+    transport = httpx.MockTransport(lambda request: httpx.Response(200, json=[{"id": 1}]))
+    monkeypatch.setattr(httpx, "AsyncClient", lambda **kwargs: client(transport=transport, **kwargs))
+
+    scraper = _scraper(monkeypatch)
+    monkeypatch.setattr(scraper.scrapers["gangnam"], "parse_review", lambda review: None)
+    monkeypatch.setattr(scraper.scrapers["hongdae"], "parse_review", lambda review: review["review_text"])
+    summaries = asyncio.run(scraper.scrape_all(db))
+
+    by_source = {s["source"]: s for s in summaries}
+    assert "error" not in by_source["gangnam"]
+    assert by_source["hongdae"]["error"].startswith("KeyError")
+
+
+def test_save_error_fails_only_that_source(db, monkeypatch, busy_sources):
+    async def fetch(client, source, host_limits, params, headers):
+        return _fetched(source)
+
+    scraper = _scraper(monkeypatch, fetch)
+    save = scraper._save_source_result
+
+    def flaky_save(db, result, cursor):
+        if result["name"] == "hongdae":
+            raise RuntimeError("DB 연결 끊김")
+        return save(db, result, cursor)
+
+    monkeypatch.setattr(scraper, "_save_source_result", flaky_save)
+    summaries = asyncio.run(scraper.scrape_all(db))
+
+    by_source = {s["source"]: s for s in summaries}
+    assert "error" not in by_source["gangnam"]
+    assert "DB 연결 끊김" in by_source["hongdae"]["error"]
@@ -0,0 +1,81 @@
+from datetime import datetime, timedelta
+
+from app.customer_stories import CustomerStoryStore, WATERMARK_OVERLAP
+from app.models import Review, CustomerStory
+
+
+class FlakyStoryWriter:
+    """처음 fail_times번은 실패하고 그 뒤로는 스토리를 돌려주는 LLM 서비스 대역"""
+
+    def __init__(self, fail_times: int):
+        self.fail_times = fail_times
+        self.calls = 0
+
+    def write_customer_story(self, profile):
+        self.calls += 1
+        if self.calls <= self.fail_times:
+            raise RuntimeError("LLM 서킷 열림")
+        return f"{profile['name']}님의 스토리"
+
+
+def _add_reviews(db, name="김단골", count=3, start=0):
+    for i in range(start, start + count):
+        db.add(Review(source_id=f"dummy_{name}_{i}", customer_name=name, review_text=f"맛있어요 {i}",
+                      review_date=datetime(2024, 1, 1) + timedelta(days=i), sentiment="긍정"))
+    db.commit()
+
+
+def test_failed_story_is_retried_on_next_refresh(db):
+    _add_reviews(db)
+    writer = FlakyStoryWriter(fail_times=1)
+    store = CustomerStoryStore(writer, min_reviews=3, refresh_interval=0)
+
+    first = store.refresh(db)
+    row = db.query(CustomerStory).one()
+
+    assert first["regenerated"] == 0 and first["failed"] == 1
+    assert row.status == "pending"
+    assert row.review_digest is None
+
+    second = store.refresh(db)
+    db.refresh(row)
+
+    assert second["regenerated"] == 1
+    assert row.status == "ready"
+    assert row.story == "김단골님의 스토리"
+
+
+def test_failed_regeneration_keeps_previous_story(db):
+    _add_reviews(db)
+    store = CustomerStoryStore(FlakyStoryWriter(fail_times=0), min_reviews=3, refresh_interval=0)
+    store.refresh(db)
+    row = db.query(CustomerStory).one()
+    old_digest = row.review_digest
+
+    _add_reviews(db, count=1, start=3)  # 새 리뷰 → 다이제스트 변경
+    store.llm_service = FlakyStoryWriter(fail_times=1)
+    store.refresh(db)
+    db.refresh(row)
+
+    assert row.status == "stale"
+    assert row.story == "김단골님의 스토리"
+    assert row.review_digest == old_digest
+
+
+def test_refresh_reads_only_customers_with_changed_reviews(db):
+    _add_reviews(db, name="김단골")
+    _add_reviews(db, name="박손님")
+    writer = FlakyStoryWriter(fail_times=0)
+    store = CustomerStoryStore(writer, min_reviews=3, refresh_interval=0)
+    assert store.refresh(db)["regenerated"] == 2
+
+    # 지난 갱신 이후 바뀐 리뷰가 없으면 다음 갱신은 고객을 하나도 읽지 않는다
+    db.query(Review).update({Review.updated_at: store._watermark - 2 * WATERMARK_OVERLAP})
+    db.commit()
+    assert store.refresh(db)["customers"] == 0
+
+    _add_reviews(db, name="박손님", count=1, start=3)
+    result = store.refresh(db)
+
+    assert result["customers"] == 1 and result["regenerated"] == 1
+    assert writer.calls == 3
@@ -0,0 +1,70 @@
+import json
+
+import pytest
+
+from app.json_stream import iter_json_array, batched
+
+ITEMS = [
+    {"id": 1, "customer_name": "김철수", "review_text": "맛있어요, 또 올게요 [재방문]"},
+    {"id": 2, "customer_name": "이영희", "review_text": "서비스가 \"조금\" 아쉬웠어요"},
+    12345,
+    "문자열",
+    [1, 2, {"nested": True}],
+]
+
+
+def _chunks(data: bytes, size: int):
+    return [data[i:i + size] for i in range(0, len(data), size)]
+
+
+@pytest.mark.parametrize("size", [1, 2, 3, 7, 64, 10_000])
+def test_items_survive_any_chunk_boundary(size):
+    # 1바이트 단위면 한글(UTF-8 3바이트)과 숫자가 모두 청크 경계에서 잘린다
+    data = json.dumps(ITEMS, ensure_ascii=False, indent=1).encode("utf-8")
+
+    assert list(iter_json_array(_chunks(data, size))) == ITEMS
+
+
+def test_empty_array_and_empty_chunks():
+    assert list(iter_json_array([b"", b" [", b"", b" ]"])) == []
+
+
+def test_stops_at_closing_bracket():
+    # 배열 뒤의 내용은 읽지 않음
+    assert list(iter_json_array([b"[1, 2]", b" trailing"])) == [1, 2]
+
+
+def test_rejects_non_array_feed():
+    with pytest.raises(ValueError):
+        list(iter_json_array([b'{"id": 1}']))
+
+
+def test_truncated_feed_raises_after_complete_items():
+    parsed = []
+    with pytest.raises(ValueError):
+        for item in iter_json_array([b'[{"id": 1}, {"id": 2}, {"id"']):
+            parsed.append(item)
+
+    assert parsed == [{"id": 1}, {"id": 2}]
+
+
+def test_trailing_number_without_bracket_is_truncation():
+    with pytest.raises(ValueError):
+        list(iter_json_array([b"[1, 2, 3"]))
+
+
+def test_batched():
+    assert list(batched(range(5), 2)) == [[0, 1], [2, 3], [4]]
+    assert list(batched([], 3)) == []
+
+
+def test_malformed_item_in_the_middle_fails_without_buffering_the_rest():
+    good = json.dumps(ITEMS[0], ensure_ascii=False)
+    data = f'[{good}, {{"id": 2, "review_text": oops}}, {good}, {good}]'.encode("utf-8") + b" " * 10_000
+    chunks = iter(_chunks(data, 16))
+    items = iter_json_array(chunks, max_item_size=200)
+
+    assert next(items) == ITEMS[0]
+    with pytest.raises(ValueError, match="파싱할 수 없습니다"):
+        next(items)
+    assert next(chunks, None) is not None  # 응답 끝까지 읽지 않고 중단
@@ -0,0 +1,45 @@
+import pytest
+
+from app import llm_cache
+from app.llm_cache import LLMCache
+from app.models import LLMCacheEntry
+
+
+@pytest.fixture
+def cache_env(monkeypatch):
+    monkeypatch.setenv("LLM_CACHE_ENABLED", "true")
+    return monkeypatch
+
+
+def _hit_count(db):
+    db.expire_all()
+    return db.query(LLMCacheEntry.hit_count).scalar()
+
+
+def test_db_hits_are_flushed_in_batches(db, cache_env):
+    cache_env.setenv("LLM_CACHE_HIT_FLUSH", "3")
+    cache = LLMCache()
+    cache.set("k", "analysis", {"reply": "감사합니다"}, "test-model", "v1")
+
+    for _ in range(2):
+        cache._lru.clear()  # 다른 레플리카처럼 LRU에 없어서 DB에서 찾는 경우
+        assert cache.get("k") == {"reply": "감사합니다"}
+    assert _hit_count(db) == 0  # 조회마다 커밋하지 않음
+
+    cache._lru.clear()
+    cache.get("k")
+    assert _hit_count(db) == 3
+    assert cache.get_stats()["db_hits"] == 3
+
+
+def test_memory_only_cache_never_touches_db(cache_env):
+    cache_env.setenv("LLM_CACHE_DB_ENABLED", "false")
+
+    sessions = []
+    cache_env.setattr(llm_cache, "SessionLocal", lambda: sessions.append(1))
+    cache = LLMCache()
+
+    assert cache.get("k") is None
+    cache.set("k", "analysis", {"reply": "감사합니다"}, "test-model", "v1")
+    assert cache.get("k") == {"reply": "감사합니다"}
+    assert sessions == []
@@ -0,0 +1,163 @@
+import pytest
+
+from app.llm_backends import LLMBackend, LLMBackendError
+from app.llm_resilience import CircuitBreaker, CircuitOpenError, ResilientBackend
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr("app.llm_resilience.time.monotonic", clock)
+    return clock
+
+
+def _open_breaker(clock, **kwargs) -> CircuitBreaker:
+    breaker = CircuitBreaker(failure_threshold=2, reset_timeout=30, **kwargs)
+    breaker.record_failure()
+    breaker.record_failure()
+    return breaker
+
+
+def test_opens_after_threshold_and_fails_fast(clock):
+    breaker = _open_breaker(clock)
+
+    assert breaker.state == "open"
+    with pytest.raises(CircuitOpenError) as excinfo:
+        breaker.allow()
+    assert excinfo.value.retry_in == pytest.approx(30)
+
+
+def test_half_open_grants_a_single_trial(clock):
+    breaker = _open_breaker(clock)
+    clock.now += 30
+
+    assert breaker.allow() is True
+    assert breaker.state == "half_open"
+    with pytest.raises(CircuitOpenError):
+        breaker.allow()
+
+
+def test_trial_success_closes_and_failure_reopens(clock):
+    breaker = _open_breaker(clock)
+    clock.now += 30
+    breaker.allow()
+    breaker.record_failure()
+
+    assert breaker.state == "open"
+    with pytest.raises(CircuitOpenError):
+        breaker.allow()
+
+    clock.now += 30
+    breaker.allow()
+    breaker.record_success()
+
+    assert breaker.state == "closed"
+    assert breaker.allow() is False
+
+
+def test_released_trial_can_be_retried(clock):
+    breaker = _open_breaker(clock)
+    clock.now += 30
+    breaker.allow()
+
+    breaker.release_trial()
+
+    assert breaker.state == "half_open"
+    assert breaker.allow() is True
+
+
+def test_stuck_trial_expires_after_trial_timeout(clock):
+    breaker = _open_breaker(clock, trial_timeout=60)
+    clock.now += 30
+    breaker.allow()
+
+    clock.now += 59
+    with pytest.raises(CircuitOpenError):
+        breaker.allow()
+    clock.now += 1
+    assert breaker.allow() is True
+
+
+class StreamingBackend(LLMBackend):
+    name = "test"
+    model_name = "test-model"
+
+    def __init__(self, fail: bool = False):
+        self.fail = fail
+
+    def generate(self, prompt: str) -> str:
+        if self.fail:
+            raise LLMBackendError("서버 오류 (503)", status_code=503, retryable=True)
+        return "응답"
+
+    def generate_stream(self, prompt: str):
+        if self.fail:
+            raise LLMBackendError("서버 오류 (503)", status_code=503, retryable=True)
+        yield from ["첫 ", "번째 ", "조각"]
+
+
+def test_stream_closed_during_trial_releases_it(clock):
+    breaker = _open_breaker(clock)
+    clock.now += 30
+    backend = ResilientBackend(StreamingBackend(), breaker=breaker, max_attempts=1, hedge_enabled=False)
+
+    stream = backend.generate_stream("프롬프트")
+    assert next(stream) == "첫 "
+    stream.close()  # 클라이언트 연결 끊김 → GeneratorExit
+
+    # 시험 호출이 반납되어 다음 호출이 다시 시험하고, 성공하면 서킷이 닫힘
+    assert backend.generate("프롬프트") == "응답"
+    assert breaker.state == "closed"
+
+
+def test_completed_stream_closes_breaker(clock):
+    breaker = _open_breaker(clock)
+    clock.now += 30
+    backend = ResilientBackend(StreamingBackend(), breaker=breaker, max_attempts=1, hedge_enabled=False)
+
+    assert "".join(backend.generate_stream("프롬프트")) == "첫 번째 조각"
+    assert breaker.state == "closed"
+
+
+def test_failing_trial_reopens_breaker(clock):
+    breaker = _open_breaker(clock)
+    clock.now += 30
+    backend = ResilientBackend(StreamingBackend(fail=True), breaker=breaker, max_attempts=1, hedge_enabled=False)
+
+    with pytest.raises(LLMBackendError):
+        list(backend.generate_stream("프롬프트"))
+    assert breaker.state == "open"
+
+
+class BadRequestBackend(StreamingBackend):
+    def generate(self, prompt: str) -> str:
+        raise LLMBackendError("잘못된 요청 (400)", status_code=400, retryable=False)
+
+    def generate_stream(self, prompt: str):
+        raise LLMBackendError("잘못된 요청 (400)", status_code=400, retryable=False)
+        yield
+
+
+@pytest.mark.parametrize("call", [
+    lambda backend: backend.generate("프롬프트"),
+    lambda backend: list(backend.generate_stream("프롬프트")),
+], ids=["generate", "generate_stream"])
+def test_bad_request_during_trial_neither_closes_nor_reopens(clock, call):
+    breaker = _open_breaker(clock)
+    clock.now += 30
+    backend = ResilientBackend(BadRequestBackend(), breaker=breaker, max_attempts=1, hedge_enabled=False)
+
+    with pytest.raises(LLMBackendError):
+        call(backend)
+
+    # 4xx는 LLM이 회복됐다는 뜻이 아니므로 서킷은 half-open 그대로, 시험 호출만 반납
+    assert breaker.state == "half_open"
+    assert breaker.allow() is True
@@ -0,0 +1,143 @@
+import json
+from datetime import datetime
+from types import SimpleNamespace
+
+import pytest
+
+from app.llm_backends import LLMBackend, LLMBackendError
+from app.llm_service import LLMService
+from app.models import Review
+
+from tests.test_reply_jobs import RejectingBackend
+
+
+def _answered_review(db):
+    review = Review(source_id="regen_1", customer_name="김고객", review_text="맛있어요",
+                    review_date=datetime(2024, 1, 1), generated_reply="기존 답변")
+    db.add(review)
+    db.commit()
+    return review
+
+
+def test_failed_regeneration_keeps_previous_reply(db):
+    review = _answered_review(db)
+
+    assert LLMService(backend=RejectingBackend()).process_review(db, review.id, fresh=True) is False
+
+    db.refresh(review)
+    assert review.generated_reply == "기존 답변"
+
+
+def test_regeneration_replaces_previous_reply(db):
+    review = _answered_review(db)
+
+    assert LLMService().process_review(db, review.id, fresh=True) is True
+
+    db.refresh(review)
+    assert review.generated_reply and review.generated_reply != "기존 답변"
+
+
+def test_existing_reply_is_skipped_without_fresh(db):
+    review = _answered_review(db)
+
+    assert LLMService().process_review(db, review.id) is False
+
+
+class NeutralBackend(LLMBackend):
+    """통합/배치 응답의 감성을 항상 중립으로 돌려주는 백엔드 대역"""
+
+    name = "test"
+    model_name = "test-model"
+
+    def generate(self, prompt: str) -> str:
+        analysis = {"reply": "감사합니다", "keywords": ["음식"], "sentiment": "중립"}
+        if "JSON 배열" in prompt:
+            ids = [json.loads(line)["id"] for line in prompt.splitlines() if line.startswith('{"id"')]
+            return json.dumps([dict(analysis, id=review_id) for review_id in ids], ensure_ascii=False)
+        return json.dumps(analysis, ensure_ascii=False)
+
+
+def _review(review_id, text):
+    return SimpleNamespace(id=review_id, customer_name="김고객", review_text=text)
+
+
+def test_combined_mode_prefers_confident_local_sentiment():
+    service = LLMService(backend=NeutralBackend())
+
+    confident, mode = service.generate_analysis(_review(1, "정말 최고예요 친절하고 맛있어요"))
+    unsure, _ = service.generate_analysis(_review(2, "음식이 나왔습니다"))
+
+    assert mode == "combined"
+    assert confident.sentiment == "긍정"
+    assert unsure.sentiment == "중립"
+    assert service.sentiment_stats == {"local": 1, "llm": 1}
+
+
+def test_batch_mode_prefers_confident_local_sentiment():
+    service = LLMService(backend=NeutralBackend())
+
+    results = service.analyze_review_batch([
+        _review(1, "정말 최고예요 친절하고 맛있어요"),
+        _review(2, "음식이 나왔습니다"),
+    ])
+
+    assert results[1].sentiment == "긍정"
+    assert results[2].sentiment == "중립"
+    assert service.get_stats()["sentiment"]["local_ratio"] == 0.5
+
+
+class CountingBackend(LLMBackend):
+    """호출 수를 세고, 설정한 응답 또는 예외를 돌려주는 백엔드 대역"""
+
+    name = "test"
+    model_name = "test-model"
+
+    def __init__(self, response: str = None, error: Exception = None):
+        self.response = response
+        self.error = error
+        self.calls = 0
+
+    def generate(self, prompt: str) -> str:
+        self.calls += 1
+        if self.error:
+            raise self.error
+        return self.response
+
+
+def _batch_service(backend):
+    service = LLMService(backend=backend)
+    service.backend.max_attempts = 1
+    service.batch_size = 4
+    return service
+
+
+def test_failed_batch_call_is_not_retried_per_review():
+    backend = CountingBackend(error=LLMBackendError("서버 오류 (503)", status_code=503, retryable=True))
+    service = _batch_service(backend)
+    reviews = [_review(i, f"리뷰 {i}") for i in range(1, 5)]
+
+    with pytest.raises(LLMBackendError):
+        service.analyze_review_batch(reviews)
+    assert backend.calls == 1
+
+
+def test_unparseable_batch_response_falls_back_per_review():
+    backend = CountingBackend(response="죄송합니다, 지금은 답변할 수 없습니다")
+    service = _batch_service(backend)
+
+    assert service.analyze_review_batch([_review(i, f"리뷰 {i}") for i in range(1, 5)]) == {}
+    assert backend.calls == 1
+
+
+@pytest.mark.parametrize("concurrency", [1, 4])
+def test_llm_outage_costs_one_call_per_batch(db, concurrency):
+    for i in range(4):
+        db.add(Review(source_id=f"batch_{i}", customer_name="김고객", review_text=f"리뷰 {i}",
+                      review_date=datetime(2024, 1, 1)))
+    db.commit()
+    backend = CountingBackend(error=LLMBackendError("서버 오류 (503)", status_code=503, retryable=True))
+    service = _batch_service(backend)
+    service.concurrency = concurrency
+
+    assert service.process_reviews(db, db.query(Review).all()) == 0
+    assert backend.calls == 1
@@ -0,0 +1,27 @@
+from datetime import datetime
+
+from app import near_dupe
+from app.models import Review, ReviewFingerprint
+
+
+def test_warm_ignores_fingerprint_saved_concurrently(db, monkeypatch):
+    review = Review(source_id="dummy_1", customer_name="김단골", review_text="맛있어요",
+                    review_date=datetime(2024, 1, 1), generated_reply="감사합니다")
+    db.add(review)
+    db.commit()
+
+    monkeypatch.setenv("NEAR_DUPE_ENABLED", "true")
+    monkeypatch.setattr(near_dupe, "_index", None)
+
+    # 워밍이 지문을 계산하는 사이 작업자가 같은 리뷰의 지문을 먼저 저장한 상황
+    original = near_dupe.simhash
+
+    def racing_simhash(text):
+        db.add(ReviewFingerprint(review_id=review.id, simhash=7))
+        db.flush()
+        return original(text)
+
+    monkeypatch.setattr(near_dupe, "simhash", racing_simhash)
+
+    assert near_dupe.warm_near_dupe_index(db) == 1
+    assert db.query(ReviewFingerprint).one().simhash == 7
@@ -0,0 +1,53 @@
+import threading
+
+import pytest
+
+from app.rate_limiter import TokenBucket, RateLimiter
+
+
+def test_reserve_is_free_while_tokens_remain():
+    bucket = TokenBucket(rate_per_minute=60, capacity=3)
+
+    assert [bucket.reserve(1) for _ in range(3)] == [0.0, 0.0, 0.0]
+
+
+def test_reserve_spaces_out_borrowed_tokens():
+    # 초당 1개씩 채워지는 버킷을 다 쓴 뒤에는 호출마다 1초씩 더 기다려야 함
+    bucket = TokenBucket(rate_per_minute=60, capacity=1)
+    bucket.reserve(1)
+
+    first = bucket.reserve(1)
+    second = bucket.reserve(1)
+
+    assert first == pytest.approx(1.0, abs=0.05)
+    assert second == pytest.approx(2.0, abs=0.05)
+
+
+def test_reserve_caps_amount_at_capacity():
+    # 버킷보다 큰 요청도 영원히 기다리지 않고 가득 찬 버킷 하나만큼만 빌림
+    bucket = TokenBucket(rate_per_minute=600, capacity=10)
+
+    assert bucket.reserve(50) == 0.0
+    assert bucket.reserve(10) == pytest.approx(1.0, abs=0.05)
+
+
+def test_waited_seconds_counts_every_thread(monkeypatch):
+    monkeypatch.setattr("app.rate_limiter.time.sleep", lambda seconds: None)
+    limiter = RateLimiter(requests_per_minute=60000, tokens_per_minute=1e9)
+    limiter.requests = TokenBucket(rate_per_minute=60000, capacity=1)
+    waits = []
+    original_reserve = limiter.requests.reserve
+
+    def reserve(amount):
+        wait = original_reserve(amount)
+        waits.append(wait)
+        return wait
+
+    limiter.requests.reserve = reserve
+    threads = [threading.Thread(target=lambda: [limiter.acquire() for _ in range(200)]) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert limiter.waited_seconds == pytest.approx(sum(waits))
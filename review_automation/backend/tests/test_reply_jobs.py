@@ -0,0 +1,176 @@
+from datetime import datetime, timedelta
+
+import pytest
+
+from app import reply_jobs
+from app.llm_backends import LLMBackend, LLMBackendError
+from app.llm_service import LLMService
+from app.models import Review, ReplyJob
+from app.reply_jobs import (
+    enqueue_pending_reviews, claim_reply_jobs, finish_reply_jobs, record_failures, run_claimed_batch,
+)
+
+
+class RejectingBackend(LLMBackend):
+    """모든 요청을 잘못된 요청(400)으로 거절하는 백엔드 대역"""
+
+    name = "test"
+    model_name = "test-model"
+
+    def generate(self, prompt: str) -> str:
+        raise LLMBackendError("잘못된 요청 (400)", status_code=400)
+
+
+class UnavailableBackend(LLMBackend):
+    """항상 서버 오류(503)로 실패하는 백엔드 대역 (LLM 장애)"""
+
+    name = "test"
+    model_name = "test-model"
+
+    def generate(self, prompt: str) -> str:
+        raise LLMBackendError("서버 오류 (503)", status_code=503, retryable=True)
+
+
+def _add_reviews(db, count=2):
+    for i in range(count):
+        db.add(Review(source_id=f"job_{i}", customer_name=f"고객{i}", review_text=f"맛있어요 {i}",
+                      review_date=datetime(2024, 1, 1)))
+    db.commit()
+    enqueue_pending_reviews(db)
+
+
+@pytest.mark.parametrize("concurrency", [1, 4])
+def test_failure_reason_reaches_job_row(db, concurrency):
+    _add_reviews(db)
+    service = LLMService(backend=RejectingBackend())
+    service.concurrency = concurrency
+
+    claimed, done = run_claimed_batch(db, service, "worker-1", limit=10)
+
+    assert (claimed, done) == (2, 0)
+    for job in db.query(ReplyJob).all():
+        assert job.status == "pending"
+        assert job.attempts == 1
+        assert "잘못된 요청 (400)" in job.last_error
+
+
+def _claim(db, count=1, worker_id="worker-1"):
+    _add_reviews(db, count)
+    return [review.id for review in claim_reply_jobs(db, worker_id, limit=count)]
+
+
+def _job(db, review_id):
+    db.expire_all()
+    return db.query(ReplyJob).filter(ReplyJob.review_id == review_id).one()
+
+
+def test_answered_job_is_done(db):
+    review_id, = _claim(db)
+    db.query(Review).filter(Review.id == review_id).update({Review.generated_reply: "답변"})
+    db.commit()
+
+    assert finish_reply_jobs(db, "worker-1", [review_id]) == (1, 0)
+
+    job = _job(db, review_id)
+    assert job.status == "done"
+    assert job.finished_at is not None and job.leased_until is None
+
+
+def test_failed_job_backs_off_and_counts_attempt(db):
+    review_id, = _claim(db)
+    record_failures(db, [(review_id, "ValueError: 빈 응답", False)], "worker-1")
+    before = datetime.now()
+
+    assert finish_reply_jobs(db, "worker-1", [review_id]) == (0, 1)
+
+    job = _job(db, review_id)
+    assert job.status == "pending"
+    assert job.attempts == 1
+    assert job.last_error == "ValueError: 빈 응답"
+    assert job.next_attempt_at >= before + timedelta(seconds=reply_jobs.retry_delay(1) - 1)
+
+
+def test_job_is_dead_after_max_attempts(db):
+    review_id, = _claim(db)
+    db.query(ReplyJob).filter(ReplyJob.review_id == review_id).update(
+        {ReplyJob.attempts: reply_jobs.MAX_ATTEMPTS})
+    record_failures(db, [(review_id, "ValueError: 빈 응답", False)], "worker-1")
+
+    finish_reply_jobs(db, "worker-1", [review_id])
+
+    job = _job(db, review_id)
+    assert job.status == "dead"
+    assert job.last_error == "ValueError: 빈 응답"
+
+
+def test_llm_outage_does_not_spend_attempts(db):
+    review_id, = _claim(db)
+    db.query(ReplyJob).filter(ReplyJob.review_id == review_id).update(
+        {ReplyJob.attempts: reply_jobs.MAX_ATTEMPTS})
+    record_failures(db, [(review_id, "CircuitOpenError: LLM 서킷 열림", True)], "worker-1")
+
+    finish_reply_jobs(db, "worker-1", [review_id])
+
+    job = _job(db, review_id)
+    assert job.status == "pending"
+    assert job.attempts == reply_jobs.MAX_ATTEMPTS - 1
+    assert job.last_error == "CircuitOpenError: LLM 서킷 열림"
+
+
+def test_batch_error_does_not_spend_attempts(db):
+    review_id, = _claim(db)
+
+    finish_reply_jobs(db, "worker-1", [review_id], error="DB 연결 끊김")
+
+    job = _job(db, review_id)
+    assert (job.status, job.attempts, job.last_error) == ("pending", 0, "DB 연결 끊김")
+
+
+def test_other_workers_job_is_left_alone(db):
+    review_id, = _claim(db, worker_id="worker-2")
+
+    assert finish_reply_jobs(db, "worker-1", [review_id]) == (0, 0)
+    assert _job(db, review_id).status == "running"
+
+
+def test_failure_from_worker_that_lost_lease_is_ignored(db):
+    review_id, = _claim(db, worker_id="worker-2")
+
+    # 리스를 잃은 worker-1이 늦게 실패를 기록해도 worker-2의 작업 행은 그대로
+    record_failures(db, [(review_id, "CircuitOpenError: LLM 서킷 열림", True)], "worker-1")
+    record_failures(db, [(review_id, "결과 저장 실패", False)])
+    db.commit()
+
+    job = _job(db, review_id)
+    assert (job.last_error, job.last_error_transient) == (None, False)
+
+
+def test_claim_enqueues_missing_reviews_only_when_queue_is_empty(db):
+    _add_reviews(db, count=1)
+    db.add(Review(source_id="job_unqueued", customer_name="고객", review_text="늦게 들어온 리뷰",
+                  review_date=datetime(2024, 1, 1)))
+    db.commit()
+
+    first = claim_reply_jobs(db, "worker-1", limit=10)
+    second = claim_reply_jobs(db, "worker-1", limit=10)
+
+    assert [r.source_id for r in first] == ["job_0"]
+    assert [r.source_id for r in second] == ["job_unqueued"]
+
+
+@pytest.mark.parametrize("concurrency", [1, 4])
+def test_llm_outage_keeps_reviews_out_of_dead_letter(db, concurrency):
+    _add_reviews(db)
+    service = LLMService(backend=UnavailableBackend())
+    service.backend.max_attempts = 1
+    service.concurrency = concurrency
+
+    for _ in range(reply_jobs.MAX_ATTEMPTS + 1):
+        db.query(ReplyJob).update({ReplyJob.next_attempt_at: None})
+        db.commit()
+        run_claimed_batch(db, service, "worker-1", limit=10)
+
+    for job in db.query(ReplyJob).all():
+        assert job.status == "pending"
+        assert job.attempts == 0
+        assert "503" in job.last_error or "서킷" in job.last_error
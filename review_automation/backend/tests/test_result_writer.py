@@ -0,0 +1,62 @@
+from datetime import datetime
+from types import SimpleNamespace
+
+from app.models import Review, ReplyJob
+from app.reply_jobs import enqueue_pending_reviews
+from app.result_writer import write_results
+
+
+def _add_reviews(db, count=3):
+    reviews = [Review(source_id=f"writer_{i}", customer_name=f"고객{i}", review_text=f"친절해요 {i}",
+                      review_date=datetime(2024, 1, 1)) for i in range(count)]
+    db.add_all(reviews)
+    db.commit()
+    enqueue_pending_reviews(db)
+    return reviews
+
+
+def _analysis(reply, keywords=None):
+    return SimpleNamespace(reply=reply, keywords=keywords or ["친절"], sentiment="긍정")
+
+
+def test_existing_reply_is_not_overwritten_unless_replace(db):
+    review = _add_reviews(db, count=1)[0]
+    assert write_results(db, [(review, _analysis("먼저 저장된 답변"), "single", None)]) == 1
+
+    # 리스를 잃은 작업자가 늦게 저장하려는 경우
+    assert write_results(db, [(review, _analysis("늦은 답변"), "single", None)]) == 0
+    db.refresh(review)
+    assert review.generated_reply == "먼저 저장된 답변"
+
+    assert write_results(db, [(review, _analysis("재생성 답변", ["맛", "서비스"]), "stream", None)], replace=True) == 1
+    db.expire_all()
+    review = db.get(Review, review.id)
+    assert review.generated_reply == "재생성 답변"
+    assert review.keywords == ["맛", "서비스"]
+
+
+def test_bad_row_does_not_discard_the_rest_of_the_batch(db):
+    good, bad, other = _add_reviews(db)
+    results = [
+        (good, _analysis("답변 1"), "batch", None),
+        (bad, _analysis("답변 2", keywords={object()}), "batch", None),  # JSON으로 바꿀 수 없음
+        (other, _analysis("답변 3"), "batch", None),
+    ]
+
+    assert write_results(db, results) == 2
+
+    db.expire_all()
+    assert db.get(Review, good.id).generated_reply == "답변 1"
+    assert db.get(Review, bad.id).generated_reply is None
+    assert db.get(Review, other.id).generated_reply == "답변 3"
+    job = db.query(ReplyJob).filter(ReplyJob.review_id == bad.id).one()
+    assert job.last_error.startswith("결과 저장 실패")
+
+
+def test_single_failed_write_records_reason(db):
+    review = _add_reviews(db, count=1)[0]
+
+    assert write_results(db, [(review, _analysis("답변", keywords={object()}), "single", None)]) == 0
+
+    job = db.query(ReplyJob).filter(ReplyJob.review_id == review.id).one()
+    assert job.last_error.startswith("결과 저장 실패")
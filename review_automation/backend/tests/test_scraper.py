@@ -0,0 +1,70 @@
+from datetime import datetime
+
+import requests
+
+from app.models import ReplyJob, ScrapeCursor, SystemLog
+from app.scraper import ReviewScraper
+
+
+class FailingSession:
+    """항상 연결 오류를 내는 requests.Session 대역"""
+
+    def get(self, *args, **kwargs):
+        raise requests.ConnectionError("connection refused")
+
+
+def _scraper():
+    scraper = ReviewScraper(base_url="http://source.test", incremental=True, streaming=False, page_size=0)
+    scraper.session = FailingSession()
+    return scraper
+
+
+def _stored_cursor(db):
+    cursor = ScrapeCursor(source="http://source.test", cursor="c-10", etag='"v1"',
+                          last_modified="Mon, 01 Jan 2024 00:00:00 GMT",
+                          last_review_id="dummy_10", last_review_date=datetime(2024, 1, 1))
+    db.add(cursor)
+    db.commit()
+    return cursor
+
+
+def test_failed_fetch_is_marked_failed():
+    reviews, meta = _scraper().fetch_reviews()
+
+    assert reviews == []
+    assert meta["failed"] is True
+    assert "connection refused" in meta["error"]
+
+
+def test_save_cursor_keeps_validators_on_failed_fetch(db):
+    scraper = _scraper()
+    cursor = _stored_cursor(db)
+
+    scraper.save_cursor(db, cursor, scraper.response_meta(None, error="timeout"), None)
+
+    db.refresh(cursor)
+    assert cursor.etag == '"v1"'
+    assert cursor.last_modified == "Mon, 01 Jan 2024 00:00:00 GMT"
+    assert cursor.cursor == "c-10"
+
+
+def test_scraping_job_logs_error_instead_of_completion(db):
+    scraper = _scraper()
+    _stored_cursor(db)
+
+    assert scraper._run_scraping_job(db) == 0
+
+    messages = [(log.log_type, log.message) for log in db.query(SystemLog).order_by(SystemLog.id)]
+    assert messages[-1][0] == "error"
+    assert "connection refused" in messages[-1][1]
+    assert not any("스크래핑 완료" in message for _, message in messages)
+    assert scraper.load_cursor(db).etag == '"v1"'
+
+
+def test_saved_reviews_are_enqueued_as_reply_jobs(db):
+    scraper = _scraper()
+    reviews = [{"source_id": f"dummy_{i}", "customer_name": "김단골", "review_text": f"맛있어요 {i}",
+                "review_date": datetime(2024, 1, 1 + i)} for i in range(2)]
+
+    assert scraper.save_review_stream(db, reviews)[1] == 2
+    assert db.query(ReplyJob).filter(ReplyJob.status == "pending").count() == 2
@@ -1,5 +1,6 @@
-from flask import Flask, render_template, request, jsonify
-from datetime import datetime
+from flask import Flask, render_template, request, jsonify, Response
+from datetime import datetime, timezone
+import hashlib
 import uuid
 import json
 import os
@@ -22,6 +23,32 @@ def save_reviews(reviews):
     with open(DATA_FILE, 'w', encoding='utf-8') as f:
         json.dump(reviews, f, ensure_ascii=False, indent=2)
 
+# (mtime, size) -> ETag 캐시 (파일이 바뀌지 않았으면 다시 해시하지 않음)
+_etag_cache = {}
+
+def get_store_validators():
+    """리뷰 저장소 상태로 ETag / Last-Modified 계산"""
+    stat = os.stat(DATA_FILE)
+    key = (stat.st_mtime_ns, stat.st_size)
+    
+    if key not in _etag_cache:
+        with open(DATA_FILE, 'rb') as f:
+            digest = hashlib.md5(f.read()).hexdigest()
+        _etag_cache.clear()
+        _etag_cache[key] = digest
+    
+    last_modified = datetime.fromtimestamp(int(stat.st_mtime), tz=timezone.utc)
+    return _etag_cache[key], last_modified
+
+def is_not_modified(etag, last_modified):
+    """조건부 요청 헤더가 현재 저장소 상태와 일치하는지 확인"""
+    # If-None-Match가 있으면 If-Modified-Since보다 우선 (RFC 9110)
+    if request.if_none_match:
+        return request.if_none_match.contains(etag)
+    if request.if_modified_since:
+        return last_modified <= request.if_modified_since
+    return False
+
 # 최근 7일간의 더미 데이터 추가
 from datetime import datetime, timedelta
 
@@ -642,9 +669,55 @@ def index():
 
 @app.route('/api/reviews', methods=['GET'])
 def get_reviews():
-    """리뷰 목록 API"""
+    """리뷰 목록 API
+    
+    증분 수집용 쿼리 파라미터:
+    - cursor: 이전 응답의 X-Next-Cursor 값 (이후에 추가된 리뷰만 반환)
+    - since: YYYY-MM-DD (해당 날짜 이후 리뷰만 반환)
+    
+    페이지네이션 (page_size가 없으면 전체 반환):
+    - page: 1부터 시작하는 페이지 번호
+    - page_size: 페이지당 리뷰 수 (X-Total-Count 헤더로 전체 개수 제공)
+    
+    ETag / Last-Modified는 저장소 전체의 버전이다. 저장소가 바뀌지 않았다면
+    어떤 커서로 요청해도 새 리뷰가 없으므로 파싱 없이 304를 돌려준다.
+    """
+    etag, last_modified = get_store_validators()
+    if is_not_modified(etag, last_modified):
+        response = Response(status=304)
+        response.set_etag(etag)
+        response.last_modified = last_modified
+        return response
+    
     reviews = load_reviews()
-    return jsonify(reviews)
+    
+    # 리뷰는 append-only이므로 커서는 목록 내 위치
+    cursor = request.args.get('cursor', type=int)
+    if cursor is not None:
+        # 데이터가 초기화되어 커서가 범위를 벗어나면 처음부터
+        if cursor < 0 or cursor > len(reviews):
+            cursor = 0
+        selected = reviews[cursor:]
+    else:
+        selected = reviews
+    
+    since = request.args.get('since')
+    if since:
+        selected = [r for r in selected if r.get('date', '') >= since]
+    
+    total_count = len(selected)
+    page_size = request.args.get('page_size', type=int)
+    if page_size and page_size > 0:
+        page = max(request.args.get('page', 1, type=int), 1)
+        start = (page - 1) * page_size
+        selected = selected[start:start + page_size]
+    
+    response = jsonify(selected)
+    response.headers['X-Next-Cursor'] = str(len(reviews))
+    response.headers['X-Total-Count'] = str(total_count)
+    response.set_etag(etag)
+    response.last_modified = last_modified
+    return response
 
 @app.route('/api/reviews', methods=['POST'])
 def add_review():
@@ -1,15 +1,20 @@
 import { useState } from 'react';
-import { regenerateReply } from '../services/api';
+import { streamRegenerateReply } from '../services/api';
 
 const ReviewList = ({ reviews, onReviewUpdate }) => {
   const [regenerating, setRegenerating] = useState(null);
+  const [streamingReply, setStreamingReply] = useState('');
 
   const handleRegenerate = async (reviewId) => {
     if (!confirm('이 리뷰의 답변을 재생성하시겠습니까?')) return;
     
     setRegenerating(reviewId);
+    setStreamingReply('');
     try {
-      await regenerateReply(reviewId);
+      // 생성되는 대로 답변을 보여주고, 완료되면 서버가 저장
+      await streamRegenerateReply(reviewId, (text) => {
+        setStreamingReply(prev => prev + text);
+      });
       alert('답변이 재생성되었습니다!');
       if (onReviewUpdate) onReviewUpdate();
     } catch (error) {
@@ -98,15 +103,28 @@ const ReviewList = ({ reviews, onReviewUpdate }) => {
 
           {/* 답변 상태 */}
           <div className="pt-3 border-t border-gray-100">
-            {review.generated_reply ? (
+            {regenerating === review.id ? (
+              <p className="text-sm text-gray-700 whitespace-pre-wrap">
+                {streamingReply || '답변 생성 중...'}
+              </p>
+            ) : review.generated_reply ? (
               <div className="flex items-center justify-between">
                 <div className="flex items-center gap-2">
                   <div className="w-2 h-2 bg-gray-600 rounded-full"></div>
                   <span className="text-xs text-gray-600 font-medium">답변 완료</span>
                 </div>
-                {review.reply_posted && (
-                  <span className="text-xs text-gray-600">게시됨</span>
-                )}
+                <div className="flex items-center gap-2">
+                  {review.reply_posted && (
+                    <span className="text-xs text-gray-600">게시됨</span>
+                  )}
+                  <button
+                    onClick={() => handleRegenerate(review.id)}
+                    disabled={regenerating !== null}
+                    className="text-xs text-yellow-700 hover:underline disabled:text-gray-400"
+                  >
+                    재생성
+                  </button>
+                </div>
               </div>
             ) : (
               <div className="flex items-center gap-2">
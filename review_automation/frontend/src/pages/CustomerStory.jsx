@@ -1,10 +1,9 @@
 import React, { useState, useEffect } from 'react';
-import { getRecentReviews, generateCustomerStory } from '../services/api';
+import { getCustomerStories } from '../services/api';
 import { Bell } from 'lucide-react';
 import NotificationDropdown from '../components/NotificationDropdown';
 
 const CustomerStory = () => {
-  const [reviews, setReviews] = useState([]);
   const [loading, setLoading] = useState(true);
   const [selectedCustomer, setSelectedCustomer] = useState(null);
   const [filterType, setFilterType] = useState('all');
@@ -12,146 +11,31 @@ const CustomerStory = () => {
   const [notificationOpen, setNotificationOpen] = useState(false);
 
   useEffect(() => {
-    fetchReviews();
-  }, []);
+    let timer;
+    let attempts = 0;
 
-  const fetchReviews = async () => {
-    try {
-      const data = await getRecentReviews(200, 0);
-      setReviews(data);
-      generateCustomerStories(data);
-    } catch (error) {
-      console.error('리뷰 데이터 로딩 실패:', error);
-    } finally {
-      setLoading(false);
-    }
-  };
+    // 스토리는 서버에 저장된 것을 한 번에 읽어옴 (페이지 로드 시 LLM 호출 없음)
+    const fetchStories = async () => {
+      try {
+        const data = await getCustomerStories();
+        setCustomerStories(data.stories);
 
-  const generateCustomerStories = async (reviewsData) => {
-    const customerGroups = reviewsData.reduce((acc, review) => {
-      const customerName = review.customer_name;
-      if (!acc[customerName]) {
-        acc[customerName] = {
-          name: customerName,
-          reviews: [],
-          totalReviews: 0,
-          positiveReviews: 0,
-          negativeReviews: 0,
-          firstReviewDate: null,
-          lastReviewDate: null,
-          avgSentiment: 0,
-          loyaltyScore: 0,
-          keywords: [],
-          story: ''
-        };
-      }
-      
-      const reviewDate = new Date(review.review_date);
-      acc[customerName].reviews.push(review);
-      acc[customerName].totalReviews++;
-      
-      if (review.sentiment === '긍정') acc[customerName].positiveReviews++;
-      if (review.sentiment === '부정') acc[customerName].negativeReviews++;
-      
-      if (!acc[customerName].firstReviewDate || reviewDate < new Date(acc[customerName].firstReviewDate)) {
-        acc[customerName].firstReviewDate = review.review_date;
-      }
-      if (!acc[customerName].lastReviewDate || reviewDate > new Date(acc[customerName].lastReviewDate)) {
-        acc[customerName].lastReviewDate = review.review_date;
-      }
-      
-      if (review.keywords) {
-        acc[customerName].keywords.push(...review.keywords);
+        // 처음 생성 중인 스토리가 있으면 잠시 후 다시 조회
+        const pending = data.stories.some(story => story.story_status === 'pending');
+        if ((pending || data.stories.length === 0) && attempts < 12) {
+          attempts++;
+          timer = setTimeout(fetchStories, 5000);
+        }
+      } catch (error) {
+        console.error('고객 스토리 로딩 실패:', error);
+      } finally {
+        setLoading(false);
       }
-      
-      return acc;
-    }, {});
+    };
 
-    const customerList = Object.values(customerGroups)
-      .filter(customer => customer.totalReviews >= 3)
-      .map(customer => {
-        const positiveRatio = customer.totalReviews > 0 ? (customer.positiveReviews / customer.totalReviews) : 0;
-        const reviewSpan = new Date(customer.lastReviewDate) - new Date(customer.firstReviewDate);
-        const monthsSpan = reviewSpan / (1000 * 60 * 60 * 24 * 30);
-        
-        let loyaltyScore = 0;
-        if (customer.totalReviews >= 10) loyaltyScore += 30;
-        if (customer.totalReviews >= 5) loyaltyScore += 20;
-        if (positiveRatio >= 0.8) loyaltyScore += 25;
-        if (positiveRatio >= 0.9) loyaltyScore += 15;
-        if (monthsSpan >= 6) loyaltyScore += 10;
-        
-        // 블랙리스트 판단 로직 (sentiment 기반)
-        const negativeRatio = customer.totalReviews > 0 ? (customer.negativeReviews / customer.totalReviews) : 0;
-        const isBlacklist = negativeRatio >= 0.7 || (customer.totalReviews >= 5 && negativeRatio >= 0.5);
-        
-        let customerType = 'normal';
-        if (isBlacklist) customerType = 'blacklist';
-        else if (loyaltyScore >= 70) customerType = 'vip';
-        else if (loyaltyScore >= 40) customerType = 'loyal';
-        
-        const keywordCount = {};
-        customer.keywords.forEach(keyword => {
-          keywordCount[keyword] = (keywordCount[keyword] || 0) + 1;
-        });
-        const topKeywords = Object.entries(keywordCount)
-          .sort((a, b) => b[1] - a[1])
-          .slice(0, 5)
-          .map(item => ({ keyword: item[0], count: item[1] }));
-        
-        return {
-          ...customer,
-          positiveRatio,
-          monthsSpan,
-          loyaltyScore,
-          customerType,
-          topKeywords
-        };
-      })
-      .sort((a, b) => b.loyaltyScore - a.loyaltyScore);
-
-    // 각 고객에 대해 AI 스토리 생성 (병렬 처리)
-    const storiesPromises = customerList.map(async (customer) => {
-      const story = await generateStory(customer, customer.loyaltyScore, customer.topKeywords);
-      return {
-        ...customer,
-        story
-      };
-    });
-    
-    const stories = await Promise.all(storiesPromises);
-    setCustomerStories(stories);
-  };
-
-  const generateStory = async (customer, loyaltyScore, topKeywords) => {
-    try {
-      // 리뷰 샘플 추출 (최대 3개)
-      const reviewSamples = customer.reviews
-        .slice(0, 3)
-        .map(r => r.review_text.substring(0, 100));
-      
-      // Gemini AI에 전달할 고객 데이터 구성
-      const customerData = {
-        name: customer.name,
-        totalReviews: customer.totalReviews,
-        positiveReviews: customer.positiveReviews,
-        loyaltyScore: loyaltyScore,
-        topKeywords: topKeywords,
-        firstReviewDate: customer.firstReviewDate,
-        lastReviewDate: customer.lastReviewDate,
-        reviewSamples: reviewSamples
-      };
-      
-      // Gemini AI로 스토리 생성
-      const response = await generateCustomerStory(customerData);
-      return response.story;
-      
-    } catch (error) {
-      console.error('스토리 생성 실패:', error);
-      // 실패 시 기본 스토리 반환
-      return `${customer.name}님은 총 ${customer.totalReviews}번의 리뷰를 남겨주신 소중한 고객입니다.`;
-    }
-  };
+    fetchStories();
+    return () => clearTimeout(timer);
+  }, []);
 
   const getCustomerTypeInfo = (type) => {
     switch (type) {
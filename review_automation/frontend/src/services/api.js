@@ -76,6 +76,57 @@ export const regenerateReply = async (reviewId) => {
   return response.data;
 };
 
+// SSE 스트리밍 요청 (EventSource는 GET만 지원하므로 fetch로 읽음)
+// onToken(text)은 조각이 올 때마다 호출되고, done 이벤트의 데이터를 반환
+const streamEvents = async (path, body, onToken) => {
+  const response = await fetch(`${API_BASE_URL}${path}`, {
+    method: 'POST',
+    headers: { 'Content-Type': 'application/json', Accept: 'text/event-stream' },
+    body: body ? JSON.stringify(body) : undefined,
+  });
+  if (!response.ok || !response.body) {
+    throw new Error(`스트리밍 요청 실패 (${response.status})`);
+  }
+
+  const reader = response.body.getReader();
+  const decoder = new TextDecoder();
+  let buffer = '';
+
+  while (true) {
+    const { value, done } = await reader.read();
+    if (done) break;
+    buffer += decoder.decode(value, { stream: true });
+
+    // 이벤트는 빈 줄로 구분
+    let boundary;
+    while ((boundary = buffer.indexOf('\n\n')) !== -1) {
+      const raw = buffer.slice(0, boundary);
+      buffer = buffer.slice(boundary + 2);
+
+      let event = 'message';
+      let data = '';
+      raw.split('\n').forEach(line => {
+        if (line.startsWith('event:')) event = line.slice(6).trim();
+        else if (line.startsWith('data:')) data += line.slice(5).trim();
+      });
+      const payload = data ? JSON.parse(data) : {};
+
+      if (event === 'token') onToken?.(payload.text);
+      else if (event === 'error') throw new Error(payload.detail);
+      else if (event === 'done') return payload;
+    }
+  }
+  throw new Error('스트림이 완료되지 않았습니다');
+};
+
+// 답변 재생성 (스트리밍)
+export const streamRegenerateReply = (reviewId, onToken) =>
+  streamEvents(`/reviews/${reviewId}/regenerate-reply/stream`, null, onToken);
+
+// 고객 스토리 생성 (스트리밍)
+export const streamCustomerStory = (customerData, onToken) =>
+  streamEvents('/generate-customer-story/stream', customerData, onToken);
+
 // 최근 로그 조회
 export const getRecentLogs = async (limit = 50) => {
   const response = await api.get('/logs/recent', {
@@ -84,6 +135,12 @@ export const getRecentLogs = async (limit = 50) => {
   return response.data;
 };
 
+// 저장된 고객 스토리 조회 (리뷰가 바뀐 고객만 서버가 백그라운드에서 다시 생성)
+export const getCustomerStories = async () => {
+  const response = await api.get('/customer-stories');
+  return response.data;
+};
+
 // 고객 스토리 생성 (Gemini AI)
 export const generateCustomerStory = async (customerData) => {
   const response = await api.post('/generate-customer-story', customerData);